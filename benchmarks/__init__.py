@@ -0,0 +1,5 @@
+"""
+The benchmark suite of the HRI95 pipeline.
+
+Run it with "python -m benchmarks", see "python -m benchmarks --help".
+"""
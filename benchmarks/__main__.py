@@ -0,0 +1,124 @@
+"""
+Runs the benchmark suite from the command line.
+"""
+import argparse
+import sys
+from typing import Any
+
+from benchmarks.baseline import DEFAULT_TOLERANCE, compare_results, load_results, save_results
+from benchmarks.images import DEFAULT_SIZES
+from benchmarks.suite import EXECUTORS, STAGES, run_suite
+
+
+def integer_list(value: str) -> tuple[int, ...]:
+    """Parse a comma separated list of positive integers.
+
+    :param value: The comma separated integers.
+    :return: The integers.
+    """
+    try:
+        integers = tuple(int(item) for item in value.split(",") if item.strip())
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"Not a list of integers: {value}.") from error
+    if not integers or min(integers) < 1:
+        raise argparse.ArgumentTypeError(f"Not a list of positive integers: {value}.")
+    return integers
+
+
+def name_list(choices: tuple[str, ...]) -> callable:
+    """Return the parser of a comma separated subset of the choices.
+
+    :param choices: The valid names.
+    :return: The parser of the names.
+    """
+    def parse(value: str) -> tuple[str, ...]:
+        """Parse the comma separated names."""
+        names = tuple(name.strip() for name in value.split(",") if name.strip())
+        if not names or not set(names).issubset(choices):
+            raise argparse.ArgumentTypeError(
+                f"Must be a comma separated subset of {', '.join(choices)}.")
+        return names
+    return parse
+
+
+def argument_parser() -> argparse.Namespace:
+    """Parse the command line arguments and return the parsed arguments.
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the stages of the HRI95 pipeline on procedural images.")
+    parser.add_argument("--sizes", type=integer_list, default=DEFAULT_SIZES,
+                        help="Comma separated image sizes (default: %(default)s)")
+    parser.add_argument("--stages", type=name_list(STAGES), default=STAGES,
+                        help=f"Comma separated stages (default: {','.join(STAGES)})")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="Timed calls per stage (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Untimed calls per stage (default: %(default)s)")
+    parser.add_argument("--workers", type=integer_list, default=(1, 2, 4),
+                        help="Comma separated worker counts of the throughput runs")
+    parser.add_argument("--executors", type=name_list(EXECUTORS), default=EXECUTORS,
+                        help=f"Comma separated executors (default: {','.join(EXECUTORS)})")
+    parser.add_argument("--throughput-size", type=int, default=512,
+                        help="Image size of the throughput runs (default: %(default)s)")
+    parser.add_argument("--throughput-images", type=int, default=8,
+                        help="Predicted images per throughput run, 0 to skip them")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64",
+                        help="Floating point precision of the metrics")
+    parser.add_argument("--output", "-o", type=str,
+                        help="Write the results as a JSON baseline to the path")
+    parser.add_argument("--baseline", "-b", type=str,
+                        help="Compare the results with the JSON baseline at the path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown flagged as a regression (default: %(default)s)")
+    return parser.parse_args()
+
+
+def print_report(results: dict[str, Any]) -> None:
+    """Print the stage percentiles and the throughput scaling as tables.
+
+    :param results: The results of run_suite.
+    """
+    print("| Stage | Size | p50 (ms) | p90 (ms) | p99 (ms) |")
+    print("| --- | --- | --- | --- | --- |")
+    for stage, summaries in results["stages"].items():
+        for size, summary in summaries.items():
+            print(f"| {stage} | {size} | {summary['p50'] * 1e3:.2f} "
+                  f"| {summary['p90'] * 1e3:.2f} | {summary['p99'] * 1e3:.2f} |")
+
+    for module, summary in results.get("imports", {}).items():
+        print(f"| import {module} | - | {summary['p50'] * 1e3:.2f} "
+              f"| {summary['p90'] * 1e3:.2f} | {summary['p99'] * 1e3:.2f} |")
+
+    if results["throughput"]:
+        serial = results["throughput"].get("serial", {}).get("1")
+        print("\n| Executor | Workers | Pairs/s | Speed-up over serial |")
+        print("| --- | --- | --- | --- |")
+        for executor, throughputs in results["throughput"].items():
+            for workers, throughput in throughputs.items():
+                speedup = f"{throughput / serial:.2f}x" if serial else "-"
+                print(f"| {executor} | {workers} | {throughput:.2f} | {speedup} |")
+
+
+if __name__ == "__main__":
+    arguments = argument_parser()
+    benchmark_results = run_suite(
+        sizes=arguments.sizes, repeats=arguments.repeats, warmup=arguments.warmup,
+        stages=arguments.stages, workers=arguments.workers, executors=arguments.executors,
+        throughput_size=arguments.throughput_size,
+        throughput_images=arguments.throughput_images, precision=arguments.precision,
+        progress=lambda message: print(f"Running {message}...", file=sys.stderr))
+    print_report(benchmark_results)
+
+    if arguments.output is not None:
+        save_results(benchmark_results, arguments.output)
+
+    if arguments.baseline is not None:
+        regressions = compare_results(benchmark_results, load_results(arguments.baseline),
+                                      tolerance=arguments.tolerance)
+        print(f"\n{len(regressions)} regressions over {arguments.tolerance:.0%}")
+        for regression in regressions:
+            print(f"- {regression['name']}: {regression['baseline']:.6g} -> "
+                  f"{regression['current']:.6g} ({regression['ratio']:.2f}x)")
+        sys.exit(1 if regressions else 0)
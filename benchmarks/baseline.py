@@ -0,0 +1,97 @@
+"""
+Holds the baseline files of the benchmarks and the regression checks.
+"""
+import json
+import math
+from typing import Any
+
+DEFAULT_TOLERANCE = 0.10
+"""The default relative slowdown tolerated before flagging a regression."""
+
+
+def save_results(results: dict[str, Any], path: str) -> None:
+    """Save the results of a run as a JSON baseline.
+
+    :param results: The results of run_suite.
+    :param path: The path of the JSON file.
+    """
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def load_results(path: str) -> dict[str, Any]:
+    """Load the results of a run from a JSON baseline.
+
+    :param path: The path of the JSON file.
+    :return: The results of the run.
+    """
+    with open(path, "r", encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def _slowdown(baseline_value: float, current_value: float, higher_is_faster: bool) -> float:
+    """Return how many times slower the current value is than the baseline.
+
+    :param baseline_value: The value of the baseline run.
+    :param current_value: The value of the current run.
+    :param higher_is_faster: If the values are rates instead of durations.
+    :return: The slowdown ratio, NaN if a value is not positive.
+    """
+    if baseline_value <= 0 or current_value <= 0:
+        return math.nan
+    if higher_is_faster:
+        return baseline_value / current_value
+    return current_value / baseline_value
+
+
+def _pair_entries(current: dict[str, Any], baseline: dict[str, Any],
+                  statistic: str) -> list[tuple[str, float, float, bool]]:
+    """Pair the entries of the runs present in both.
+
+    :param current: The results of the current run.
+    :param baseline: The results of the baseline run.
+    :param statistic: The statistic of the stages and imports.
+    :return: The names, the baseline and the current values, and if the
+    values are rates instead of durations.
+    """
+    pairs = []
+    for stage, summaries in current.get("stages", {}).items():
+        for size, summary in summaries.items():
+            if (reference := baseline.get("stages", {}).get(stage, {}).get(size)) is not None:
+                pairs.append((f"{stage} {size}x{size} {statistic}",
+                              reference[statistic], summary[statistic], False))
+    for module, summary in current.get("imports", {}).items():
+        if (reference := baseline.get("imports", {}).get(module)) is not None:
+            pairs.append((f"import {module} {statistic}",
+                          reference[statistic], summary[statistic], False))
+    for executor, throughputs in current.get("throughput", {}).items():
+        for workers, throughput in throughputs.items():
+            reference = baseline.get("throughput", {}).get(executor, {}).get(workers)
+            if reference is not None:
+                pairs.append((f"throughput {executor} x{workers}", reference, throughput, True))
+    return pairs
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    statistic: str = "p50") -> list[dict[str, Any]]:
+    """Compare a run with the baseline and return the regressions.
+
+    A stage or an import regresses if its statistic is slower than the
+    baseline by more than the tolerance, a throughput if it is lower by
+    more than the tolerance. The entries missing from either run are skipped.
+
+    :param current: The results of the current run.
+    :param baseline: The results of the baseline run.
+    :param tolerance: The tolerated relative slowdown, e.g. 0.1 for 10%.
+    :param statistic: The statistic of the stages to be compared.
+    :return: The regressions with their names, values and slowdown ratios.
+    """
+    regressions = []
+    for name, baseline_value, current_value, higher_is_faster in _pair_entries(
+            current, baseline, statistic):
+        if (ratio := _slowdown(baseline_value, current_value, higher_is_faster)) > 1 + tolerance:
+            regressions.append({"name": name, "baseline": baseline_value,
+                                "current": current_value, "ratio": ratio})
+    return regressions
@@ -0,0 +1,104 @@
+"""
+Holds the procedural test images of the benchmarks.
+"""
+import os
+
+import numpy
+
+from core.preprocessors import bicubic_upscale, shrink_to
+from core.utils import save_image
+
+DEFAULT_SIZES = (128, 256, 512, 1024, 2048, 4096)
+"""The default side lengths of the benchmark images."""
+
+
+def generate_reference(size: int, seed: int = 0) -> numpy.ndarray:
+    """Generate a reference image with harmonics at every scale.
+
+    The image is a sum of random gratings, discs and noise, so its
+    spectrum has structure from the center to the borders like a photo.
+
+    :param size: The side length of the image.
+    :param seed: The seed of the random generator.
+    :return: The image in BGR as uint8.
+    """
+    generator = numpy.random.default_rng(seed)
+    rows, columns = numpy.mgrid[0:size, 0:size] / size
+
+    channels = []
+    for _ in range(3):
+        channel = numpy.zeros((size, size))
+
+        # Add gratings with random frequencies and orientations.
+        for _ in range(12):
+            frequency = generator.uniform(1, size / 4)
+            angle = generator.uniform(0, numpy.pi)
+            phase = generator.uniform(0, 2 * numpy.pi)
+            channel += numpy.sin(2 * numpy.pi * frequency * (
+                rows * numpy.cos(angle) + columns * numpy.sin(angle)) + phase) / frequency
+
+        # Add discs for the edges.
+        for _ in range(8):
+            row_center, column_center = generator.uniform(0, 1, 2)
+            radius = generator.uniform(0.02, 0.2)
+            channel[(rows - row_center) ** 2 + (columns - column_center) ** 2
+                    < radius ** 2] += generator.uniform(-0.5, 0.5)
+
+        channel += generator.normal(0, 0.02, (size, size))
+        channels.append(channel)
+
+    image = numpy.dstack(channels)
+    image = (image - image.min()) / (image.max() - image.min()) * 255
+    return image.round().astype(numpy.uint8)
+
+
+def generate_prediction(reference: numpy.ndarray, factor: int = 4) -> numpy.ndarray:
+    """Generate a super-resolved image by a bicubic upscale of the shrunk reference.
+
+    :param reference: The reference image.
+    :param factor: The downscaling and upscaling factor.
+    :return: The predicted image with the shape of the reference.
+    """
+    height, width = reference.shape[:2]
+    low_resolution = shrink_to(reference, width // factor, height // factor)
+    return bicubic_upscale(low_resolution, factor)
+
+
+def write_pair(directory: str, size: int, seed: int = 0) -> tuple[str, str]:
+    """Write a reference and a predicted image as PNG files.
+
+    :param directory: The directory of the images.
+    :param size: The side length of the images.
+    :param seed: The seed of the random generator.
+    :return: The paths of the reference and the predicted images.
+    """
+    reference = generate_reference(size, seed)
+    true_path = os.path.join(directory, f"true_{size}_{seed}.png")
+    predicted_path = os.path.join(directory, f"predicted_{size}_{seed}.png")
+    save_image(reference, true_path)
+    save_image(generate_prediction(reference), predicted_path)
+    return true_path, predicted_path
+
+
+def write_predictions(directory: str, reference: numpy.ndarray, size: int,
+                      count: int) -> list[str]:
+    """Write distinct predicted images of the reference as PNG files.
+
+    The predictions cycle through the upscaling factors 2, 4 and 8 and
+    differ by a small seeded noise.
+
+    :param directory: The directory of the images.
+    :param reference: The reference image.
+    :param size: The side length of the images, used in the file names.
+    :param count: The number of the predicted images.
+    :return: The paths of the predicted images.
+    """
+    paths = []
+    for index in range(count):
+        prediction = generate_prediction(reference, factor=(2, 4, 8)[index % 3])
+        noise = numpy.random.default_rng(index).normal(0, 1, prediction.shape)
+        prediction = numpy.clip(prediction + noise, 0, 255).astype(numpy.uint8)
+        path = os.path.join(directory, f"prediction_{size}_{index}.png")
+        save_image(prediction, path)
+        paths.append(path)
+    return paths
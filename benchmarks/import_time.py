@@ -0,0 +1,84 @@
+"""
+Holds the import time budget of the command line interface.
+
+Run it with "python -m benchmarks.import_time", it exits with 1 if the
+budget is exceeded or a heavy dependency is imported at startup.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Any
+
+from benchmarks.timing import summarize
+
+DEFAULT_BUDGET = 0.5
+"""The default import time budget of the command line interface in seconds."""
+
+DEFERRED_MODULES = ("matplotlib", "scipy", "skimage", "cv2")
+"""The packages which must not be imported at startup."""
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+"""The directory of the hri95.py script."""
+
+
+def measure_import(module: str = "hri95") -> tuple[float, list[str]]:
+    """Import the module in a new interpreter and measure it.
+
+    :param module: The name of the module.
+    :return: The cumulative import time of the module in seconds, and the
+    deferred packages imported with it.
+    """
+    script = (f"import sys, {module}\n"
+              "print(','.join(sorted({name.split('.')[0] for name in sys.modules})))")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                             cwd=REPOSITORY_DIRECTORY, capture_output=True,
+                             text=True, check=True)
+
+    # The line of the module holds its cumulative time in microseconds.
+    cumulative = next(int(line.split("|")[1])
+                      for line in process.stderr.splitlines()
+                      if line.startswith("import time:") and line.split("|")[2].strip() == module)
+    packages = process.stdout.strip().split(",")
+    return cumulative / 1e6, [name for name in DEFERRED_MODULES if name in packages]
+
+
+def measure_imports(module: str = "hri95", repeats: int = 5) -> dict[str, Any]:
+    """Measure the import time of the module in new interpreters.
+
+    :param module: The name of the module.
+    :param repeats: The number of the interpreters.
+    :return: The summary of the import times, with the deferred packages
+    imported with the module.
+    """
+    samples = []
+    imported: set[str] = set()
+    for _ in range(repeats):
+        duration, packages = measure_import(module)
+        samples.append(duration)
+        imported.update(packages)
+    summary: dict[str, Any] = summarize(samples)
+    summary["deferred_imported"] = sorted(imported)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.import_time",
+        description="Check the import time budget of the command line interface.")
+    parser.add_argument("--module", type=str, default="hri95",
+                        help="Module to import (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="Budget of the median import time in seconds (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="Number of the interpreters (default: %(default)s)")
+    arguments = parser.parse_args()
+
+    import_summary = measure_imports(arguments.module, arguments.repeats)
+    print(f"import {arguments.module}: p50 {import_summary['p50'] * 1e3:.1f} ms, "
+          f"p90 {import_summary['p90'] * 1e3:.1f} ms, budget {arguments.budget * 1e3:.0f} ms")
+    failed = import_summary["p50"] > arguments.budget
+    if import_summary["deferred_imported"]:
+        print(f"Imported at startup: {', '.join(import_summary['deferred_imported'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,214 @@
+"""
+Holds the stages of the benchmark suite and the analyzer throughput runs.
+"""
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import cv2
+import numpy
+import scipy
+
+from benchmarks.import_time import measure_imports
+from benchmarks.images import DEFAULT_SIZES, generate_reference, write_pair, write_predictions
+from benchmarks.timing import summarize, time_function
+from core.batch import METRICS
+from core.cache import get_cache
+from core.centered_ssim import HalfPlaneCenteredSSIM
+from core.disk_cache import CACHE_DIR_VARIABLE, CACHE_MAX_BYTES_VARIABLE
+from core.image import Image
+from core.radius_search import get_grid_sizes, linear_search
+from core.settings import SRAnalyzerSettings
+from core.sr_analyzer import SRAnalyzer
+from core.utils import get_grayscale, get_half_fft_of_image, read_image, save_image
+
+STAGES = ("decode", "grayscale", "fft", "radius_search", "hri95", "ssim", "psnr", "mse")
+"""The stages timed for every image size."""
+
+EXECUTORS = ("serial", "thread", "process")
+"""The executors of the analyzer throughput runs."""
+
+
+@contextmanager
+def caches_disabled() -> Iterator[None]:
+    """Disable the artifact and the disk caches, so every call computes.
+
+    :return: The context of the disabled caches.
+    """
+    cache = get_cache()
+    max_bytes = cache.max_bytes
+    environment = {name: os.environ.pop(name, None)
+                   for name in (CACHE_DIR_VARIABLE, CACHE_MAX_BYTES_VARIABLE)}
+    cache.resize(0)
+    try:
+        yield
+    finally:
+        cache.resize(max_bytes)
+        for name, value in environment.items():
+            if value is not None:
+                os.environ[name] = value
+
+
+def get_environment() -> dict[str, Any]:
+    """Return the description of the machine and the libraries.
+
+    :return: The environment of the run.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+        "opencv": cv2.__version__,  # pylint: disable=no-member
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def get_stage_functions(true_path: str, predicted_path: str,
+                        precision: str = "float64") -> dict[str, Callable[[], Any]]:
+    """Return the functions of the stages on an image pair.
+
+    Each stage starts from the output of the previous ones, computed
+    once here, so only the stage itself is timed.
+
+    :param true_path: The path of the reference image.
+    :param predicted_path: The path of the predicted image.
+    :param precision: The precision of the metrics.
+    :return: The functions of the stages by their names.
+    """
+    true_pixels = read_image(true_path)
+    predicted_pixels = read_image(predicted_path)
+    fft_of_true = get_half_fft_of_image(true_pixels, precision=precision)
+    fft_of_pred = get_half_fft_of_image(predicted_pixels, precision=precision)
+    true_image = Image(true_pixels, name="true")
+    predicted_image = Image(predicted_pixels, name="predicted")
+
+    def search_radius() -> int:
+        """Calculate the SSIM map of the spectra and search the radius."""
+        ssim_of_grid = HalfPlaneCenteredSSIM(
+            fft_of_true, fft_of_pred, data_range=fft_of_true.max() - fft_of_true.min())
+        return linear_search(ssim_of_grid, get_grid_sizes(fft_of_true.shape[0]), 0.95)
+
+    def metric_function(metric_name: str) -> Callable[[], Any]:
+        """Return the function calculating the metric on the pair."""
+        metric = METRICS[metric_name](precision=precision)
+        return lambda: metric.calculate(y_true=true_image, y_pred=predicted_image)
+
+    return {
+        "decode": lambda: read_image(true_path),
+        "grayscale": lambda: get_grayscale(true_pixels),
+        "fft": lambda: get_half_fft_of_image(true_pixels, precision=precision),
+        "radius_search": search_radius,
+        **{metric_name: metric_function(metric_name) for metric_name in METRICS},
+    }
+
+
+# pylint: disable-next=too-many-arguments
+def measure_throughput(true_path: str, predicted_paths: list[str], executor: str,
+                       workers: int, repeats: int = 3, precision: str = "float64") -> float:
+    """Measure the end-to-end throughput of SRAnalyzer with all the metrics.
+
+    The artifact cache is cleared before every run, so the reference is
+    decoded and transformed once per run as in a cold start.
+
+    :param true_path: The path of the reference image.
+    :param predicted_paths: The paths of the predicted images.
+    :param executor: The executor of the analyzer.
+    :param workers: The number of workers of the executor.
+    :param repeats: The number of runs, the median is reported.
+    :param precision: The precision of the metrics.
+    :return: The median number of the image pairs scored per second.
+    """
+    durations = []
+    for _ in range(repeats):
+        get_cache().clear()
+        analyzer = SRAnalyzer(SRAnalyzerSettings(
+            name="benchmark", precision=precision, executor=executor, workers=workers))
+        for metric_class in METRICS.values():
+            analyzer.add_metric(metric_class())
+        analyzer.add_reference_image(Image(true_path, name="true"))
+        for index, predicted_path in enumerate(predicted_paths):
+            analyzer.add_image(Image(predicted_path, name=f"predicted_{index}"))
+
+        start = time.perf_counter()
+        analyzer.calculate()
+        durations.append(time.perf_counter() - start)
+    return len(predicted_paths) / float(numpy.median(durations))
+
+
+# pylint: disable-next=too-many-arguments
+def run_suite(sizes: tuple[int, ...] = DEFAULT_SIZES, repeats: int = 5, warmup: int = 1,
+              stages: tuple[str, ...] = STAGES, workers: tuple[int, ...] = (1, 2, 4),
+              executors: tuple[str, ...] = EXECUTORS, throughput_size: int = 512,
+              throughput_images: int = 8, precision: str = "float64",
+              progress: Callable[[str], None] = None) -> dict[str, Any]:
+    """Run the benchmarks and return the results.
+
+    :param sizes: The side lengths of the images of the stages.
+    :param repeats: The number of timed calls of every stage.
+    :param warmup: The number of untimed calls before.
+    :param stages: The names of the stages, a subset of STAGES.
+    :param workers: The worker counts of the throughput runs.
+    :param executors: The executors of the throughput runs. Serial runs
+    are measured with one worker only.
+    :param throughput_size: The side length of the throughput images.
+    :param throughput_images: The number of the predicted images in a
+    throughput run. No throughput run is made if it is zero.
+    :param precision: The precision of the metrics.
+    :param progress: The function receiving the progress messages.
+    :return: The results, with the stage summaries by stage and size, the
+    import time summary of the command line interface and the throughputs
+    in pairs per second by executor and worker count.
+    """
+    if unknown_stages := set(stages) - set(STAGES):
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown_stages))}.")
+    report = progress or (lambda message: None)
+
+    results: dict[str, Any] = {
+        "environment": get_environment(),
+        "settings": {
+            "sizes": list(sizes), "repeats": repeats, "warmup": warmup,
+            "workers": list(workers), "executors": list(executors),
+            "throughput_size": throughput_size, "throughput_images": throughput_images,
+            "precision": precision, "argv": sys.argv[1:],
+        },
+        "stages": {stage: {} for stage in stages},
+        "imports": {},
+        "throughput": {},
+    }
+
+    # Measure the startup of the command line interface.
+    report("import hri95")
+    results["imports"]["hri95"] = measure_imports("hri95", repeats)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Time the stages on every size.
+        with caches_disabled():
+            for size in sizes:
+                functions = get_stage_functions(*write_pair(directory, size), precision)
+                for stage in stages:
+                    report(f"{stage} {size}x{size}")
+                    results["stages"][stage][str(size)] = summarize(
+                        time_function(functions[stage], repeats, warmup))
+
+        # Measure the analyzer throughput on every worker count.
+        if throughput_images > 0:
+            reference = generate_reference(throughput_size)
+            true_path = os.path.join(directory, "throughput_true.png")
+            save_image(reference, true_path)
+            predicted_paths = write_predictions(directory, reference, throughput_size,
+                                                throughput_images)
+            for executor in executors:
+                results["throughput"][executor] = {}
+                for worker_count in ((1,) if executor == "serial" else workers):
+                    report(f"throughput {executor} x{worker_count}")
+                    results["throughput"][executor][str(worker_count)] = measure_throughput(
+                        true_path, predicted_paths, executor, worker_count,
+                        repeats=max(1, min(repeats, 3)), precision=precision)
+    return results
@@ -0,0 +1,59 @@
+"""
+Holds the timing and the statistics of the benchmarks.
+"""
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+PERCENTILES = (50, 90, 99)
+"""The percentiles reported for every stage."""
+
+
+def time_function(function: Callable[[], Any], repeats: int = 5,
+                  warmup: int = 1) -> list[float]:
+    """Time the calls of the function with the performance counter.
+
+    :param function: The function to be timed, without arguments.
+    :param repeats: The number of timed calls.
+    :param warmup: The number of untimed calls before.
+    :return: The durations of the timed calls in seconds.
+    """
+    for _ in range(warmup):
+        function()
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples: list[float], rank: float) -> float:
+    """Return the percentile of the samples with linear interpolation.
+
+    :param samples: The samples.
+    :param rank: The percentile between 0 and 100.
+    :return: The percentile.
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * rank / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summarize the durations of a stage.
+
+    :param samples: The durations in seconds.
+    :return: The percentiles, the mean, the minimum and the standard
+    deviation in seconds, and the number of samples.
+    """
+    summary = {f"p{rank}": percentile(samples, rank) for rank in PERCENTILES}
+    summary["mean"] = statistics.fmean(samples)
+    summary["min"] = min(samples)
+    summary["stdev"] = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    summary["samples"] = len(samples)
+    return summary
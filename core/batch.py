@@ -0,0 +1,265 @@
+"""
+Holds the batch scoring of image pairs for the command line interface.
+"""
+import csv
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, TextIO
+
+from core.cache import get_cache
+from core.fft_backend import configure_fft_backend, get_fft_backend
+from core.image import Image
+from core.metrics import (
+    HarmonicsRadius,
+    MeanSquaredError,
+    StructuralSimilarityIndex,
+    PeakSignalToNoiseRatio
+)
+from core.metrics.interface_metric import InterfaceMetric
+from core.metrics.spatial_metrics import SPATIAL_METRICS
+from core.utils import get_half_fft_of_image
+
+METRICS: dict[str, type[InterfaceMetric]] = {
+    "hri95": HarmonicsRadius,
+    "mse": MeanSquaredError,
+    "ssim": StructuralSimilarityIndex,
+    "psnr": PeakSignalToNoiseRatio,
+}
+"""Holds the metrics selectable in the batch mode by their names."""
+
+OUTPUT_FORMATS = ("jsonl", "csv")
+"""Holds the supported output formats."""
+
+
+def read_manifest(manifest_path: str) -> list[tuple[str, str]]:
+    """Read the image pairs from a CSV or JSONL manifest.
+
+    CSV manifests have a header with the "true" and "predicted" columns,
+    JSONL manifests have one object with the same keys per line. Relative
+    paths are resolved from the directory of the manifest.
+
+    :param manifest_path: The path of the manifest.
+    :return: The true and predicted image paths.
+    """
+    base_directory = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8") as manifest:
+        if manifest_path.endswith(".jsonl"):
+            records = [json.loads(line) for line in manifest if line.strip()]
+        else:
+            records = list(csv.DictReader(manifest))
+
+    pairs = []
+    for line_number, record in enumerate(records, start=1):
+        if "true" not in record or "predicted" not in record:
+            raise ValueError(
+                f"Record {line_number} of {manifest_path} must have "
+                "the 'true' and 'predicted' keys.")
+        pairs.append((os.path.join(base_directory, record["true"]),
+                      os.path.join(base_directory, record["predicted"])))
+    return pairs
+
+
+def _match_stems(directory: str, pattern: str) -> dict[str, str]:
+    """Return the files of the directory matching the pattern by the part
+    matched by the wildcard.
+
+    :param directory: The directory of the images.
+    :param pattern: The file name pattern with exactly one "*".
+    :return: The paths of the files by their stems.
+    """
+    if pattern.count("*") != 1:
+        raise ValueError(f"The pattern must have exactly one '*': {pattern}.")
+
+    prefix, suffix = pattern.split("*")
+    stem_regex = re.compile(re.escape(prefix) + "(.+)" + re.escape(suffix) + r"\Z")
+    stems = {}
+    for file_name in sorted(os.listdir(directory)):
+        match = stem_regex.match(file_name)
+        if match is not None:
+            stems[match.group(1)] = os.path.join(directory, file_name)
+    return stems
+
+
+def list_images(directory: str, pattern: str = "*.png") -> list[str]:
+    """List the images of the directory matching the pattern.
+
+    :param directory: The directory of the images.
+    :param pattern: The file name pattern with exactly one "*".
+    :return: The paths of the images sorted by their keys.
+    """
+    stems = _match_stems(directory, pattern)
+    return [stems[stem] for stem in sorted(stems)]
+
+
+def pair_directories(true_directory: str, predicted_directory: str,
+                     true_pattern: str = "*.png",
+                     predicted_pattern: str = "*.png") -> list[tuple[str, str]]:
+    """Pair the images of two directories by their file names.
+
+    The part of the file name matched by the "*" of the patterns is the
+    key of the pair, e.g. "img_001" for "img_001_HR.png" with "*_HR.png"
+    and for "img_001_SR.png" with "*_SR.png".
+
+    :param true_directory: The directory of the true images.
+    :param predicted_directory: The directory of the predicted images.
+    :param true_pattern: The file name pattern of the true images.
+    :param predicted_pattern: The file name pattern of the predicted images.
+    :return: The true and predicted image paths sorted by their keys.
+    """
+    true_stems = _match_stems(true_directory, true_pattern)
+    predicted_stems = _match_stems(predicted_directory, predicted_pattern)
+    return [(true_stems[stem], predicted_stems[stem])
+            for stem in sorted(true_stems.keys() & predicted_stems.keys())]
+
+
+def score_pair(true_path: str, predicted_path: str, metric_names: list[str],
+               precision: str = "float64", low_memory: bool = False) -> dict[str, Any]:
+    """Calculate the metrics of an image pair.
+
+    The decoded images and their spectra are kept in the artifact cache,
+    so a reference is read once per process however many pairs it has.
+
+    :param true_path: The path of the true image.
+    :param predicted_path: The path of the predicted image.
+    :param metric_names: The names of the metrics, keys of METRICS.
+    :param precision: The precision of the metrics.
+    :param low_memory: If the spectra are calculated within the bounded
+    peak memory of core.low_memory, and the metrics in float32. The
+    artifacts of the predicted image are released once scored.
+    :return: The row of the pair with the metric values by their names.
+    """
+    if low_memory:
+        precision = "float32"
+    true_image = Image(true_path, name=os.path.basename(true_path))
+    predicted_image = Image(predicted_path, name=os.path.basename(predicted_path))
+    if true_image.get_image() is None:
+        raise FileNotFoundError(f"The image cannot be read: {true_path}.")
+    if predicted_image.get_image() is None:
+        raise FileNotFoundError(f"The image cannot be read: {predicted_path}.")
+
+    # The MSE, PSNR and SSIM share one calculation if selected together.
+    fused = tuple(metric for metric in SPATIAL_METRICS if metric in metric_names)
+    if len(fused) < 2:
+        fused = ()
+    row: dict[str, Any] = {"true": true_path, "predicted": predicted_path}
+    for metric_name in metric_names:
+        metric_result = METRICS[metric_name](precision=precision).calculate(
+            y_true=true_image, y_pred=predicted_image, low_memory=low_memory,
+            persist=True, fused=fused)
+        row[metric_name] = float(metric_result.value)
+    if low_memory:
+        get_cache().discard(predicted_image.get_key())
+    return row
+
+
+def _create_pool(workers: int) -> ProcessPoolExecutor:
+    """Create the worker processes, calculating the spectra with the FFT
+    backend of this process.
+
+    :param workers: The number of worker processes.
+    :return: The process pool.
+    """
+    fft_backend = get_fft_backend()
+    return ProcessPoolExecutor(max_workers=workers, initializer=configure_fft_backend,
+                               initargs=(fft_backend.name, fft_backend.workers))
+
+
+def score_pairs(pairs: list[tuple[str, str]], metric_names: list[str], workers: int = 1,
+                precision: str = "float64", low_memory: bool = False) -> Iterator[dict[str, Any]]:
+    """Calculate the metrics of the image pairs and yield each row as soon
+    as it is ready.
+
+    With more than one worker the rows are yielded in completion order.
+    The pairs of the same reference are submitted next to each other so
+    that each worker reuses its cached reference.
+
+    :param pairs: The true and predicted image paths.
+    :param metric_names: The names of the metrics, keys of METRICS.
+    :param workers: The number of worker processes.
+    :param precision: The precision of the metrics.
+    :param low_memory: If the pairs are scored in the low memory mode, see
+    score_pair.
+    :return: The rows of the pairs.
+    """
+    unknown_metrics = set(metric_names) - METRICS.keys()
+    if unknown_metrics:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown_metrics))}.")
+
+    if workers <= 1:
+        for true_path, predicted_path in pairs:
+            yield score_pair(true_path, predicted_path, metric_names, precision, low_memory)
+        return
+
+    with _create_pool(workers) as executor:
+        futures = [
+            executor.submit(score_pair, true_path, predicted_path, metric_names, precision,
+                            low_memory)
+            for true_path, predicted_path in sorted(pairs)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def warm_reference(true_path: str, precision: str = "float64") -> str:
+    """Calculate the spectrum of a reference image into the disk cache.
+
+    :param true_path: The path of the reference image.
+    :param precision: The precision of the spectrum.
+    :return: The path of the reference image.
+    """
+    true_image = Image(true_path, name=os.path.basename(true_path))
+    if true_image.get_image() is None:
+        raise FileNotFoundError(f"The image cannot be read: {true_path}.")
+    get_half_fft_of_image(true_image.get_image(), key=true_image.get_key(),
+                          precision=precision, persist=True)
+    return true_path
+
+
+def warm_references(true_paths: list[str], workers: int = 1,
+                    precision: str = "float64") -> Iterator[str]:
+    """Calculate the spectra of the reference images into the disk cache,
+    so the next runs against them only load the spectra.
+
+    :param true_paths: The paths of the reference images.
+    :param workers: The number of worker processes.
+    :param precision: The precision of the spectra.
+    :return: The paths of the reference images as they are done.
+    """
+    true_paths = sorted(set(true_paths))
+    if workers <= 1:
+        for true_path in true_paths:
+            yield warm_reference(true_path, precision)
+        return
+
+    with _create_pool(workers) as executor:
+        yield from executor.map(warm_reference, true_paths, [precision] * len(true_paths))
+
+
+def write_rows(rows: Iterable[dict[str, Any]], stream: TextIO,
+               output_format: str, metric_names: list[str],
+               key_fields: tuple[str, ...] = ("true", "predicted")) -> None:
+    """Write the rows to the stream as JSONL or CSV, flushing each row.
+
+    :param rows: The rows to be written.
+    :param stream: The stream to write.
+    :param output_format: The output format, "jsonl" or "csv".
+    :param metric_names: The names of the metric columns.
+    :param key_fields: The names of the columns identifying the rows.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}.")
+
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=[*key_fields, *metric_names])
+        writer.writeheader()
+
+    for row in rows:
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row) + "\n")
+        stream.flush()
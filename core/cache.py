@@ -0,0 +1,201 @@
+"""
+Holds the process-wide cache of the derived image artifacts.
+"""
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Any
+
+from numpy import ndarray, ascontiguousarray
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+"""The default byte budget of the cache."""
+
+
+def content_key(array: ndarray) -> tuple[str, str]:
+    """Return the identity of the array from its content.
+
+    :param array: The array to be identified.
+    :return: The identity of the array.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(ascontiguousarray(array))
+    return ("content", digest.hexdigest())
+
+
+def path_key(path: str) -> tuple[str, str, int, int]:
+    """Return the identity of the file from its path and modification time.
+
+    :param path: The path of the file.
+    :return: The identity of the file.
+    """
+    stat = os.stat(path)
+    return ("path", os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _size_of(value: Any) -> int:
+    """Return the size of the value in bytes.
+
+    :param value: The value to be measured.
+    :return: The size of the value.
+    """
+    if isinstance(value, ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class ArtifactCache:
+    """A thread-safe LRU cache with a byte budget.
+
+    The entries are keyed by the identity of the image and the kind of
+    the artifact. The cached arrays are made read-only since they are
+    shared between the callers.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Constructor of the ArtifactCache class.
+
+        :param max_bytes: The byte budget of the cache. Zero disables it.
+        """
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[Hashable, str], tuple[Any, int]] = OrderedDict()
+        self._lock = Lock()
+        self.current_bytes = 0
+        """Holds the total size of the cached artifacts."""
+        self.hits = 0
+        """Holds the number of the lookups found in the cache."""
+        self.misses = 0
+        """Holds the number of the lookups not found in the cache."""
+
+    @property
+    def max_bytes(self) -> int:
+        """The byte budget of the cache.
+
+        :return: The byte budget.
+        """
+        return self._max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        """If the cache stores any artifact.
+
+        :return: True if the byte budget is positive.
+        """
+        return self._max_bytes > 0
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the byte budget and evict the entries over it.
+
+        :param max_bytes: The new byte budget. Zero disables the cache.
+        """
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def get_artifacts(self, identity: Hashable) -> dict[str, Any]:
+        """Return all the cached artifacts of an image.
+
+        The lookups are not counted as hits, and the entries keep their
+        recency.
+
+        :param identity: The identity of the image.
+        :return: The artifacts by their kinds.
+        """
+        with self._lock:
+            return {kind: value for (entry_identity, kind), (value, _) in self._entries.items()
+                    if entry_identity == identity}
+
+    def discard(self, identity: Hashable) -> None:
+        """Remove all the artifacts of an image which will not be used again.
+
+        :param identity: The identity of the image.
+        """
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries
+                              if entry_key[0] == identity]:
+                self.current_bytes -= self._entries.pop(entry_key)[1]
+
+    def get(self, identity: Hashable, kind: str) -> Any:
+        """Return the cached artifact.
+
+        :param identity: The identity of the image.
+        :param kind: The kind of the artifact.
+        :return: The artifact, None if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get((identity, kind))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((identity, kind))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, identity: Hashable, kind: str, value: Any) -> None:
+        """Store the artifact if it fits into the byte budget.
+
+        :param identity: The identity of the image.
+        :param kind: The kind of the artifact.
+        :param value: The artifact to be stored.
+        """
+        size = _size_of(value)
+        if size > self._max_bytes:
+            return
+        if isinstance(value, ndarray):
+            value.setflags(write=False)
+
+        with self._lock:
+            previous = self._entries.pop((identity, kind), None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[(identity, kind)] = (value, size)
+            self.current_bytes += size
+            self._evict()
+
+    def get_or_compute(self, identity: Hashable, kind: str,
+                       compute: Callable[[], Any]) -> Any:
+        """Return the cached artifact, or compute and store it.
+
+        :param identity: The identity of the image.
+        :param kind: The kind of the artifact.
+        :param compute: The function computing the artifact.
+        :return: The artifact.
+        """
+        if not self.enabled:
+            return compute()
+
+        value = self.get(identity, kind)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(identity, kind, value)
+        return value
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until the budget is met."""
+        while self.current_bytes > self._max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+
+_DEFAULT_CACHE = ArtifactCache()
+
+
+def get_cache() -> ArtifactCache:
+    """Return the process-wide artifact cache.
+
+    :return: The artifact cache.
+    """
+    return _DEFAULT_CACHE
@@ -0,0 +1,356 @@
+"""
+Holds the single-pass SSIM engine for the centered squares of two spectra.
+"""
+import math
+
+import numpy
+
+WINDOW_SIZE = 7
+"""The side length of the SSIM window, same as skimage's default."""
+K1 = 0.01
+"""The luminance stability constant of SSIM."""
+K2 = 0.03
+"""The contrast stability constant of SSIM."""
+
+
+def box_mean(image: numpy.ndarray, win_size: int = WINDOW_SIZE) -> numpy.ndarray:
+    """Calculate the mean of every fully covered window of the image.
+
+    Only the windows lying completely inside the image are calculated,
+    so the result is smaller than the image by win_size - 1 on each axis.
+
+    :param image: The 2D image to be filtered.
+    :param win_size: The side length of the window.
+    :return: The window means in NumPy ndarray.
+    """
+    height = image.shape[0] - win_size + 1
+    width = image.shape[1] - win_size + 1
+
+    # Sum the rows of the window.
+    rows = image[0:height].copy()
+    for offset in range(1, win_size):
+        rows += image[offset:offset + height]
+
+    # Sum the columns of the window.
+    means = rows[:, 0:width].copy()
+    for offset in range(1, win_size):
+        means += rows[:, offset:offset + width]
+
+    means /= win_size * win_size
+    return means
+
+
+def local_statistics(x_image: numpy.ndarray,
+                     y_image: numpy.ndarray,
+                     win_size: int = WINDOW_SIZE) -> tuple[numpy.ndarray, ...]:
+    """Calculate the SSIM statistics of every fully covered window of the images.
+
+    The statistics do not depend on the data range, so they can be shared
+    by every region of the images.
+
+    :param x_image: The first 2D image.
+    :param y_image: The second 2D image.
+    :param win_size: The side length of the window.
+    :return: The means of x and y, the variances of x and y and their
+    covariance, each in NumPy ndarray.
+    """
+    covariance_norm = win_size * win_size / (win_size * win_size - 1)
+    mean_x = box_mean(x_image, win_size)
+    mean_y = box_mean(y_image, win_size)
+    variance_x = covariance_norm * (box_mean(x_image * x_image, win_size) - mean_x * mean_x)
+    variance_y = covariance_norm * (box_mean(y_image * y_image, win_size) - mean_y * mean_y)
+    covariance = covariance_norm * (box_mean(x_image * y_image, win_size) - mean_x * mean_y)
+    return mean_x, mean_y, variance_x, variance_y, covariance
+
+
+def ssim_from_statistics(statistics: tuple[numpy.ndarray, ...],
+                         data_range: float) -> numpy.ndarray:
+    """Combine the SSIM statistics into the SSIM map.
+
+    :param statistics: The statistics as returned by local_statistics.
+    :param data_range: The data range of the images.
+    :return: The SSIM map in NumPy ndarray.
+    """
+    mean_x, mean_y, variance_x, variance_y, covariance = statistics
+    c_1 = (K1 * data_range) ** 2
+    c_2 = (K2 * data_range) ** 2
+    numerator = (2 * mean_x * mean_y + c_1) * (2 * covariance + c_2)
+    denominator = (mean_x * mean_x + mean_y * mean_y + c_1) * (variance_x + variance_y + c_2)
+    return numerator / denominator
+
+
+def local_ssim_map(x_image: numpy.ndarray,
+                   y_image: numpy.ndarray,
+                   data_range: float,
+                   win_size: int = WINDOW_SIZE) -> numpy.ndarray:
+    """Calculate the SSIM of every fully covered window of the images.
+
+    The statistics are the same as skimage's structural_similarity with
+    its default arguments, i.e. uniform windows and sample covariance.
+
+    :param x_image: The first 2D image.
+    :param y_image: The second 2D image.
+    :param data_range: The data range of the images.
+    :param win_size: The side length of the window.
+    :return: The SSIM map in NumPy ndarray.
+    """
+    return ssim_from_statistics(local_statistics(x_image, y_image, win_size), data_range)
+
+
+def summed_area_table(values: numpy.ndarray) -> numpy.ndarray:
+    """Build the summed-area table of the values in float64.
+
+    :param values: The 2D values.
+    :return: The table with a leading row and column of zeros.
+    """
+    summed_area = numpy.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    numpy.cumsum(values, axis=0, dtype=numpy.float64, out=summed_area[1:, 1:])
+    numpy.cumsum(summed_area[1:, 1:], axis=1, out=summed_area[1:, 1:])
+    return summed_area
+
+
+def rectangle_sum(summed_area: numpy.ndarray,
+                  rows: tuple[int, int], columns: tuple[int, int]) -> float:
+    """Return the sum of the values in the rectangle from their summed-area table.
+
+    :param summed_area: The summed-area table of the values.
+    :param rows: The start and the end of the rows, end excluded.
+    :param columns: The start and the end of the columns, end excluded.
+    :return: The sum of the values.
+    """
+    return (summed_area[rows[1], columns[1]]
+            - summed_area[rows[0], columns[1]]
+            - summed_area[rows[1], columns[0]]
+            + summed_area[rows[0], columns[0]])
+
+
+class CenteredSSIM:
+    """Calculates the SSIM of the centered grids of two spectra.
+
+    The SSIM map of the spectra is calculated once, and the mean SSIM of
+    every centered grid is read from a summed-area table of that map.
+    Since skimage crops the (win_size - 1) // 2 border band of a grid
+    before averaging, the remaining windows lie completely inside the
+    grid and are identical to the windows of the whole spectrum.
+
+    The SSIM map is calculated in the floating point type of the spectra,
+    while the summed-area table is always accumulated in float64.
+    """
+
+    def __init__(self, fft_of_true: numpy.ndarray,
+                 fft_of_pred: numpy.ndarray,
+                 data_range: float = None) -> None:
+        """Constructor of the CenteredSSIM class.
+
+        :param fft_of_true: The spectrum of the true image.
+        :param fft_of_pred: The spectrum of the predicted image.
+        :param data_range: The data range of the spectra. The range of
+        fft_of_true is used if it is not given.
+        """
+        if fft_of_true.shape != fft_of_pred.shape:
+            raise ValueError("fft_of_true and fft_of_pred must have the same shape.")
+        if fft_of_true.ndim != 2:
+            raise ValueError("The spectra must be 2D.")
+
+        if data_range is None:
+            data_range = fft_of_true.max() - fft_of_true.min()
+
+        self._pad = (WINDOW_SIZE - 1) // 2
+        self._max_half_size = self._get_max_half_size(fft_of_true.shape)
+        self.evaluations = 0
+        """Holds the number of grids evaluated."""
+
+        self._build_summed_area(
+            self._get_region(fft_of_true), self._get_region(fft_of_pred), data_range)
+
+    def _get_max_half_size(self, shape: tuple[int, int]) -> int:
+        """Return the half size of the largest grid fitting into the spectrum.
+
+        :param shape: The shape of the spectrum.
+        :return: The largest half size.
+        """
+        return min((shape[0] // 2) // 2, shape[1] // 2)
+
+    def _get_region(self, spectrum: numpy.ndarray) -> numpy.ndarray:
+        """Return the region of the spectrum covered by the largest grid.
+
+        :param spectrum: The spectrum.
+        :return: The region of the spectrum.
+        """
+        x_start = spectrum.shape[0] // 2 - self._max_half_size
+        y_start = spectrum.shape[1] // 2 - self._max_half_size
+        return spectrum[x_start:x_start + 2 * self._max_half_size,
+                        y_start:y_start + 2 * self._max_half_size]
+
+    def _build_summed_area(self, region_of_true: numpy.ndarray,
+                           region_of_pred: numpy.ndarray,
+                           data_range: float) -> None:
+        """Calculate the SSIM map of the regions and its summed-area table.
+
+        :param region_of_true: The region of the true spectrum.
+        :param region_of_pred: The region of the predicted spectrum.
+        :param data_range: The data range of the spectra.
+        """
+        if min(region_of_true.shape) < WINDOW_SIZE:
+            self._summed_area = numpy.zeros((1, 1))
+            return
+
+        float_type = numpy.result_type(region_of_true.dtype, region_of_pred.dtype,
+                                       numpy.float32)
+        ssim_map = local_ssim_map(
+            region_of_true.astype(float_type, copy=False),
+            region_of_pred.astype(float_type, copy=False),
+            data_range,
+        )
+
+        self._summed_area = summed_area_table(ssim_map)
+
+    def _rectangle_sum(self, rows: tuple[int, int], columns: tuple[int, int]) -> float:
+        """Return the sum of the SSIM map in the rectangle.
+
+        :param rows: The start and the end of the rows, end excluded.
+        :param columns: The start and the end of the columns, end excluded.
+        :return: The sum of the SSIM map.
+        """
+        return rectangle_sum(self._summed_area, rows, columns)
+
+    def _grid_sum(self, half_size: int) -> float:
+        """Return the sum of the SSIM map in the grid without its border band.
+
+        :param half_size: The half size of the grid.
+        :return: The sum of the SSIM map.
+        """
+        # The map starts at the border band of the largest grid.
+        start = self._max_half_size - half_size
+        end = self._max_half_size + half_size - 2 * self._pad
+        return self._rectangle_sum((start, end), (start, end))
+
+    def __call__(self, grid_size: int) -> float:
+        """Return the mean SSIM of the centered grid.
+
+        :param grid_size: The grid size as used in the HRI95 loop.
+        :return: The mean SSIM of the grid, or NaN if the grid does not
+        fit into the spectrum or is smaller than the SSIM window.
+        """
+        self.evaluations += 1
+        half_size = grid_size // 2
+        if half_size > self._max_half_size or 2 * half_size < WINDOW_SIZE:
+            return math.nan
+
+        side = 2 * half_size - 2 * self._pad
+        return float(self._grid_sum(half_size) / (side * side))
+
+
+class HalfPlaneCenteredSSIM(CenteredSSIM):
+    """Calculates the SSIM of the centered grids of two half spectra.
+
+    The magnitude spectrum of a real image is centrally symmetric, and so
+    is its SSIM map. Only the half of the map with non-negative horizontal
+    frequencies is calculated from the rfft2 magnitudes, and the sum of a
+    grid is reconstructed from that half and its point reflection.
+
+    It takes the half spectra as returned by get_half_fft_of_image instead
+    of the full spectra.
+    """
+
+    def _get_max_half_size(self, shape: tuple[int, int]) -> int:
+        """Return the half size of the largest grid fitting into the spectrum.
+
+        :param shape: The shape of the half spectrum.
+        :return: The largest half size.
+        """
+        # The zero horizontal frequency is the first column.
+        return min((shape[0] // 2) // 2, shape[1] - 1)
+
+    def _get_region(self, spectrum: numpy.ndarray) -> numpy.ndarray:
+        """Return the region of the half spectrum covered by the right half
+        of the largest grid, with the border band of the negative horizontal
+        frequencies, which is the point reflection of the first columns.
+
+        :param spectrum: The half spectrum.
+        :return: The extended region.
+        """
+        # The reflected grids reach one more row below the center.
+        x_center = spectrum.shape[0] // 2
+        region = spectrum[x_center - self._max_half_size:
+                          x_center + self._max_half_size + 1]
+        return numpy.concatenate([
+            region[::-1, self._pad:0:-1],
+            region[:, 0:self._max_half_size + 1],
+        ], axis=1)
+
+    def _grid_sum(self, half_size: int) -> float:
+        """Return the sum of the SSIM map in the grid without its border band.
+
+        :param half_size: The half size of the grid.
+        :return: The sum of the SSIM map.
+        """
+        start = self._max_half_size - half_size
+        end = self._max_half_size + half_size - 2 * self._pad
+        right_columns = (0, half_size - self._pad)
+
+        # The left columns are the reflection of the right ones one row lower.
+        left_columns = (1, half_size - self._pad + 1)
+        return (self._rectangle_sum((start, end), right_columns)
+                + self._rectangle_sum((start + 1, end + 1), left_columns))
+
+
+class WindowCenteredSSIM:
+    """Calculates the SSIM of the centered grids of a window of two spectra.
+
+    The SSIM map is read from a summed-area table built either for the
+    window alone or for the whole spectra, so the windows sharing a data
+    range also share the table.
+    """
+
+    def __init__(self, summed_area: numpy.ndarray, origin: tuple[int, int],
+                 shape: tuple[int, int]) -> None:
+        """Constructor of the WindowCenteredSSIM class.
+
+        :param summed_area: The summed-area table of the SSIM map covering
+        the window, as returned by summed_area_table.
+        :param origin: The position of the window in the SSIM map.
+        :param shape: The height and the width of the window.
+        """
+        self._summed_area = summed_area
+        self._origin = origin
+        self._shape = shape
+        self._pad = (WINDOW_SIZE - 1) // 2
+        self._max_half_size = min(shape[0] // 2, shape[1] // 2)
+        self.evaluations = 0
+        """Holds the number of grids evaluated."""
+
+    def mean(self) -> float:
+        """Return the mean SSIM of the whole window.
+
+        :return: The mean SSIM, or NaN if the window is smaller than the
+        SSIM window.
+        """
+        height = self._shape[0] - 2 * self._pad
+        width = self._shape[1] - 2 * self._pad
+        if min(height, width) < 1:
+            return math.nan
+
+        rows = (self._origin[0], self._origin[0] + height)
+        columns = (self._origin[1], self._origin[1] + width)
+        return float(rectangle_sum(self._summed_area, rows, columns) / (height * width))
+
+    def __call__(self, grid_size: int) -> float:
+        """Return the mean SSIM of the centered grid of the window.
+
+        :param grid_size: The grid size as used in the HRI95 loop.
+        :return: The mean SSIM of the grid, or NaN if the grid does not
+        fit into the window or is smaller than the SSIM window.
+        """
+        self.evaluations += 1
+        half_size = grid_size // 2
+        if half_size > self._max_half_size or 2 * half_size < WINDOW_SIZE:
+            return math.nan
+
+        # The map starts at the border band of the window.
+        row_start = self._origin[0] + self._shape[0] // 2 - half_size
+        column_start = self._origin[1] + self._shape[1] // 2 - half_size
+        side = 2 * half_size - 2 * self._pad
+        return float(rectangle_sum(self._summed_area,
+                                   (row_start, row_start + side),
+                                   (column_start, column_start + side)) / (side * side))
@@ -0,0 +1,129 @@
+"""
+Holds the coarse-to-fine search of the HRI95 on the half spectra.
+
+The radius is first estimated on the block-reduced spectra. The SSIM map
+is then calculated at full resolution only inside the smallest grid
+which fails the threshold above that estimate, instead of inside the
+largest grid of the spectrum. The grid is enlarged if it still passes,
+i.e. if the estimate was too small.
+"""
+from dataclasses import dataclass
+
+import numpy
+
+from core.centered_ssim import HalfPlaneCenteredSSIM
+from core.radius_search import get_grid_sizes, linear_search, seeded_search
+from core.tracing import span
+
+DEFAULT_FACTOR = 4
+"""The default side length of the blocks of the coarse spectra."""
+
+
+@dataclass
+class CoarseToFineResult:
+    """Holds the outcome of a coarse-to-fine search."""
+
+    grid_size: int | None
+    """Holds the first grid size passing the threshold, None if not found."""
+    coarse_radius: int
+    """Holds the radius estimated on the coarse spectra, in full resolution pixels."""
+    refined_half_size: int
+    """Holds the half size of the grid the full resolution map covers."""
+    refinements: int
+    """Holds the number of the full resolution maps calculated."""
+    evaluations: int
+    """Holds the number of the grids evaluated at both resolutions."""
+
+
+def block_reduce_half_spectrum(spectrum: numpy.ndarray, factor: int) -> numpy.ndarray:
+    """Average the half spectrum over blocks, keeping its layout.
+
+    The center row of the result is the block starting at the center row
+    of the spectrum, and the first column is the block starting at the zero
+    horizontal frequency.
+
+    :param spectrum: The half spectrum as returned by get_half_fft_of_image.
+    :param factor: The side length of the blocks.
+    :return: The reduced half spectrum.
+    """
+    center = spectrum.shape[0] // 2
+    blocks = min(center, spectrum.shape[0] - center) // factor
+    columns = spectrum.shape[1] // factor
+    region = spectrum[center - blocks * factor:center + blocks * factor, :columns * factor]
+    return region.reshape(2 * blocks, factor, columns, factor).mean(axis=(1, 3))
+
+
+def crop_half_spectrum(spectrum: numpy.ndarray, half_size: int) -> numpy.ndarray:
+    """Crop the half spectrum to the region of the grids up to the half size.
+
+    The grids of the crop have the same SSIM as the grids of the whole
+    half spectrum if they are given the same data range.
+
+    :param spectrum: The half spectrum as returned by get_half_fft_of_image.
+    :param half_size: The half size of the largest grid to be kept.
+    :return: The cropped half spectrum.
+    """
+    center = spectrum.shape[0] // 2
+    return spectrum[center - 2 * half_size:center + 2 * half_size, :half_size + 1]
+
+
+# pylint: disable-next=too-many-arguments
+def coarse_to_fine_search(fft_of_true: numpy.ndarray, fft_of_pred: numpy.ndarray,
+                          data_range: float, threshold: float,
+                          factor: int = DEFAULT_FACTOR) -> CoarseToFineResult:
+    """Search the first grid passing the threshold from a coarse estimate.
+
+    The result is the grid of the exact linear scan under the assumption
+    of the bracketing strategies, i.e. that the grids larger than a
+    failing grid fail too.
+
+    :param fft_of_true: The half spectrum of the true image.
+    :param fft_of_pred: The half spectrum of the predicted image.
+    :param data_range: The data range of the full resolution spectra.
+    :param threshold: The SSIM threshold to pass.
+    :param factor: The side length of the blocks of the coarse spectra.
+    :return: The grid size and the statistics of the search.
+    """
+    grid_sizes = get_grid_sizes(fft_of_true.shape[0])
+
+    # Estimate the radius on the coarse spectra.
+    with span("coarse_estimate", "hri95", factor=factor):
+        coarse_true = block_reduce_half_spectrum(fft_of_true, factor)
+        coarse_pred = block_reduce_half_spectrum(fft_of_pred, factor)
+        coarse_ssim = HalfPlaneCenteredSSIM(coarse_true, coarse_pred,
+                                            data_range=coarse_true.max() - coarse_true.min())
+        coarse_grid_size = linear_search(coarse_ssim, get_grid_sizes(coarse_true.shape[0]),
+                                         threshold)
+    coarse_radius = (coarse_grid_size // 2) * factor if coarse_grid_size is not None else 0
+    evaluations = coarse_ssim.evaluations
+
+    # Calculate the full resolution map inside a failing grid above the
+    # estimate, enlarging the grid while it passes.
+    margin = 2 * factor
+    refinements = 0
+    while True:
+        refined_grid_size = min((grid_size for grid_size in grid_sizes
+                                 if grid_size // 2 >= coarse_radius + margin),
+                                default=grid_sizes[0])
+        with span("refinement", "hri95", half_size=refined_grid_size // 2):
+            fine_ssim = HalfPlaneCenteredSSIM(
+                crop_half_spectrum(fft_of_true, refined_grid_size // 2),
+                crop_half_spectrum(fft_of_pred, refined_grid_size // 2),
+                data_range=data_range)
+        refinements += 1
+        if refined_grid_size == grid_sizes[0] or not fine_ssim(refined_grid_size) > threshold:
+            break
+        evaluations += fine_ssim.evaluations
+        margin *= 2
+
+    # Search the grids inside the failing grid from the estimate.
+    grid_size = seeded_search(fine_ssim, [grid_size for grid_size in grid_sizes
+                                          if grid_size <= refined_grid_size],
+                              threshold, 2 * coarse_radius)
+    return CoarseToFineResult(
+        grid_size=grid_size,
+        coarse_radius=coarse_radius,
+        refined_half_size=refined_grid_size // 2,
+        refinements=refinements,
+        evaluations=evaluations + fine_ssim.evaluations,
+    )
@@ -0,0 +1,256 @@
+"""
+Holds the opt-in persistent cache of the spectra on disk.
+"""
+import hashlib
+import os
+import tempfile
+from collections.abc import Callable
+
+import numpy
+from numpy import ndarray
+
+CACHE_DIR_VARIABLE = "HRI95_CACHE_DIR"
+"""The environment variable enabling the disk cache in a directory."""
+CACHE_MAX_BYTES_VARIABLE = "HRI95_CACHE_MAX_BYTES"
+"""The environment variable holding the byte limit of the disk cache."""
+FORMAT_VERSION = 1
+"""The version of the cached spectra, changing it invalidates the cache."""
+EVICTION_RATIO = 0.9
+"""The fraction of the byte limit left by an eviction, so the directory is
+scanned once per tenth of the limit stored instead of on every store."""
+
+
+class SpectrumDiskCache:
+    """A content-addressed cache of spectra stored as .npy files.
+
+    The entries are keyed by the content hash of the preprocessed pixels
+    and the parameters of the spectrum. They are loaded memory-mapped and
+    read-only, so a hit copies nothing. The least recently used files
+    are removed when the directory grows over the byte limit, down to
+    EVICTION_RATIO of it. The directory is scanned only when the sizes
+    stored since the last scan take it over the limit. Several processes may share the
+    directory since the files are written atomically.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None) -> None:
+        """Constructor of the SpectrumDiskCache class.
+
+        :param directory: The directory of the cache, created if needed.
+        :param max_bytes: The byte limit of the directory, unlimited if None.
+        """
+        self._directory = os.path.abspath(directory)
+        self._max_bytes = max_bytes
+        self._known_bytes = 0
+        os.makedirs(self._directory, exist_ok=True)
+        self.evict()
+
+    @property
+    def directory(self) -> str:
+        """The directory of the cache.
+
+        :return: The absolute path of the directory.
+        """
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        """The byte limit of the directory.
+
+        :return: The byte limit, None if unlimited.
+        """
+        return self._max_bytes
+
+    def _get_path(self, content_digest: str, kind: str) -> str:
+        """Return the file path of the entry.
+
+        :param content_digest: The content hash of the pixels.
+        :param kind: The kind of the spectrum with its parameters.
+        :return: The path of the .npy file.
+        """
+        digest = hashlib.blake2b(
+            f"{FORMAT_VERSION}:{content_digest}:{kind}".encode(), digest_size=20).hexdigest()
+        return os.path.join(self._directory, digest[:2], f"{digest}.npy")
+
+    def _get_entries(self) -> list[os.DirEntry]:
+        """Return the .npy files of the cache.
+
+        :return: The directory entries of the files.
+        """
+        entries = []
+        for shard in os.scandir(self._directory):
+            if shard.is_dir():
+                entries.extend(entry for entry in os.scandir(shard.path)
+                               if entry.name.endswith(".npy"))
+        return entries
+
+    def load(self, content_digest: str, kind: str) -> ndarray:
+        """Load the spectrum memory-mapped and read-only.
+
+        :param content_digest: The content hash of the pixels.
+        :param kind: The kind of the spectrum with its parameters.
+        :return: The spectrum, None if it is not cached.
+        """
+        path = self._get_path(content_digest, kind)
+        try:
+            spectrum = numpy.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Remove the unreadable files, e.g. written by an older numpy.
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return spectrum
+
+    def store(self, content_digest: str, kind: str, spectrum: ndarray) -> None:
+        """Store the spectrum and evict the entries over the byte limit.
+
+        :param content_digest: The content hash of the pixels.
+        :param kind: The kind of the spectrum with its parameters.
+        :param spectrum: The spectrum to be stored.
+        """
+        if self._max_bytes is not None and spectrum.nbytes > self._max_bytes:
+            return
+
+        path = self._get_path(content_digest, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced_bytes = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced_bytes = 0
+
+        # Write to a temporary file first, so readers never see a partial file.
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                numpy.save(temporary_file, spectrum)
+                stored_bytes = temporary_file.tell()
+            os.replace(temporary_path, path)
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+
+        # Scan the directory only when it may be over the byte limit.
+        self._known_bytes += stored_bytes - replaced_bytes
+        if self._max_bytes is not None and self._known_bytes > self._max_bytes:
+            self.evict()
+
+    def get_or_compute(self, content_digest: str, kind: str,
+                       compute: Callable[[], ndarray]) -> ndarray:
+        """Load the spectrum, or compute and store it.
+
+        :param content_digest: The content hash of the pixels.
+        :param kind: The kind of the spectrum with its parameters.
+        :param compute: The function computing the spectrum.
+        :return: The spectrum.
+        """
+        spectrum = self.load(content_digest, kind)
+        if spectrum is not None:
+            return spectrum
+
+        spectrum = compute()
+        self.store(content_digest, kind, spectrum)
+        return spectrum
+
+    def size_bytes(self) -> int:
+        """Return the total size of the cached files.
+
+        :return: The size in bytes.
+        """
+        total = 0
+        for entry in self._get_entries():
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def evict(self) -> None:
+        """Remove the least recently used files if the directory is over the
+        byte limit, until it is at EVICTION_RATIO of the limit."""
+        if self._max_bytes is None:
+            return
+
+        files = []
+        for entry in self._get_entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        if total > self._max_bytes:
+            target_bytes = int(self._max_bytes * EVICTION_RATIO)
+            for _, size, path in sorted(files):
+                if total <= target_bytes:
+                    break
+                self._remove(path)
+                total -= size
+        self._known_bytes = total
+
+    def clear(self) -> None:
+        """Remove all the cached files."""
+        for entry in self._get_entries():
+            self._remove(entry.path)
+        self._known_bytes = 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """Remove the file if it still exists.
+
+        :param path: The path of the file.
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed, or still mapped by a reader on some platforms.
+            pass
+
+
+_DISK_CACHE: dict[str, SpectrumDiskCache] = {}
+
+
+def configure_disk_cache(directory: str = None, max_bytes: int = None) -> SpectrumDiskCache:
+    """Enable the disk cache in the directory, or disable it with None.
+
+    The configuration is exported to the environment, so the worker
+    processes started afterwards use the same directory.
+
+    :param directory: The directory of the cache.
+    :param max_bytes: The byte limit of the directory, unlimited if None.
+    :return: The disk cache, None if it is disabled.
+    """
+    _DISK_CACHE.clear()
+    os.environ.pop(CACHE_MAX_BYTES_VARIABLE, None)
+    if directory is None:
+        os.environ.pop(CACHE_DIR_VARIABLE, None)
+        return None
+
+    os.environ[CACHE_DIR_VARIABLE] = os.path.abspath(directory)
+    if max_bytes is not None:
+        os.environ[CACHE_MAX_BYTES_VARIABLE] = str(max_bytes)
+    return get_disk_cache()
+
+
+def get_disk_cache() -> SpectrumDiskCache:
+    """Return the disk cache of the process, configured by the environment.
+
+    :return: The disk cache, None if it is not enabled.
+    """
+    directory = os.environ.get(CACHE_DIR_VARIABLE)
+    if not directory:
+        return None
+
+    max_bytes = os.environ.get(CACHE_MAX_BYTES_VARIABLE)
+    cache = _DISK_CACHE.get(directory)
+    if cache is None:
+        cache = SpectrumDiskCache(directory, int(max_bytes) if max_bytes else None)
+        _DISK_CACHE[directory] = cache
+    return cache
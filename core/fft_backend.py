@@ -0,0 +1,323 @@
+"""
+Holds the FFT backends calculating the spectra.
+
+An analyzer calculates its spectra with the backend of its settings,
+which its worker processes receive with the other arguments of the
+metrics. The spectra calculated without a backend of their own use the
+backend of the process, selected by configure_fft_backend, otherwise by
+the HRI95_FFT_BACKEND and HRI95_FFT_WORKERS environment variables. SciPy
+is used by default if it is installed, otherwise NumPy.
+"""
+import importlib.util
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import cache
+
+from numpy import ndarray
+
+from core.lazy import LazyModule
+
+numpy_fft = LazyModule("numpy.fft")
+scipy_fft = LazyModule("scipy.fft")
+pyfftw = LazyModule("pyfftw")
+pyfftw_builders = LazyModule("pyfftw.builders")
+
+FFT_BACKENDS = ("numpy", "scipy", "pyfftw")
+"""Holds the names of the supported FFT backends."""
+FFT_BACKEND_VARIABLE = "HRI95_FFT_BACKEND"
+"""Holds the environment variable of the name of the FFT backend."""
+FFT_WORKERS_VARIABLE = "HRI95_FFT_WORKERS"
+"""Holds the environment variable of the number of the FFT threads."""
+DEFAULT_MAX_PLANS = 32
+"""Holds the number of the plans kept by the pyFFTW backend."""
+TRANSFORMS = ("fftn", "rfftn", "ifftn")
+"""Holds the transforms of the backends."""
+
+Plan = Callable[[ndarray], ndarray]
+"""A measured FFTW transform of the arrays of a shape and a type."""
+
+
+class FFTBackend(ABC):
+    """The interface of the FFT backends."""
+
+    name: str = None
+    """Holds the name of the backend, one of FFT_BACKENDS."""
+    overwrites_input: bool = False
+    """Holds if a transform given overwrite_x may be calculated in place,
+    i.e. in the memory of the complex input."""
+
+    def __init__(self, workers: int = None) -> None:
+        """Constructor of the FFTBackend class.
+
+        :param workers: The number of the threads of a transform, all the
+        CPUs if -1, one if None.
+        """
+        if workers is not None and workers != -1 and workers < 1:
+            raise ValueError("The workers must be positive or -1.")
+        self._workers = workers
+
+    @property
+    def workers(self) -> int:
+        """The number of the threads of a transform.
+
+        :return: The number of the threads, at least one.
+        """
+        if self._workers == -1:
+            return os.cpu_count() or 1
+        return self._workers or 1
+
+    def __reduce__(self) -> tuple:
+        """Pickle the backend by its name and workers, so a worker process
+        unpickles the backend of its own with the same configuration.
+
+        :return: The function creating the backend and its arguments.
+        """
+        return create_fft_backend, (self.name, self._workers)
+
+    def fft2(self, array: ndarray) -> ndarray:
+        """Calculate the 2D FFT of the last two axes.
+
+        :param array: The real or complex array.
+        :return: The complex spectrum.
+        """
+        return self._transform("fftn", array, (-2, -1))
+
+    def rfft2(self, array: ndarray) -> ndarray:
+        """Calculate the 2D FFT of the last two axes of a real array, the
+        non-negative frequencies of the last axis only.
+
+        :param array: The real array.
+        :return: The complex half spectrum.
+        """
+        return self._transform("rfftn", array, (-2, -1))
+
+    def ifft2(self, array: ndarray) -> ndarray:
+        """Calculate the 2D inverse FFT of the last two axes.
+
+        :param array: The complex spectrum.
+        :return: The complex array.
+        """
+        return self._transform("ifftn", array, (-2, -1))
+
+    def fft(self, array: ndarray, axis: int = -1, overwrite_x: bool = False) -> ndarray:
+        """Calculate the FFT of an axis.
+
+        :param array: The real or complex array.
+        :param axis: The axis to transform.
+        :param overwrite_x: If the array may be overwritten, see
+        overwrites_input.
+        :return: The complex spectrum.
+        """
+        return self._transform("fftn", array, (axis,), overwrite_x)
+
+    def rfft(self, array: ndarray, axis: int = -1) -> ndarray:
+        """Calculate the FFT of an axis of a real array, the non-negative
+        frequencies only.
+
+        :param array: The real array.
+        :param axis: The axis to transform.
+        :return: The complex half spectrum.
+        """
+        return self._transform("rfftn", array, (axis,))
+
+    @abstractmethod
+    def _transform(self, transform: str, array: ndarray, axes: tuple[int, ...],
+                   overwrite_x: bool = False) -> ndarray:
+        """Calculate a transform.
+
+        :param transform: The transform, one of TRANSFORMS.
+        :param array: The array to transform.
+        :param axes: The axes to transform.
+        :param overwrite_x: If the array may be overwritten.
+        :return: The transformed array.
+        """
+
+
+class NumpyFFTBackend(FFTBackend):
+    """The single-threaded FFT of NumPy, always in double precision."""
+
+    name = "numpy"
+
+    def _transform(self, transform: str, array: ndarray, axes: tuple[int, ...],
+                   overwrite_x: bool = False) -> ndarray:
+        """Calculate a transform with NumPy.
+
+        :param transform: The transform, one of TRANSFORMS.
+        :param array: The array to transform.
+        :param axes: The axes to transform.
+        :param overwrite_x: Ignored, NumPy never overwrites the array.
+        :return: The transformed array.
+        """
+        return getattr(numpy_fft.load(), transform)(array, axes=axes)
+
+
+class ScipyFFTBackend(FFTBackend):
+    """The FFT of SciPy, in the precision of the input, calculated by the
+    workers threads and in place if allowed.
+    """
+
+    name = "scipy"
+    overwrites_input = True
+
+    def _transform(self, transform: str, array: ndarray, axes: tuple[int, ...],
+                   overwrite_x: bool = False) -> ndarray:
+        """Calculate a transform with SciPy.
+
+        :param transform: The transform, one of TRANSFORMS.
+        :param array: The array to transform.
+        :param axes: The axes to transform.
+        :param overwrite_x: If the array may be overwritten.
+        :return: The transformed array.
+        """
+        return getattr(scipy_fft.load(), transform)(array, axes=axes, workers=self.workers,
+                                                    overwrite_x=overwrite_x)
+
+
+class PyFFTWBackend(FFTBackend):
+    """The FFT of FFTW through pyFFTW, in the precision of the input.
+
+    A plan is measured once per transform, shape, type and axes with
+    FFTW_MEASURE, and the least recently used max_plans plans are kept. A
+    plan holds its own aligned input and output arrays, so its transforms
+    are serialized and their results are copied out.
+    """
+
+    name = "pyfftw"
+
+    def __init__(self, workers: int = None, max_plans: int = DEFAULT_MAX_PLANS) -> None:
+        """Constructor of the PyFFTWBackend class.
+
+        :param workers: The number of the threads of a transform, all the
+        CPUs if -1, one if None.
+        :param max_plans: The number of the plans kept.
+        """
+        super().__init__(workers)
+        pyfftw.load()
+        self._max_plans = max_plans
+        self._plans: OrderedDict[tuple, Plan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Forget all the plans."""
+        with self._lock:
+            self._plans.clear()
+
+    def _transform(self, transform: str, array: ndarray, axes: tuple[int, ...],
+                   overwrite_x: bool = False) -> ndarray:
+        """Calculate a transform with its plan, measuring the plan if needed.
+
+        :param transform: The transform, one of TRANSFORMS.
+        :param array: The array to transform.
+        :param axes: The axes to transform.
+        :param overwrite_x: Ignored, the plans copy the array in.
+        :return: The transformed array.
+        """
+        axes = tuple(sorted(axis % array.ndim for axis in axes))
+        plan_key = (transform, array.shape, array.dtype.str, axes)
+        with self._lock:
+            plan = self._plans.get(plan_key)
+            if plan is not None:
+                self._plans.move_to_end(plan_key)
+        if plan is None:
+            plan = self._create_plan(transform, array.shape, array.dtype, axes)
+            with self._lock:
+                self._plans[plan_key] = plan
+                while len(self._plans) > self._max_plans:
+                    self._plans.popitem(last=False)
+        return plan(array)
+
+    def _create_plan(self, transform: str, shape: tuple[int, ...], dtype,
+                     axes: tuple[int, ...]) -> Plan:
+        """Measure the plan of a transform.
+
+        :param transform: The transform, one of TRANSFORMS.
+        :param shape: The shape of the arrays.
+        :param dtype: The type of the arrays.
+        :param axes: The axes to transform, non-negative.
+        :return: The plan.
+        """
+        fftw = getattr(pyfftw_builders.load(), transform)(
+            pyfftw.empty_aligned(shape, dtype=dtype), axes=axes, threads=self.workers,
+            planner_effort="FFTW_MEASURE")
+        lock = threading.Lock()
+
+        def execute(array: ndarray) -> ndarray:
+            """Transform the array with the measured plan."""
+            with lock:
+                return fftw(array).copy()
+
+        return execute
+
+
+_BACKEND_CLASSES: dict[str, type[FFTBackend]] = {
+    backend_class.name: backend_class
+    for backend_class in (NumpyFFTBackend, ScipyFFTBackend, PyFFTWBackend)
+}
+_FFT_BACKENDS: dict[tuple[str, int], FFTBackend] = {}
+_PROCESS_BACKEND: dict[str, FFTBackend] = {}
+"""Holds the FFT backend selected by configure_fft_backend, if any."""
+
+
+def create_fft_backend(name: str = None, workers: int = None) -> FFTBackend:
+    """Return the FFT backend of the name and the workers, created once per
+    name and workers in a process.
+
+    :param name: The name of the backend, one of FFT_BACKENDS. The default
+    backend, SciPy if it is installed, otherwise NumPy, if None.
+    :param workers: The number of the threads of a transform, all the
+    CPUs if -1, one if None. NumPy ignores it.
+    :return: The FFT backend.
+    """
+    name = name or _get_default_name()
+    if name not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown FFT backend: {name}. Use one of {', '.join(FFT_BACKENDS)}.")
+    backend = _FFT_BACKENDS.get((name, workers))
+    if backend is None:
+        backend = _BACKEND_CLASSES[name](workers)
+        _FFT_BACKENDS[(name, workers)] = backend
+    return backend
+
+
+def configure_fft_backend(name: str = None, workers: int = None) -> FFTBackend:
+    """Select the FFT backend of the process, used by the spectra calculated
+    without a backend of their own, e.g. by the analyzers without the
+    fft_backend setting. The environment is not changed.
+
+    :param name: The name of the backend, one of FFT_BACKENDS. The backend
+    of the environment is restored if both name and workers are None.
+    :param workers: The number of the threads of a transform, all the
+    CPUs if -1, one if None. NumPy ignores it.
+    :return: The FFT backend of the process.
+    """
+    _PROCESS_BACKEND.clear()
+    if name is not None or workers is not None:
+        _PROCESS_BACKEND["backend"] = create_fft_backend(name, workers)
+    return get_fft_backend()
+
+
+def get_fft_backend() -> FFTBackend:
+    """Return the FFT backend of the process.
+
+    It is the backend selected by configure_fft_backend, otherwise the one
+    of the HRI95_FFT_BACKEND and HRI95_FFT_WORKERS environment variables,
+    otherwise the default backend.
+
+    :return: The FFT backend.
+    """
+    if "backend" in _PROCESS_BACKEND:
+        return _PROCESS_BACKEND["backend"]
+    workers = os.environ.get(FFT_WORKERS_VARIABLE)
+    return create_fft_backend(os.environ.get(FFT_BACKEND_VARIABLE),
+                              int(workers) if workers else None)
+
+
+@cache
+def _get_default_name() -> str:
+    """Return the name of the default backend without importing it.
+
+    :return: "scipy" if SciPy is installed, otherwise "numpy".
+    """
+    return "scipy" if importlib.util.find_spec("scipy") is not None else "numpy"
@@ -1,12 +1,22 @@
 """
 Holds the Image class to be used in the analisys.
 """
+from collections.abc import Hashable
+
 from numpy import ndarray
-from core.utils import read_image, save_image
+from core.cache import content_key, path_key
+from core.shared_arrays import SharedArray, SharedArrayStore
+from core.tracing import span
+from core.utils import read_image, read_image_shape, save_image
+
 
+class Image:  # pylint: disable=too-many-instance-attributes
+    """Holds the image objects and preproceses if needed.
 
-class Image:
-    """Holds the image objects and preproceses if needed."""
+    The image is decoded and preprocessed at the first access, not in the
+    constructor, and it can be released to be decoded again later. An
+    image created from another Image follows that image's current pixels.
+    """
 
     def __init__(self, image_path: str or 'Image' or ndarray,
                  name: str, preprocess: callable = None) -> None:
@@ -18,42 +28,182 @@ class Image:
         :param preprocess: The preprocess function to be applied to the image.
         """
         self._name = name
+        self._path: str = None
+        self._source: Image = None
+        self._original_image: ndarray = None
+        self._image: ndarray = None
+        self._key: Hashable = None
+        self._shared: SharedArray = None
+        self._shared_source: SharedArray = None
 
-        # Read the image if it is Image or a path.
+        # Record where the image will be read from.
         if isinstance(image_path, Image):
-            self._path = None
-            self._original_image = image_path.get_image()
+            self._source = image_path
         elif isinstance(image_path, str):
             self._path = image_path
-            self._original_image = read_image(image_path)
         elif isinstance(image_path, ndarray):
-            self._path = None
             self._original_image = image_path
         else:
             raise ValueError("Image path must be a string or an Image object.")
 
-        # Preprocess the image if needed.
+        # Preprocess the image at the first access if needed.
         self._preprocess_function = preprocess
-        if self._preprocess_function is not None:
-            self._image = self._preprocess_function(self._original_image)
-        else:
+        if self._preprocess_function is None and self._original_image is not None:
             self._image = self._original_image
 
+    def __getstate__(self) -> dict:
+        """Return the state of the image to be pickled.
+
+        Images read from a path are pickled with their path only. The
+        preprocess function is not pickled since it may be a lambda, so
+        preprocessed images are pickled with their pixels, or with the
+        handle of their pixels if they are shared.
+
+        :return: The state of the image.
+        """
+        state = self.__dict__.copy()
+        if self._shared is not None:
+            state["_shared_source"] = self._shared
+            state["_shared"] = None
+            state["_original_image"] = None
+            state["_image"] = None
+            state["_path"] = None
+            state["_source"] = None
+            state["_preprocess_function"] = None
+        elif self._preprocess_function is not None:
+            state["_original_image"] = self.get_image()
+            state["_image"] = state["_original_image"]
+            state["_path"] = None
+            state["_source"] = None
+            state["_preprocess_function"] = None
+        elif self._path is not None or self._source is not None:
+            state["_image"] = None
+        return state
+
+    def _get_original_image(self) -> ndarray:
+        """
+        Return the image before the preprocessing.
+
+        :return: The image in NumPy ndarray.
+        """
+        if self._shared_source is not None:
+            return self._shared_source.attach()
+        if self._source is not None:
+            return self._source.get_image()
+        if self._path is not None:
+            with span("read", "image", image=self._name):
+                return read_image(self._path)
+        return self._original_image
+
     def get_image(self) -> ndarray:
         """
-        Return the image.
+        Return the image, decoding and preprocessing it if needed.
+
+        The images decoded from a path are shared with the artifact cache,
+        so they are read-only while the cache is enabled. Copy them before
+        changing their pixels in place. The arrays given to the constructor
+        are returned as they are.
 
         :return: The image in NumPy ndarray.
         """
+        if self._image is not None:
+            return self._image
+
+        original_image = self._get_original_image()
+        if self._preprocess_function is None or original_image is None:
+            self._image = original_image
+            return self._image
+
+        # Cached images are read-only, give a copy to the preprocessor.
+        if not original_image.flags.writeable:
+            original_image = original_image.copy()
+        with span("preprocess", "image", image=self._name):
+            self._image = self._preprocess_function(original_image)
         return self._image
 
     def get_shape(self) -> tuple[int, int, int]:
         """
         Return the shape of the image.
 
+        The shape of an image read from a path without preprocessing is
+        read from the file header if possible, without decoding it.
+
         :return: The shape of the image as (height, width, channels).
         """
-        return self._image.shape
+        if self._image is None and self._preprocess_function is None:
+            if self._path is not None and (shape := read_image_shape(self._path)) is not None:
+                return shape
+            if self._source is not None:
+                return self._source.get_shape()
+        return self.get_image().shape
+
+    def release(self) -> None:
+        """
+        Release the decoded and preprocessed pixels of the image.
+
+        The image is decoded and preprocessed again at the next access.
+        The images created from NumPy ndarrays without preprocessing keep
+        their pixels.
+        """
+        if self._path is None and self._source is None and self._preprocess_function is None:
+            return
+        self._image = None
+        if self._preprocess_function is not None:
+            self._key = None
+
+    def share(self, store: SharedArrayStore, include_paths: bool = False) -> SharedArray:
+        """
+        Place the pixels in a shared memory block of the store.
+
+        The image is then pickled as the handle of the block, and the
+        worker processes attach to the pixels without copying them.
+
+        :param store: The store owning the block.
+        :param include_paths: If the images read from a path without
+        preprocessing are shared too. They are decoded here then, which is
+        worth it for an image used by every worker, e.g. the reference.
+        Otherwise their path is cheaper to send.
+        :return: The handle of the pixels, None if they are not shared.
+        """
+        if self._preprocess_function is None and self._source is not None:
+            return self._source.share(store, include_paths)
+        if self._preprocess_function is None and self._original_image is None \
+                and not include_paths:
+            return None
+        if self.get_image() is None:
+            return None
+
+        # The workers reuse the identity instead of hashing the pixels.
+        self.get_key()
+        self._shared = store.share(self.get_image())
+        return self._shared
+
+    def unshare(self) -> None:
+        """
+        Pickle the pixels again, e.g. once the store is closed.
+        """
+        self._shared = None
+        if self._source is not None:
+            self._source.unshare()
+
+    def get_key(self) -> Hashable:
+        """
+        Return the identity of the image in the artifact cache.
+
+        The images read from a path without preprocessing are identified
+        by the path and the modification time, the others by their
+        content at the first call.
+
+        :return: The identity of the image.
+        """
+        if self._preprocess_function is None and self._source is not None:
+            return self._source.get_key()
+        if self._key is None:
+            if self._preprocess_function is None and self._path is not None:
+                self._key = path_key(self._path)
+            else:
+                self._key = content_key(self.get_image())
+        return self._key
 
     def get_name(self) -> str:
         """
@@ -69,4 +219,4 @@ class Image:
 
         :param path: The path to save the image.
         """
-        save_image(self._image, path)
+        save_image(self.get_image(), path)
@@ -0,0 +1,47 @@
+"""
+Holds the lazy imports of the heavy and the optional dependencies.
+"""
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """A module imported at the first access of one of its attributes.
+
+    The heavy dependencies, e.g. matplotlib or skimage, are used by a
+    few functions only, so they are not imported with the package.
+    """
+
+    def __init__(self, name: str, fallback: str = None) -> None:
+        """Constructor of the LazyModule class.
+
+        :param name: The name of the module.
+        :param fallback: The name of the module imported instead if the
+        module is not installed.
+        """
+        self._name = name
+        self._fallback = fallback
+        self._module: ModuleType = None
+
+    def load(self) -> ModuleType:
+        """Import the module if it is not imported yet.
+
+        :return: The module, or the fallback module if it is not installed.
+        """
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                if self._fallback is None:
+                    raise
+                self._module = importlib.import_module(self._fallback)
+        return self._module
+
+    def __getattr__(self, attribute: str) -> Any:
+        """Return the attribute of the imported module.
+
+        :param attribute: The name of the attribute.
+        :return: The attribute.
+        """
+        return getattr(self.load(), attribute)
@@ -0,0 +1,215 @@
+"""
+Holds the comparison of many models over a dataset of reference images.
+"""
+from dataclasses import dataclass
+
+import numpy
+from numpy import ndarray
+
+from core.image import Image
+from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.result_table import AGGREGATIONS
+from core.settings import SRAnalyzerSettings
+from core.sr_analyzer import SRAnalyzer
+
+_NAN_AGGREGATIONS = {
+    "mean": numpy.nanmean,
+    "sum": numpy.nansum,
+    "min": numpy.nanmin,
+    "max": numpy.nanmax,
+}
+
+
+@dataclass
+class LeaderboardResult:
+    """Holds the results of a leaderboard as a dense cube."""
+
+    values: ndarray
+    """Holds the values by (reference, model, metric), NaN if missing."""
+    references: list[str]
+    """Holds the names of the references, the first axis of the values."""
+    models: list[str]
+    """Holds the names of the models, the second axis of the values."""
+    metrics: list[str]
+    """Holds the names of the results of the metrics, the third axis."""
+    units: list[str]
+    """Holds the units of the results of the metrics."""
+
+    def aggregate(self, aggregation: str = "mean") -> dict[str, dict[str, float]]:
+        """Aggregate the values of every model over the references.
+
+        The missing values are skipped.
+
+        :param aggregation: The aggregation, one of AGGREGATIONS.
+        :return: The aggregated values by the names of the models, then of
+        the metrics.
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}.")
+        if aggregation == "count":
+            aggregated = numpy.sum(~numpy.isnan(self.values), axis=0).astype(numpy.float64)
+        elif len(self.references) == 0:
+            aggregated = numpy.full(self.values.shape[1:], numpy.nan)
+        else:
+            with numpy.errstate(invalid="ignore"):
+                aggregated = _NAN_AGGREGATIONS[aggregation](self.values, axis=0)
+        return {model: dict(zip(self.metrics, row.tolist()))
+                for model, row in zip(self.models, aggregated)}
+
+    def rank(self, metric: str, aggregation: str = "mean",
+             descending: bool = True) -> list[tuple[str, float]]:
+        """Rank the models by the aggregate of a metric.
+
+        :param metric: The name of a result of the metrics, e.g. "HRI95".
+        :param aggregation: The aggregation, one of AGGREGATIONS.
+        :param descending: If the higher values rank first, e.g. False for
+        the MSE.
+        :return: The names of the models and their aggregated values, best
+        first. The models without values rank last.
+        """
+        if metric not in self.metrics:
+            raise KeyError(f"Unknown metric: {metric}. Use one of {', '.join(self.metrics)}.")
+        scores = [(model, values[metric]) for model, values in self.aggregate(aggregation).items()]
+        return sorted(scores, key=lambda score: (numpy.isnan(score[1]),
+                                                 -score[1] if descending else score[1]))
+
+
+class Leaderboard:
+    """The metrics of many models over a dataset of reference images.
+
+    Every reference is scored against the outputs of all the models by
+    one SRAnalyzer, so the work on the reference, e.g. its spectrum and
+    its data range, is done once per reference instead of once per model.
+    """
+
+    def __init__(self, settings: SRAnalyzerSettings) -> None:
+        """Constructor of the Leaderboard class.
+
+        :param settings: The settings of the analyzers of the references.
+        """
+        self._settings = settings
+        self._metrics: list[InterfaceMetric] = []
+        self._references: list[Image] = []
+        self._models: dict[str, list[Image] | dict[str, Image]] = {}
+
+    def add_metric(self, metric: InterfaceMetric) -> None:
+        """Add a metric to the leaderboard.
+
+        :param metric: The metric to be added, with scalar values.
+        """
+        if not metric.scalar:
+            raise ValueError(f"{type(metric).__name__} has non-scalar values, which cannot "
+                             "be placed in a leaderboard. Use an SRAnalyzer instead.")
+        self._metrics.append(metric)
+
+    def add_reference_image(self, image: Image) -> None:
+        """Add a reference image of the dataset.
+
+        :param image: The reference image.
+        """
+        self._references.append(image)
+
+    def add_model(self, name: str, images: list[Image] | dict[str, Image]) -> None:
+        """Add the outputs of a model.
+
+        The outputs are matched with the references when the leaderboard is
+        calculated, so the references may be added before or after.
+
+        :param name: The name of the model.
+        :param images: The outputs of the model in the order of the
+        references, None for a missing output, or by the names of their
+        references. The missing outputs have missing values.
+        """
+        if name in self._models:
+            raise ValueError(f"The model is already added: {name}.")
+        self._models[name] = dict(images) if isinstance(images, dict) else list(images)
+
+    def _get_outputs(self, name: str) -> list[Image]:
+        """Return the outputs of a model in the order of the references.
+
+        :param name: The name of the model.
+        :return: The outputs, None for the missing ones.
+        """
+        images = self._models[name]
+        if isinstance(images, dict):
+            return [images.get(reference.get_name()) for reference in self._references]
+        if len(images) != len(self._references):
+            raise ValueError(f"The model {name} has {len(images)} outputs for "
+                             f"{len(self._references)} references. Give an output per "
+                             "reference, or the outputs by the names of the references.")
+        return images
+
+    def calculate(self) -> LeaderboardResult:
+        """Calculate the metrics of every model against every reference.
+
+        The references are scored one after the other with the executor of
+        the settings, and released once scored.
+
+        :return: The results as a cube of the values.
+        """
+        if not self._metrics:
+            raise RuntimeError("There is no metric to calculate.")
+        if not self._models:
+            raise RuntimeError("There is no model to compare.")
+
+        # Calculate the outputs of every reference at once.
+        model_outputs = [self._get_outputs(name) for name in self._models]
+        cells: dict[tuple[int, int, int], list[MetricResult]] = {}
+        for reference_index, reference in enumerate(self._references):
+            outputs = [(model_index, images[reference_index])
+                       for model_index, images in enumerate(model_outputs)
+                       if images[reference_index] is not None]
+            if not outputs:
+                continue
+            analyzer = SRAnalyzer(self._settings)
+            for metric in self._metrics:
+                analyzer.add_metric(metric)
+            analyzer.add_reference_image(reference)
+            for _, image in outputs:
+                analyzer.add_image(image)
+            analyzer.calculate()
+            for metric_index, metric in enumerate(self._metrics):
+                for model_index, image in outputs:
+                    metric_results = analyzer.result(metric, image)
+                    cells[(reference_index, model_index, metric_index)] = (
+                        metric_results if isinstance(metric_results, list) else [metric_results])
+            reference.release()
+
+        return self._get_cube(cells)
+
+    def _get_cube(self, cells: dict[tuple[int, int, int], list[MetricResult]]
+                  ) -> LeaderboardResult:
+        """Place the results of the cells in a cube.
+
+        A metric has a column per result, e.g. one per threshold, named
+        after the result. The metrics name their results the same for every
+        pair, e.g. HRI95 whether the radius is found or not.
+
+        :param cells: The results by the reference, model and metric indices.
+        :return: The results as a cube of the values.
+        """
+        columns: dict[tuple[int, int], tuple[str, str]] = {}
+        for (_, _, metric_index), metric_results in cells.items():
+            for part, metric_result in enumerate(metric_results):
+                column = columns.setdefault((metric_index, part),
+                                            (metric_result.name, metric_result.unit))
+                if column[0] != metric_result.name:
+                    raise ValueError(f"{type(self._metrics[metric_index]).__name__} names its "
+                                     f"results both {column[0]} and {metric_result.name}.")
+        column_keys = sorted(columns)
+        column_indices = {column_key: index for index, column_key in enumerate(column_keys)}
+
+        values = numpy.full((len(self._references), len(self._models), len(column_keys)),
+                            numpy.nan)
+        for (reference_index, model_index, metric_index), metric_results in cells.items():
+            for part, metric_result in enumerate(metric_results):
+                values[reference_index, model_index,
+                       column_indices[(metric_index, part)]] = float(metric_result.value)
+
+        return LeaderboardResult(
+            values=values,
+            references=[reference.get_name() for reference in self._references],
+            models=list(self._models),
+            metrics=[columns[column_key][0] for column_key in column_keys],
+            units=[columns[column_key][1] for column_key in column_keys],
+        )
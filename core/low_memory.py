@@ -0,0 +1,145 @@
+"""
+Holds the calculation of the spectra of very large images with a bounded
+peak memory.
+
+The magnitudes are calculated in float32, row block by row block, so no
+full size float or complex copy of the image exists besides the complex
+half spectrum. It is transformed in place, and its memory is reused by
+the magnitudes and released down to their size as soon as they exist.
+The peak memory is returned by get_peak_bytes.
+"""
+import numpy
+from numpy import ndarray
+
+from core.fft_backend import FFTBackend, get_fft_backend
+
+BLOCK_BYTES = 16 * 1024 * 1024
+"""Holds the size of the temporaries of a block of rows or columns."""
+
+
+def _get_block_size(length: int) -> int:
+    """Return the number of rows or columns of a block.
+
+    :param length: The length of a row or a column.
+    :return: The number of rows or columns whose temporaries fit into
+    BLOCK_BYTES, at least one.
+    """
+    # The complex64 spectrum and its float32 source take 8 bytes per pixel.
+    return max(1, BLOCK_BYTES // (8 * length))
+
+
+def get_peak_bytes(shape: tuple[int, ...], half: bool = True) -> int:
+    """Return the peak memory of the calculation of a low memory spectrum.
+
+    It is about 4 bytes per pixel for the half spectrum and 6 bytes per
+    pixel for the full spectrum, i.e. at most twice the size of the 8-bit
+    BGR image, plus the temporaries of two blocks. The grayscale image
+    given to the calculation is not included.
+
+    :param shape: The shape of the image.
+    :param half: If only the non-negative horizontal frequencies are needed.
+    :return: The peak memory in bytes.
+    """
+    height, width = shape[:2]
+    half_pixels = height * (width // 2 + 1)
+
+    # The complex64 half spectrum holds the half magnitudes, then the half
+    # magnitudes live with the full magnitudes.
+    peak_bytes = half_pixels * 8
+    if not half:
+        peak_bytes = max(peak_bytes, half_pixels * 4 + height * width * 4)
+    return peak_bytes + 2 * BLOCK_BYTES
+
+
+def _fft_columns_in_place(spectrum: ndarray, backend: FFTBackend) -> None:
+    """Transform the columns of the complex spectrum in place.
+
+    :param spectrum: The complex64 spectrum of the rows.
+    :param backend: The FFT backend.
+    """
+    if backend.overwrites_input:
+        transformed = backend.fft(spectrum, axis=0, overwrite_x=True)
+        if not numpy.shares_memory(transformed, spectrum):
+            spectrum[...] = transformed
+        return
+
+    # The other backends transform into a new array, a block at a time.
+    columns = _get_block_size(2 * spectrum.shape[0])
+    for start in range(0, spectrum.shape[1], columns):
+        spectrum[:, start:start + columns] = backend.fft(spectrum[:, start:start + columns],
+                                                         axis=0)
+
+
+def get_low_memory_half_spectrum(grayscale: ndarray, scale_log: bool = True,
+                                 fft_backend: FFTBackend = None) -> ndarray:
+    """Get the half FFT magnitudes of the image in float32 within the peak
+    memory of get_peak_bytes.
+
+    The layout is the one of get_half_fft_of_image: the rows are shifted
+    to the center, the first column is the zero horizontal frequency.
+
+    :param grayscale: The grayscale image, of any real type.
+    :param scale_log: If the FFT should be scaled logarithmically.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The half FFT magnitudes with the shape (height, width // 2 + 1).
+    """
+    height, width = grayscale.shape
+    columns = width // 2 + 1
+    rows = _get_block_size(width)
+
+    # The magnitudes are written over the complex spectrum they come from.
+    buffer = numpy.empty(2 * height * columns, dtype=numpy.float32)
+    spectrum = buffer.view(numpy.complex64).reshape(height, columns)
+
+    # Transform the rows block by block. Modulating the rows shifts the
+    # transform of the columns by half of the height, instead of a copy.
+    shift = height // 2
+    backend = fft_backend or get_fft_backend()
+    for start in range(0, height, rows):
+        block = backend.rfft(grayscale[start:start + rows].astype(numpy.float32), axis=1)
+        turns = (shift * numpy.arange(start, start + len(block))) % height / height
+        block *= numpy.exp(2j * numpy.pi * turns).astype(numpy.complex64)[:, None]
+        spectrum[start:start + rows] = block
+    _fft_columns_in_place(spectrum, backend)
+
+    # The magnitudes of a row end before the next rows of the spectrum start.
+    magnitudes = buffer[:height * columns].reshape(height, columns)
+    for start in range(0, height, rows):
+        block = numpy.abs(spectrum[start:start + rows]).astype(numpy.float32, copy=False)
+        if scale_log:
+            block += 1
+            numpy.log(block, out=block)
+        magnitudes[start:start + rows] = block
+
+    # Release the memory of the complex spectrum.
+    del spectrum, magnitudes
+    buffer.resize(height * columns, refcheck=False)
+    return buffer.reshape(height, columns)
+
+
+def get_low_memory_spectrum(grayscale: ndarray, scale_log: bool = True,
+                            fft_backend: FFTBackend = None) -> ndarray:
+    """Get the full FFT magnitudes of the image in float32 within the peak
+    memory of get_peak_bytes.
+
+    The negative horizontal frequencies are the point reflection of the
+    half spectrum, so the full spectrum is never calculated as complex.
+
+    :param grayscale: The grayscale image, of any real type.
+    :param scale_log: If the FFT should be scaled logarithmically.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The FFT magnitudes shifted to the center.
+    """
+    height, width = grayscale.shape
+    half = get_low_memory_half_spectrum(grayscale, scale_log, fft_backend)
+
+    # The shifted row r of the frequency u reflects to the row of -u.
+    reflected_rows = (2 * (height // 2) - numpy.arange(height)) % height
+    rows = _get_block_size(width)
+    magnitudes = numpy.empty((height, width), dtype=numpy.float32)
+    for start in range(0, height, rows):
+        magnitudes[start:start + rows, width // 2:] = half[start:start + rows,
+                                                           :width - width // 2]
+        magnitudes[start:start + rows, :width // 2] = \
+            half[reflected_rows[start:start + rows], width // 2:0:-1]
+    return magnitudes
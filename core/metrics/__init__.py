@@ -2,14 +2,20 @@
 The API of the metrics package.
 """
 
-from core.metrics.harmonics_radius import HarmonicsRadius
+from core.metrics.harmonics_radius import HarmonicsRadius, harmonics_profile
+from core.metrics.localized_harmonics_radius import LocalizedHarmonicsRadius
 from core.metrics.mean_squared_error import MeanSquaredError
 from core.metrics.structural_similarity_index import StructuralSimilarityIndex
 from core.metrics.peak_signal_to_noise_ratio import PeakSignalToNoiseRatio
+from core.metrics.spatial_metrics import FusedSpatialMetrics, evaluate_spatial_metrics
 
 __all__ = [
     "HarmonicsRadius",
+    "harmonics_profile",
+    "LocalizedHarmonicsRadius",
     "MeanSquaredError",
     "StructuralSimilarityIndex",
     "PeakSignalToNoiseRatio",
+    "FusedSpatialMetrics",
+    "evaluate_spatial_metrics",
 ]
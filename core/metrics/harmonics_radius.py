@@ -1,18 +1,157 @@
 """
 Harmonics Radius implementation with SSIM as a metric.
 """
+from collections.abc import Callable, Sequence
+
 import numpy
-from skimage.metrics import structural_similarity
 
+from core.centered_ssim import HalfPlaneCenteredSSIM
+from core.coarse_to_fine import coarse_to_fine_search
+from core.fft_backend import FFTBackend
 from core.image import Image
 from core.metrics.interface_metric import InterfaceMetric, MetricResult
-from core.utils import get_fft_of_image
+from core.radius_search import SEARCH_STRATEGIES, get_grid_sizes, seeded_search
+from core.tracing import Tracer, get_tracer, span
+from core.utils import get_float_type, get_half_fft_of_image
 #  from core.utils import draw_square_from_center
 
 
+DEFAULT_THRESHOLD = 0.95
+"""Holds the SSIM threshold of the HRI95."""
+
+
+# pylint: disable-next=too-many-arguments
+def _get_half_spectra(y_true: Image, y_pred: Image, precision: str, low_memory: bool = False,
+                      persist: bool = False,
+                      fft_backend: FFTBackend = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the half spectra of the images in log scale.
+
+    :param y_true: The true image.
+    :param y_pred: The predicted image.
+    :param precision: The precision of the spectra.
+    :param low_memory: If the spectra are calculated within the bounded
+    peak memory of core.low_memory, in float32.
+    :param persist: If the spectrum of the true image is kept in the disk
+    cache, see core.utils.get_fft_of_image.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The half spectra of the true and the predicted images.
+    """
+    # Check the shapes of the parameters.
+    if y_true.get_shape() != y_pred.get_shape():
+        raise ValueError("y_true and y_pred must have the same shape.")
+
+    # Get the half spectra, the other half is their reflection.
+    fft_of_true: numpy.ndarray = get_half_fft_of_image(
+        y_true.get_image(), scale_log=True, key=y_true.get_key(),
+        precision=precision, low_memory=low_memory, persist=persist, fft_backend=fft_backend)
+    fft_of_pred: numpy.ndarray = get_half_fft_of_image(
+        y_pred.get_image(), scale_log=True, key=y_pred.get_key(),
+        precision=precision, low_memory=low_memory, fft_backend=fft_backend)
+    return fft_of_true, fft_of_pred
+
+
+def _get_profile(fft_of_true: numpy.ndarray,
+                 fft_of_pred: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the SSIM of every grid size scanned by the HRI95 search.
+
+    :param fft_of_true: The half spectrum of the true image.
+    :param fft_of_pred: The half spectrum of the predicted image.
+    :return: The grid sizes in scanning order and their SSIM.
+    """
+    with span("ssim_map", "hri95"):
+        ssim_of_grid = HalfPlaneCenteredSSIM(
+            fft_of_true, fft_of_pred,
+            data_range=fft_of_true.max() - fft_of_true.min())
+    grid_sizes = numpy.array(get_grid_sizes(fft_of_pred.shape[0]), dtype=numpy.int64)
+    with span("profile", "hri95", grid_sizes=len(grid_sizes)):
+        profile = numpy.array([ssim_of_grid(int(grid_size)) for grid_size in grid_sizes],
+                              dtype=numpy.float64)
+    return grid_sizes, profile
+
+
+def harmonics_profile(y_true: Image, y_pred: Image, precision: str = "float64",
+                      low_memory: bool = False,
+                      fft_backend: FFTBackend = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the SSIM of the centered grids of the spectra by grid size.
+
+    The SSIM map of the spectra is calculated once, and the SSIM of each
+    grid is read from it. The HRI of a threshold is the half of the first
+    grid size whose SSIM exceeds the threshold.
+
+    :param y_true: The true image.
+    :param y_pred: The predicted image.
+    :param precision: The precision of the spectra, "float64" or "float32".
+    :param low_memory: If the spectra are calculated within the bounded
+    peak memory of core.low_memory, in float32.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The grid sizes from the largest down to the smallest, and
+    their SSIM, NaN for the grids not fitting into the spectra.
+    """
+    get_float_type(precision)
+    return _get_profile(*_get_half_spectra(y_true, y_pred, precision, low_memory,
+                                           fft_backend=fft_backend))
+
+
+def _threshold_name(threshold: float) -> str:
+    """Return the name of the HRI of a threshold, e.g. HRI95 for 0.95.
+
+    :param threshold: The SSIM threshold.
+    :return: The name of the metric.
+    """
+    # Round off the representation error of the percentage, e.g. of 0.95 * 100.
+    return f"HRI{round(threshold * 100, 10):.10g}"
+
+
+def _traced(ssim_of_grid: Callable[[int], float], tracer: Tracer) -> Callable[[int], float]:
+    """Record every evaluation of the SSIM of a grid as a span.
+
+    :param ssim_of_grid: The function returning the SSIM of a grid size.
+    :param tracer: The tracer recording the spans.
+    :return: The same function recording its calls.
+    """
+    def traced_ssim_of_grid(grid_size: int) -> float:
+        """Return the SSIM of the grid and record it."""
+        with tracer.span("radius_search_iteration", "hri95", grid_size=grid_size) as args:
+            args["ssim"] = ssim_of_grid(grid_size)
+        return args["ssim"]
+    return traced_ssim_of_grid
+
+
 class HarmonicsRadius(InterfaceMetric):
     """The HRI95 metric."""
 
+    def __init__(self, search: str = "linear", precision: str = None,
+                 threshold: float | Sequence[float] = DEFAULT_THRESHOLD) -> None:
+        """Constructor of the HarmonicsRadius class.
+
+        :param search: The search strategy of the grid size. One of
+        "linear", "bisect", "galloping" or "coarse_to_fine", which estimates
+        the radius on block-reduced spectra and calculates the full
+        resolution SSIM map around that estimate only. "linear" is the
+        exact scan. The others are heuristics evaluating fewer grids by
+        assuming that the SSIM increases while the grid shrinks, so they
+        may report a smaller radius than "linear" on a non-monotonic SSIM
+        profile, see core.radius_search. The seeded search of the
+        "seed_radius" keyword is one of them too.
+        :param precision: The precision of the spectra and the SSIM
+        statistics, "float64" or "float32". The precision of the analyzer
+        is used if it is not given.
+        :param threshold: The SSIM threshold of the grids, or a list of
+        thresholds, e.g. [0.9, 0.95, 0.99]. A list is evaluated from a
+        single SSIM profile, and one result is returned per threshold,
+        named after it, e.g. HRI90.
+        """
+        thresholds = [threshold] if isinstance(threshold, (int, float)) else list(threshold)
+        if not thresholds or not all(0 < value < 1 for value in thresholds):
+            raise ValueError("The thresholds must be between 0 and 1.")
+        if search not in SEARCH_STRATEGIES and search != "coarse_to_fine":
+            raise ValueError(f"Unknown search strategy: {search}.")
+        if precision is not None:
+            get_float_type(precision)
+        self._search = search
+        self._precision = precision
+        self._threshold = threshold if isinstance(threshold, (int, float)) else tuple(thresholds)
+
     @property
     def keywords_needed(self) -> dict[str, type]:
         """The keywords needed to calculate the metric.
@@ -21,13 +160,22 @@ class HarmonicsRadius(InterfaceMetric):
         """
         return {"y_true": Image, "y_pred": Image}
 
-    def calculate(self, **kwargs) -> MetricResult:
+    def calculate(self, **kwargs) -> MetricResult | list[MetricResult]:
         """Calculate the HRI95.
 
         :param kwargs: The keywords needed to calculate the metric.
-        Check the keywords_needed property.
+        Check the keywords_needed property. An optional "seed_radius", e.g.
+        the HRI95 of the previous frame of a video, starts the search from
+        that radius instead of using the search strategy. It is ignored
+        for a list of thresholds. An optional "low_memory" calculates the
+        spectra in float32 within the bounded peak memory of
+        core.low_memory. An optional "persist" keeps the spectrum of the
+        true image in the disk cache, e.g. for a reference scored against
+        many images. An optional "fft_backend" calculates the spectra with
+        that backend instead of the one of the process.
 
-        :return: The HRI95 in a MetricResult object.
+        :return: The HRI95 in a MetricResult object, or a list of them in
+        the order of the thresholds if a list of thresholds is given.
         """
         # Check keywords.
         if not set(self.keywords_needed).issubset(kwargs):
@@ -44,61 +192,101 @@ class HarmonicsRadius(InterfaceMetric):
         if not isinstance(y_pred, Image):
             raise TypeError("y_pred must be an Image.")
 
-        # Check the shapes of the parameters.
-        if y_true.get_shape() != y_pred.get_shape():
-            raise ValueError("y_true and y_pred must have the same shape.")
-
-        # Convert images to greyscale.
-        fft_of_true: numpy.ndarray = get_fft_of_image(
-            y_true.get_image(), scale_log=True)
-        fft_of_pred: numpy.ndarray = get_fft_of_image(
-            y_pred.get_image(), scale_log=True)
-
-        # Find the center point.
-        pred_x_center = fft_of_pred.shape[0] // 2
-        pred_y_center = fft_of_pred.shape[1] // 2
-
-        grid_size = fft_of_pred.shape[0] // 2
-        while True:
-            # Get the grid.
-            grid_pred = fft_of_pred[
-                pred_x_center - grid_size//2: pred_x_center + grid_size//2,
-                pred_y_center - grid_size//2: pred_y_center + grid_size//2,
-            ]
-            grid_true = fft_of_true[
-                pred_x_center - grid_size//2: pred_x_center + grid_size//2,
-                pred_y_center - grid_size//2: pred_y_center + grid_size//2,
-            ]
-
-            # Check the SSIM of the grid.
-            ssim_result = structural_similarity(
-                grid_true,
-                grid_pred,
-                data_range=fft_of_true.max() - fft_of_true.min(),
-                multichannel=False,
-            )
-
-            if ssim_result > 0.95:
-                # The radius is the half of the grid size.
-                radius = grid_size // 2
-
-                # draw_square_from_center(fft_of_pred, (pred_x_center, pred_y_center), radius)
-                return MetricResult(
-                    metric_name="HRI95",
-                    metric_value=radius,
-                    metric_unit="px"
-                )
-
-            # Increase the grid size by 2.
-            grid_size -= 2
-
-            # A stop condition.
-            if grid_size < 7:
-                break
-
-        # If the radius is not found, return the maximum radius.
+        precision = self._precision or kwargs.get("precision", "float64")
+        fft_of_true, fft_of_pred = _get_half_spectra(y_true, y_pred, precision,
+                                                     kwargs.get("low_memory", False),
+                                                     kwargs.get("persist", False),
+                                                     kwargs.get("fft_backend"))
+        if isinstance(self._threshold, tuple):
+            return self._calculate_thresholds(fft_of_true, fft_of_pred)
+
+        seed_radius = kwargs.get("seed_radius")
+        if seed_radius is None and self._search == "coarse_to_fine":
+            return self._calculate_coarse_to_fine(fft_of_true, fft_of_pred)
+
+        # Calculate the SSIM map of the half spectra once.
+        with span("ssim_map", "hri95"):
+            ssim_of_grid = HalfPlaneCenteredSSIM(
+                fft_of_true, fft_of_pred,
+                data_range=fft_of_true.max() - fft_of_true.min())
+
+        # Search the first grid passing the threshold.
+        search = self._search if seed_radius is None else "seeded"
+        with span("radius_search", "hri95", search=search):
+            tracer = get_tracer()
+            evaluate = _traced(ssim_of_grid, tracer) if tracer is not None else ssim_of_grid
+            grid_sizes = get_grid_sizes(fft_of_pred.shape[0])
+            if seed_radius is None:
+                grid_size = SEARCH_STRATEGIES[self._search](evaluate, grid_sizes, self._threshold)
+            else:
+                grid_size = seeded_search(evaluate, grid_sizes, self._threshold,
+                                          2 * seed_radius)
+        details = {
+            "search": search,
+            "ssim_evaluations": ssim_of_grid.evaluations,
+        }
+        return self._get_result(grid_size, details, self._threshold)
+
+    def _calculate_coarse_to_fine(self, fft_of_true: numpy.ndarray,
+                                  fft_of_pred: numpy.ndarray) -> MetricResult:
+        """Calculate the HRI95 with the coarse-to-fine search.
+
+        :param fft_of_true: The half spectrum of the true image.
+        :param fft_of_pred: The half spectrum of the predicted image.
+        :return: The HRI95 in a MetricResult object.
+        """
+        with span("radius_search", "hri95", search="coarse_to_fine"):
+            search_result = coarse_to_fine_search(
+                fft_of_true, fft_of_pred,
+                data_range=fft_of_true.max() - fft_of_true.min(), threshold=self._threshold)
+        details = {
+            "search": "coarse_to_fine",
+            "ssim_evaluations": search_result.evaluations,
+            "coarse_radius": search_result.coarse_radius,
+            "refined_half_size": search_result.refined_half_size,
+            "refinements": search_result.refinements,
+        }
+        return self._get_result(search_result.grid_size, details, self._threshold)
+
+    def _calculate_thresholds(self, fft_of_true: numpy.ndarray,
+                              fft_of_pred: numpy.ndarray) -> list[MetricResult]:
+        """Calculate the HRI of every threshold from a single profile.
+
+        :param fft_of_true: The half spectrum of the true image.
+        :param fft_of_pred: The half spectrum of the predicted image.
+        :return: The HRI of the thresholds in MetricResult objects.
+        """
+        grid_sizes, profile = _get_profile(fft_of_true, fft_of_pred)
+        metric_results = []
+        for threshold in self._threshold:
+            # The NaN of the grids not fitting never pass.
+            passing = numpy.flatnonzero(profile > threshold)
+            details = {
+                "search": "profile",
+                "ssim_evaluations": len(grid_sizes),
+            }
+            metric_results.append(self._get_result(
+                int(grid_sizes[passing[0]]) if passing.size else None, details, threshold))
+        return metric_results
+
+    @staticmethod
+    def _get_result(grid_size: int | None, details: dict, threshold: float) -> MetricResult:
+        """Return the result of the grid size found by the search.
+
+        The result is named after the threshold, e.g. HRI95, whether the
+        grid size is found or not, and its details tell which.
+
+        :param grid_size: The first grid size passing the threshold, if any.
+        :param details: The details of the search.
+        :param threshold: The SSIM threshold of the search.
+        :return: The HRI in a MetricResult object, 0 if not found.
+        """
+        details = {**details, "threshold": threshold, "found": grid_size is not None}
+
+        # The radius is the half of the grid size.
         return MetricResult(
-            metric_name="harmonics_radius",
-            metric_value=0,
-            metric_unit="px"
+            metric_name=_threshold_name(threshold),
+            metric_value=grid_size // 2 if grid_size is not None else 0,
+            metric_unit="px",
+            details=details
         )
@@ -9,10 +9,14 @@ from typing import Any
 class MetricResult:
     """Hold the result of a metric."""
 
-    def __init__(self, metric_name: str, metric_value: Any, metric_unit: str):
+    __slots__ = ("name", "value", "unit", "details", "reference_image_name", "image_name")
+
+    def __init__(self, metric_name: str, metric_value: Any, metric_unit: str,
+                 details: dict[str, Any] = None):
         self.name = metric_name
         self.value = metric_value
         self.unit = metric_unit
+        self.details: dict[str, Any] = details if details is not None else {}
 
         self.reference_image_name: str = ""
         self.image_name: str = ""
@@ -35,7 +39,8 @@ class MetricResult:
             "value": self.value,
             "unit": self.unit,
             "referance": self.reference_image_name,
-            "image": self.image_name
+            "image": self.image_name,
+            "details": self.details
         }
 
     def register_image_names(self, reference_image_name: str, image_name: str) -> None:
@@ -51,6 +56,10 @@ class MetricResult:
 class InterfaceMetric(metaclass=ABCMeta):
     """The interface for all metrics."""
 
+    scalar: bool = True
+    """Holds if the values of the results are scalars, e.g. not the arrays
+    of the windows of a localized metric."""
+
     @abstractmethod
     def calculate(self, **kwargs) -> MetricResult:
         """
@@ -0,0 +1,286 @@
+"""
+Localized Harmonics Radius implementation with SSIM as a metric.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.centered_ssim import (
+    WINDOW_SIZE,
+    WindowCenteredSSIM,
+    local_statistics,
+    ssim_from_statistics,
+    summed_area_table,
+    rectangle_sum,
+)
+from core.image import Image
+from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.radius_search import MIN_GRID_SIZE, SEARCH_STRATEGIES
+from core.utils import get_fft_of_image, get_float_type
+
+LOCALIZED_DTYPE = numpy.dtype([
+    ("x0", numpy.int64),
+    ("x1", numpy.int64),
+    ("y0", numpy.int64),
+    ("y1", numpy.int64),
+    ("hri95", numpy.int64),
+    ("psnr", numpy.float64),
+    ("ssim", numpy.float64),
+    ("mse", numpy.float64),
+])
+"""The fields of a window, x along the columns and y along the rows of the
+spectrum with the ends excluded."""
+
+
+def _as_pair(value: int or tuple[int, int]) -> tuple[int, int]:
+    """Return the value as a (height, width) pair.
+
+    :param value: A single size for both axes, or a (height, width) pair.
+    :return: The (height, width) pair.
+    """
+    if isinstance(value, int):
+        return (value, value)
+    return tuple(value)
+
+
+class LocalizedHarmonicsRadius(InterfaceMetric):
+    """The HRI95 of the sliding windows of the spectra.
+
+    Every window is scored as an independent spectrum: the HRI95 of its
+    centered grids, and the PSNR, SSIM and MSE of the whole window with
+    the data range of the true window. The SSIM statistics of the whole
+    spectra are calculated once and shared by the overlapping windows.
+    """
+
+    scalar = False
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, window_size: int or tuple[int, int] = None,
+                 stride: int or tuple[int, int] = None,
+                 threshold: float = 0.95,
+                 search: str = "linear",
+                 global_data_range: bool = False,
+                 workers: int = None,
+                 precision: str = None) -> None:
+        """Constructor of the LocalizedHarmonicsRadius class.
+
+        :param window_size: The (height, width) of the windows, or a single
+        size for both. A quarter of the spectrum is used if it is not given.
+        :param stride: The (height, width) steps of the windows, or a single
+        step for both. Half of the window size is used if it is not given.
+        :param threshold: The SSIM threshold of the HRI95.
+        :param search: The search strategy of the grid size. One of
+        "linear", "bisect" or "galloping".
+        :param global_data_range: If the data range of the whole true
+        spectrum is used for every window. The windows then share one SSIM
+        map, which makes dense windows much cheaper, but their values
+        differ from scoring the windows on their own.
+        :param workers: The number of threads scoring the windows. The
+        number of CPUs is used if it is None.
+        :param precision: The precision of the spectra and the SSIM
+        statistics, "float64" or "float32". The precision of the analyzer
+        is used if it is not given.
+        """
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {search}.")
+        if precision is not None:
+            get_float_type(precision)
+        if window_size is not None and min(_as_pair(window_size)) < WINDOW_SIZE:
+            raise ValueError(f"The window size must be at least {WINDOW_SIZE}.")
+        if stride is not None and min(_as_pair(stride)) < 1:
+            raise ValueError("The stride must be positive.")
+        self._window_size = window_size
+        self._stride = stride
+        self._threshold = threshold
+        self._search = search
+        self._global_data_range = global_data_range
+        self._workers = workers
+        self._precision = precision
+
+    @property
+    def keywords_needed(self) -> dict[str, type]:
+        """The keywords needed to calculate the metric.
+
+        :return: The keywords needed.
+        """
+        return {"y_true": Image, "y_pred": Image}
+
+    def calculate(self, **kwargs) -> MetricResult:
+        """Calculate the HRI95, PSNR, SSIM and MSE of every window.
+
+        :param kwargs: The keywords needed to calculate the metric.
+        Check the keywords_needed property. An optional "low_memory"
+        calculates the spectra in float32 within the bounded peak memory of
+        core.low_memory. An optional "persist" keeps the spectrum of the
+        true image in the disk cache. An optional "fft_backend" calculates
+        the spectra with that backend instead of the one of the process.
+
+        :return: The windows as a structured array of LOCALIZED_DTYPE in a
+        MetricResult object, in row-major order of their positions.
+        """
+        # Check keywords.
+        if not set(self.keywords_needed).issubset(kwargs):
+            raise ValueError(
+                "Missing keywords needed to calculate the metric.")
+
+        # Get the parameters.
+        y_true = kwargs["y_true"]
+        y_pred = kwargs["y_pred"]
+
+        # Check the types of the parameters.
+        if not isinstance(y_true, Image):
+            raise TypeError("y_true must be an Image.")
+        if not isinstance(y_pred, Image):
+            raise TypeError("y_pred must be an Image.")
+
+        # Check the shapes of the parameters.
+        if y_true.get_shape() != y_pred.get_shape():
+            raise ValueError("y_true and y_pred must have the same shape.")
+
+        # Get the spectra.
+        precision = self._precision or kwargs.get("precision", "float64")
+        low_memory = kwargs.get("low_memory", False)
+        fft_of_true: numpy.ndarray = get_fft_of_image(
+            y_true.get_image(), scale_log=True, key=y_true.get_key(),
+            precision=precision, low_memory=low_memory,
+            persist=kwargs.get("persist", False), fft_backend=kwargs.get("fft_backend"))
+        fft_of_pred: numpy.ndarray = get_fft_of_image(
+            y_pred.get_image(), scale_log=True, key=y_pred.get_key(),
+            precision=precision, low_memory=low_memory, fft_backend=kwargs.get("fft_backend"))
+
+        # Get the windows.
+        window_size = _as_pair(self._window_size or (fft_of_true.shape[0] // 4,
+                                                     fft_of_true.shape[1] // 4))
+        stride = _as_pair(self._stride or (max(window_size[0] // 2, 1),
+                                           max(window_size[1] // 2, 1)))
+        if window_size[0] > fft_of_true.shape[0] or window_size[1] > fft_of_true.shape[1]:
+            raise ValueError("The window size cannot be greater than the image size.")
+        if min(window_size) < WINDOW_SIZE:
+            raise ValueError(f"The window size must be at least {WINDOW_SIZE}.")
+
+        row_starts = numpy.arange(0, fft_of_true.shape[0] - window_size[0] + 1, stride[0])
+        column_starts = numpy.arange(0, fft_of_true.shape[1] - window_size[1] + 1, stride[1])
+        windows = numpy.zeros(len(row_starts) * len(column_starts), dtype=LOCALIZED_DTYPE)
+        windows["y0"] = numpy.repeat(row_starts, len(column_starts))
+        windows["y1"] = windows["y0"] + window_size[0]
+        windows["x0"] = numpy.tile(column_starts, len(row_starts))
+        windows["x1"] = windows["x0"] + window_size[1]
+
+        # Get the data ranges of the true windows from strided views.
+        if self._global_data_range:
+            data_ranges = numpy.full(len(windows), fft_of_true.max() - fft_of_true.min(),
+                                     dtype=numpy.float64)
+        else:
+            true_windows = sliding_window_view(fft_of_true, window_size)[
+                ::stride[0], ::stride[1]]
+            data_ranges = (true_windows.max(axis=(2, 3))
+                           - true_windows.min(axis=(2, 3))).ravel().astype(numpy.float64)
+
+        # Calculate the statistics shared by the windows once.
+        float_type = numpy.result_type(fft_of_true.dtype, fft_of_pred.dtype, numpy.float32)
+        statistics = local_statistics(fft_of_true.astype(float_type, copy=False),
+                                      fft_of_pred.astype(float_type, copy=False))
+
+        # Read the MSE and the PSNR of every window from one summed-area table.
+        difference = fft_of_true.astype(numpy.float64) - fft_of_pred
+        windows["mse"] = rectangle_sum(
+            summed_area_table(difference * difference),
+            (windows["y0"], windows["y1"]), (windows["x0"], windows["x1"]),
+        ) / (window_size[0] * window_size[1])
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            windows["psnr"] = 10 * numpy.log10(data_ranges ** 2 / windows["mse"])
+
+        # Calculate the HRI95 and the SSIM of the windows.
+        if self._global_data_range and len(windows) > 0:
+            self._score_shared(windows, window_size, summed_area_table(
+                ssim_from_statistics(statistics, data_ranges[0])))
+        else:
+            self._score_each(windows, window_size, statistics, data_ranges)
+
+        return MetricResult(
+            metric_name="localized_HRI95",
+            metric_value=windows,
+            metric_unit="px",
+            details={
+                "window_size": window_size,
+                "stride": stride,
+                "search": self._search,
+                "windows": len(windows),
+            }
+        )
+
+    def _score_shared(self, windows: numpy.ndarray, window_size: tuple[int, int],
+                      ssim_area: numpy.ndarray) -> None:
+        """Calculate the HRI95 and the SSIM of all the windows at once from
+        the summed-area table of the SSIM map of the whole spectra.
+
+        Every grid size is evaluated for all the windows together, so the
+        linear scan is used whatever the search strategy is.
+
+        :param windows: The windows to be filled.
+        :param window_size: The height and the width of the windows.
+        :param ssim_area: The summed-area table of the SSIM map.
+        """
+        pad = (WINDOW_SIZE - 1) // 2
+        row_centers = windows["y0"] + window_size[0] // 2
+        column_centers = windows["x0"] + window_size[1] // 2
+
+        # The SSIM of the whole window without its border band.
+        windows["ssim"] = rectangle_sum(
+            ssim_area,
+            (windows["y0"], windows["y1"] - 2 * pad),
+            (windows["x0"], windows["x1"] - 2 * pad),
+        ) / ((window_size[0] - 2 * pad) * (window_size[1] - 2 * pad))
+
+        # Scan the grids from the largest, and keep the first passing one.
+        found = numpy.zeros(len(windows), dtype=bool)
+        for grid_size in range(min(window_size), MIN_GRID_SIZE - 1, -2):
+            half_size = grid_size // 2
+            side = 2 * half_size - 2 * pad
+            row_starts = row_centers - half_size
+            column_starts = column_centers - half_size
+            grid_ssim = rectangle_sum(ssim_area, (row_starts, row_starts + side),
+                                      (column_starts, column_starts + side)) / (side * side)
+            passing = ~found & (grid_ssim > self._threshold)
+            windows["hri95"][passing] = half_size
+            found |= passing
+
+    def _score_each(self, windows: numpy.ndarray, window_size: tuple[int, int],
+                    statistics: tuple[numpy.ndarray, ...],
+                    data_ranges: numpy.ndarray) -> None:
+        """Calculate the HRI95 and the SSIM of every window with its own data
+        range, in parallel threads.
+
+        :param windows: The windows to be filled.
+        :param window_size: The height and the width of the windows.
+        :param statistics: The SSIM statistics of the whole spectra.
+        :param data_ranges: The data ranges of the windows.
+        """
+        grid_sizes = list(range(min(window_size), MIN_GRID_SIZE - 1, -2))
+
+        def score_window(index: int) -> None:
+            """Score the window at the index, the statistics of the window
+            are a view of the shared ones."""
+            window = windows[index]
+            window_statistics = tuple(
+                statistic[window["y0"]:window["y1"] - WINDOW_SIZE + 1,
+                          window["x0"]:window["x1"] - WINDOW_SIZE + 1]
+                for statistic in statistics)
+            ssim_of_grid = WindowCenteredSSIM(
+                summed_area_table(ssim_from_statistics(window_statistics, data_ranges[index])),
+                (0, 0), window_size)
+
+            # Search the first grid passing the threshold.
+            grid_size = SEARCH_STRATEGIES[self._search](
+                ssim_of_grid, grid_sizes, self._threshold)
+            window["hri95"] = grid_size // 2 if grid_size is not None else 0
+            window["ssim"] = ssim_of_grid.mean()
+
+        # NumPy releases the GIL in the heavy parts of a window.
+        if self._workers == 1:
+            for index in range(len(windows)):
+                score_window(index)
+            return
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            list(executor.map(score_window, range(len(windows))))
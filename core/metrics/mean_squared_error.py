@@ -2,15 +2,29 @@
 MSE implementation as a metric.
 """
 import numpy
-from skimage.metrics import mean_squared_error
 
 from core.image import Image
+from core.lazy import LazyModule
 from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.metrics.spatial_metrics import get_fused_result
+from core.utils import get_float_type
+
+skimage_metrics = LazyModule("skimage.metrics")
 
 
 class MeanSquaredError(InterfaceMetric):
     """The MSE metric."""
 
+    def __init__(self, precision: str = None) -> None:
+        """Constructor of the MeanSquaredError class.
+
+        :param precision: The precision of the calculation, "float64" or
+        "float32". The precision of the analyzer is used if it is not given.
+        """
+        if precision is not None:
+            get_float_type(precision)
+        self._precision = precision
+
     @property
     def keywords_needed(self) -> dict[str, type]:
         """The keywords needed to calculate the metric.
@@ -44,9 +58,16 @@ class MeanSquaredError(InterfaceMetric):
         if y_true.get_shape() != y_pred.get_shape():
             raise ValueError("y_true and y_pred must have the same shape.")
 
+        precision = self._precision or kwargs.get("precision", "float64")
+        fused_result = get_fused_result("mse", y_true, y_pred, precision,
+                                        kwargs.get("fused", ()))
+        if fused_result is not None:
+            return fused_result
+
         # Calculate the MSE.
-        y_true_array: numpy.ndarray = y_true.get_image()
-        y_pred_array: numpy.ndarray = y_pred.get_image()
-        calculated_mse = mean_squared_error(y_true_array, y_pred_array)
+        float_type = get_float_type(precision)
+        y_true_array: numpy.ndarray = y_true.get_image().astype(float_type)
+        y_pred_array: numpy.ndarray = y_pred.get_image().astype(float_type)
+        calculated_mse = skimage_metrics.mean_squared_error(y_true_array, y_pred_array)
 
         return MetricResult(metric_name="mse", metric_value=calculated_mse, metric_unit="px^2")
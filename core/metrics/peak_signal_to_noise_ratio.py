@@ -2,15 +2,29 @@
 PSNR implementation as a metric.
 """
 import numpy
-from skimage.metrics import peak_signal_noise_ratio
 
 from core.image import Image
+from core.lazy import LazyModule
 from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.metrics.spatial_metrics import get_fused_result
+from core.utils import get_data_range, get_float_type
+
+skimage_metrics = LazyModule("skimage.metrics")
 
 
 class PeakSignalToNoiseRatio(InterfaceMetric):
     """The PSNR metric."""
 
+    def __init__(self, precision: str = None) -> None:
+        """Constructor of the PeakSignalToNoiseRatio class.
+
+        :param precision: The precision of the calculation, "float64" or
+        "float32". The precision of the analyzer is used if it is not given.
+        """
+        if precision is not None:
+            get_float_type(precision)
+        self._precision = precision
+
     @property
     def keywords_needed(self) -> dict[str, type]:
         """The keywords needed to calculate the metric.
@@ -44,13 +58,20 @@ class PeakSignalToNoiseRatio(InterfaceMetric):
         if y_true.get_shape() != y_pred.get_shape():
             raise ValueError("y_true and y_pred must have the same shape.")
 
+        precision = self._precision or kwargs.get("precision", "float64")
+        fused_result = get_fused_result("psnr", y_true, y_pred, precision,
+                                        kwargs.get("fused", ()))
+        if fused_result is not None:
+            return fused_result
+
         # Calculate the MSE.
-        y_true_array: numpy.ndarray = y_true.get_image()
-        y_pred_array: numpy.ndarray = y_pred.get_image()
-        calculated_psnr = peak_signal_noise_ratio(
+        float_type = get_float_type(precision)
+        y_true_array: numpy.ndarray = y_true.get_image().astype(float_type)
+        y_pred_array: numpy.ndarray = y_pred.get_image().astype(float_type)
+        calculated_psnr = skimage_metrics.peak_signal_noise_ratio(
             y_true_array,
             y_pred_array,
-            data_range=y_true_array.max() - y_true_array.min(),
+            data_range=get_data_range(y_true.get_image(), key=y_true.get_key()),
         )
 
         return MetricResult(metric_name="PSNR", metric_value=calculated_psnr, metric_unit="dB")
@@ -0,0 +1,163 @@
+"""
+Fused MSE, PSNR and SSIM implementation as a metric.
+"""
+import numpy
+
+from core.cache import get_cache
+from core.centered_ssim import local_ssim_map
+from core.image import Image
+from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.utils import get_data_range, get_float_type
+
+SPATIAL_METRICS = ("mse", "psnr", "ssim")
+"""Holds the names of the metrics calculated by the fused evaluation."""
+_RESULT_NAMES = {"mse": "mse", "psnr": "PSNR", "ssim": "SSIM"}
+"""Holds the names of the results of the spatial metrics."""
+_RESULT_UNITS = {"mse": "px^2", "psnr": "dB", "ssim": ""}
+"""Holds the units of the results of the spatial metrics."""
+
+
+def _calculate_spatial_metrics(y_true: Image, y_pred: Image, precision: str,
+                               metrics: tuple[str, ...]) -> dict[str, float]:
+    """Calculate the MSE, PSNR and SSIM of the pair in a single pass.
+
+    The images are converted once, the squared error is calculated once
+    for the MSE and the PSNR, and the data range is read once. The SSIM
+    statistics are the ones of skimage's structural_similarity with its
+    default arguments, calculated only if the SSIM is requested.
+
+    :param y_true: The true image.
+    :param y_pred: The predicted image.
+    :param precision: The precision of the calculation.
+    :param metrics: The names of the requested metrics, in SPATIAL_METRICS.
+    :return: The values of the requested metrics by their names.
+    """
+    float_type = get_float_type(precision)
+    y_true_array: numpy.ndarray = y_true.get_image().astype(float_type)
+    y_pred_array: numpy.ndarray = y_pred.get_image().astype(float_type)
+    data_range = float(get_data_range(y_true.get_image(), key=y_true.get_key()))
+
+    # The MSE and the PSNR share the squared error.
+    values = {}
+    if "mse" in metrics or "psnr" in metrics:
+        mse = float(numpy.mean((y_true_array - y_pred_array) ** 2, dtype=numpy.float64))
+        with numpy.errstate(divide="ignore"):
+            psnr = float(10 * numpy.log10(data_range ** 2 / numpy.float64(mse)))
+        values.update(mse=mse, psnr=psnr)
+    if "ssim" not in metrics:
+        return {metric: values[metric] for metric in metrics}
+
+    # The SSIM is the mean of the SSIM of the channels.
+    if y_true_array.ndim == 2:
+        y_true_array = y_true_array[:, :, numpy.newaxis]
+        y_pred_array = y_pred_array[:, :, numpy.newaxis]
+    channel_ssim = numpy.empty(y_true_array.shape[2], dtype=float_type)
+    for channel in range(y_true_array.shape[2]):
+        channel_ssim[channel] = local_ssim_map(
+            y_true_array[:, :, channel], y_pred_array[:, :, channel],
+            data_range).mean(dtype=numpy.float64)
+    values["ssim"] = float(channel_ssim.mean())
+    return {metric: values[metric] for metric in metrics}
+
+
+def evaluate_spatial_metrics(y_true: Image, y_pred: Image, precision: str = "float64",
+                             metrics: tuple[str, ...] = SPATIAL_METRICS) -> dict[str, float]:
+    """Return the MSE, PSNR and SSIM of the pair, calculated once.
+
+    The values are cached with the artifacts of the predicted image, so
+    the MSE, PSNR and SSIM metrics of the same pair share one calculation.
+
+    :param y_true: The true image.
+    :param y_pred: The predicted image.
+    :param precision: The precision of the calculation, "float64" or "float32".
+    :param metrics: The names of the requested metrics, in SPATIAL_METRICS.
+    The SSIM, by far the slowest, is calculated only if requested.
+    :return: The values of the requested metrics by their names.
+    """
+    if y_true.get_shape() != y_pred.get_shape():
+        raise ValueError("y_true and y_pred must have the same shape.")
+    if not set(metrics).issubset(SPATIAL_METRICS):
+        raise ValueError(f"Unknown spatial metrics: {', '.join(metrics)}. "
+                         f"Use some of {', '.join(SPATIAL_METRICS)}.")
+    metrics = tuple(metric for metric in SPATIAL_METRICS if metric in metrics)
+    if not get_cache().enabled:
+        return _calculate_spatial_metrics(y_true, y_pred, precision, metrics)
+    return get_cache().get_or_compute(
+        y_pred.get_key(),
+        f"spatial_metrics:{precision}:{','.join(metrics)}:{y_true.get_key()!r}",
+        lambda: _calculate_spatial_metrics(y_true, y_pred, precision, metrics))
+
+
+def get_fused_result(metric: str, y_true: Image, y_pred: Image, precision: str,
+                     fused: tuple[str, ...]) -> MetricResult:
+    """Return the result of a spatial metric from the calculation shared
+    with the other spatial metrics of the pair.
+
+    The calculation is shared through the artifact cache, so a metric is
+    not fused while the cache is disabled.
+
+    :param metric: The name of the metric, one of SPATIAL_METRICS.
+    :param y_true: The true image.
+    :param y_pred: The predicted image.
+    :param precision: The precision of the calculation.
+    :param fused: The names of the spatial metrics calculated together
+    for the pair, e.g. the "fused" keyword of the analyzer. The metric is
+    fused only if it is one of them.
+    :return: The result of the metric, None if it is not fused and should
+    be calculated alone.
+    """
+    if metric not in fused or not get_cache().enabled:
+        return None
+    values = evaluate_spatial_metrics(y_true, y_pred, precision, fused)
+    return MetricResult(metric_name=_RESULT_NAMES[metric], metric_value=values[metric],
+                        metric_unit=_RESULT_UNITS[metric])
+
+
+class FusedSpatialMetrics(InterfaceMetric):
+    """The MSE, PSNR and SSIM metrics calculated in a single pass."""
+
+    def __init__(self, precision: str = None) -> None:
+        """Constructor of the FusedSpatialMetrics class.
+
+        :param precision: The precision of the calculation, "float64" or
+        "float32". The precision of the analyzer is used if it is not given.
+        """
+        if precision is not None:
+            get_float_type(precision)
+        self._precision = precision
+
+    @property
+    def keywords_needed(self) -> dict[str, type]:
+        """The keywords needed to calculate the metric.
+
+        :return: The keywords needed.
+        """
+        return {"y_true": Image, "y_pred": Image}
+
+    def calculate(self, **kwargs) -> list[MetricResult]:
+        """Calculate the MSE, PSNR and SSIM metrics.
+
+        :param kwargs: The keywords needed to calculate the metric.
+        Check the keywords_needed property.
+        :return: The MSE, PSNR and SSIM metrics in MetricResult objects,
+        named as the separate metrics name them.
+        """
+        # Check keywords.
+        if not set(self.keywords_needed).issubset(kwargs):
+            raise ValueError("Missing keywords needed to calculate the metric.")
+
+        # Get the parameters.
+        y_true = kwargs["y_true"]
+        y_pred = kwargs["y_pred"]
+
+        # Check the types of the parameters.
+        if not isinstance(y_true, Image):
+            raise TypeError("y_true must be an Image.")
+        if not isinstance(y_pred, Image):
+            raise TypeError("y_pred must be an Image.")
+
+        values = evaluate_spatial_metrics(
+            y_true, y_pred, self._precision or kwargs.get("precision", "float64"))
+        return [MetricResult(metric_name=_RESULT_NAMES[metric], metric_value=values[metric],
+                             metric_unit=_RESULT_UNITS[metric])
+                for metric in SPATIAL_METRICS]
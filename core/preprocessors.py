@@ -2,9 +2,12 @@
 This module defines a couple of most used preprocessor functions.
 """
 
-import cv2
 from numpy import ndarray
 
+from core.lazy import LazyModule
+
+cv2 = LazyModule("cv2")
+
 
 def shrink_to(image: ndarray, width: int, height: int) -> ndarray:
     """
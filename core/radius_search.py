@@ -0,0 +1,231 @@
+"""
+Holds the search strategies for the grid size of the HRI95.
+
+The linear scan returns the first grid size whose SSIM is above the
+threshold. The bracketing strategies are heuristics assuming that the SSIM
+increases while the grid shrinks. The skipped segments whose evaluated
+ends contradict that assumption are scanned linearly before returning.
+A passing grid inside a skipped segment whose ends agree with it is
+missed, so on a non-monotonic profile they may return a smaller grid
+size than the linear scan.
+"""
+from collections.abc import Callable
+
+MIN_GRID_SIZE = 8
+"""The smallest grid size scanned. Grids are cropped with an even side
+length, so it is the smallest grid holding the SSIM window."""
+
+
+def get_grid_sizes(spectrum_height: int) -> list[int]:
+    """Return the grid sizes of the HRI95 in scanning order.
+
+    :param spectrum_height: The height of the spectrum.
+    :return: The grid sizes from the largest to the smallest.
+    """
+    first_grid_size = spectrum_height // 2
+    return list(range(first_grid_size, MIN_GRID_SIZE - 1, -2)) or [first_grid_size]
+
+
+class _Evaluations:
+    """Evaluates the SSIM of the grids once and remembers the results."""
+
+    def __init__(self, ssim_of_grid: Callable[[int], float],
+                 grid_sizes: list[int], threshold: float) -> None:
+        """Constructor of the _Evaluations class.
+
+        :param ssim_of_grid: The function returning the SSIM of a grid size.
+        :param grid_sizes: The grid sizes in scanning order.
+        :param threshold: The SSIM threshold to pass.
+        """
+        self._ssim_of_grid = ssim_of_grid
+        self._grid_sizes = grid_sizes
+        self._threshold = threshold
+        self.values: dict[int, float] = {}
+
+    def passes(self, index: int) -> bool:
+        """Return if the SSIM of the grid at the index is above the threshold.
+
+        :param index: The index of the grid size.
+        :return: True if the SSIM is above the threshold.
+        """
+        if index not in self.values:
+            self.values[index] = self._ssim_of_grid(self._grid_sizes[index])
+        return self.values[index] > self._threshold
+
+    def is_monotonic(self, start: int, end: int) -> bool:
+        """Return if the evaluated ends of the segment agree with the assumption.
+
+        :param start: The index of the larger grid.
+        :param end: The index of the smaller grid.
+        :return: False if the larger grid has a higher or an undefined SSIM.
+        """
+        return self.values[start] <= self.values[end]
+
+
+def _bisect(evaluations: _Evaluations, failing: int, passing: int,
+            failed_segments: list[tuple[int, int]]) -> int:
+    """Narrow a failing-passing bracket down to adjacent grid sizes.
+
+    :param evaluations: The evaluations of the search.
+    :param failing: The index of a grid failing the threshold.
+    :param passing: The index of a smaller grid passing the threshold.
+    :param failed_segments: The list to append skipped failing segments.
+    :return: The index of the first passing grid of the bracket.
+    """
+    while passing - failing > 1:
+        middle = (failing + passing) // 2
+        if evaluations.passes(middle):
+            passing = middle
+        else:
+            failed_segments.append((failing, middle))
+            failing = middle
+    return passing
+
+
+def _verify(evaluations: _Evaluations, found: int | None,
+            failed_segments: list[tuple[int, int]]) -> int | None:
+    """Scan the skipped segments whose evaluated ends are not monotonic.
+
+    The segments whose ends look monotonic are not scanned, so a passing
+    grid between them is missed.
+
+    :param evaluations: The evaluations of the search.
+    :param found: The index found by the bracketing, None if not found.
+    :param failed_segments: The skipped segments with failing ends.
+    :return: The index of the first passing grid.
+    """
+    for start, end in sorted(failed_segments):
+        if evaluations.is_monotonic(start, end):
+            continue
+        for index in range(start + 1, end):
+            if evaluations.passes(index):
+                return index
+    return found
+
+
+def linear_search(ssim_of_grid: Callable[[int], float],
+                  grid_sizes: list[int], threshold: float) -> int | None:
+    """Scan the grid sizes one by one.
+
+    :param ssim_of_grid: The function returning the SSIM of a grid size.
+    :param grid_sizes: The grid sizes in scanning order.
+    :param threshold: The SSIM threshold to pass.
+    :return: The first grid size passing the threshold, None if not found.
+    """
+    for grid_size in grid_sizes:
+        if ssim_of_grid(grid_size) > threshold:
+            return grid_size
+    return None
+
+
+def bisect_search(ssim_of_grid: Callable[[int], float],
+                  grid_sizes: list[int], threshold: float) -> int | None:
+    """Bisect between the largest and the smallest grid sizes.
+
+    :param ssim_of_grid: The function returning the SSIM of a grid size.
+    :param grid_sizes: The grid sizes in scanning order.
+    :param threshold: The SSIM threshold to pass.
+    :return: The first grid size passing the threshold, None if not found.
+    """
+    evaluations = _Evaluations(ssim_of_grid, grid_sizes, threshold)
+    if evaluations.passes(0):
+        return grid_sizes[0]
+
+    last = len(grid_sizes) - 1
+    failed_segments: list[tuple[int, int]] = []
+    if evaluations.passes(last):
+        found = _bisect(evaluations, 0, last, failed_segments)
+    else:
+        failed_segments.append((0, last))
+        found = None
+
+    found = _verify(evaluations, found, failed_segments)
+    return None if found is None else grid_sizes[found]
+
+
+def _gallop(evaluations: _Evaluations, failing: int, last: int,
+            failed_segments: list[tuple[int, int]]) -> int | None:
+    """Gallop toward the smaller grids with doubling steps, then bisect.
+
+    :param evaluations: The evaluations of the search.
+    :param failing: The index of a grid failing the threshold.
+    :param last: The index of the smallest grid.
+    :param failed_segments: The list to append skipped failing segments.
+    :return: The index of the first passing grid after the failing one,
+    None if not found.
+    """
+    step = 1
+    while failing < last:
+        index = min(failing + step, last)
+        if evaluations.passes(index):
+            return _bisect(evaluations, failing, index, failed_segments)
+        failed_segments.append((failing, index))
+        failing, step = index, step * 2
+    return None
+
+
+def galloping_search(ssim_of_grid: Callable[[int], float],
+                     grid_sizes: list[int], threshold: float) -> int | None:
+    """Gallop from the largest grid size with doubling steps, then bisect.
+
+    :param ssim_of_grid: The function returning the SSIM of a grid size.
+    :param grid_sizes: The grid sizes in scanning order.
+    :param threshold: The SSIM threshold to pass.
+    :return: The first grid size passing the threshold, None if not found.
+    """
+    evaluations = _Evaluations(ssim_of_grid, grid_sizes, threshold)
+    if evaluations.passes(0):
+        return grid_sizes[0]
+
+    failed_segments: list[tuple[int, int]] = []
+    found = _gallop(evaluations, 0, len(grid_sizes) - 1, failed_segments)
+    found = _verify(evaluations, found, failed_segments)
+    return None if found is None else grid_sizes[found]
+
+
+def seeded_search(ssim_of_grid: Callable[[int], float], grid_sizes: list[int],
+                  threshold: float, seed_grid_size: int) -> int | None:
+    """Gallop outward from a guessed grid size, then bisect.
+
+    The guess is usually the grid size found for a similar spectrum, e.g.
+    the previous frame of a video, so the search evaluates a handful of
+    grids around it instead of scanning from the largest one.
+
+    :param ssim_of_grid: The function returning the SSIM of a grid size.
+    :param grid_sizes: The grid sizes in scanning order.
+    :param threshold: The SSIM threshold to pass.
+    :param seed_grid_size: The guessed grid size. The nearest grid size of
+    the scan is used if it is not one of them.
+    :return: The first grid size passing the threshold, None if not found.
+    """
+    evaluations = _Evaluations(ssim_of_grid, grid_sizes, threshold)
+    if evaluations.passes(0):
+        return grid_sizes[0]
+
+    last = len(grid_sizes) - 1
+    seed = min(range(len(grid_sizes)), key=lambda index: abs(grid_sizes[index] - seed_grid_size))
+    failed_segments: list[tuple[int, int]] = []
+    if seed > 0 and evaluations.passes(seed):
+        # Gallop toward the larger grids until one fails, the largest fails.
+        passing, step = seed, 1
+        while evaluations.passes(failing := max(passing - step, 0)):
+            passing, step = failing, step * 2
+        if failing > 0:
+            failed_segments.append((0, failing))
+        found = _bisect(evaluations, failing, passing, failed_segments)
+    else:
+        # The grids between the largest one and the seed are skipped.
+        if seed > 0:
+            failed_segments.append((0, seed))
+        found = _gallop(evaluations, seed, last, failed_segments)
+
+    found = _verify(evaluations, found, failed_segments)
+    return None if found is None else grid_sizes[found]
+
+
+SEARCH_STRATEGIES: dict[str, Callable[[Callable[[int], float], list[int], float], int | None]] = {
+    "linear": linear_search,
+    "bisect": bisect_search,
+    "galloping": galloping_search,
+}
+"""Holds the search strategies by their names."""
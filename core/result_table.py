@@ -0,0 +1,285 @@
+"""
+Holds the columnar table of the metric results.
+"""
+import csv
+import numbers
+from collections.abc import Iterable, Iterator
+from typing import Any, TextIO
+
+import numpy
+from numpy import ndarray
+
+from core.metrics.interface_metric import MetricResult
+
+CATEGORICAL_COLUMNS = ("metric", "unit", "reference", "image")
+"""Holds the columns stored as integer codes of their distinct names."""
+AGGREGATIONS = ("mean", "sum", "count", "min", "max")
+"""Holds the supported aggregations of the group-by."""
+
+
+class ResultTable:
+    """The metric results as NumPy columns.
+
+    The names of the metrics, the units and the images are stored as
+    integer codes of their distinct values, so a row costs a few bytes
+    instead of a MetricResult object. The table is still iterable and
+    indexable as a list of MetricResult objects.
+    """
+
+    def __init__(self, codes: dict[str, ndarray], categories: dict[str, list[str]],
+                 values: ndarray, integers: ndarray = None,
+                 details: list[dict[str, Any]] = None) -> None:
+        """Constructor of the ResultTable class.
+
+        :param codes: The codes of the categorical columns by their names.
+        :param categories: The distinct values of the categorical columns,
+        indexed by the codes.
+        :param values: The values of the metrics, float64 if all of them
+        are scalars, otherwise object.
+        :param integers: If the values were integers, all False if not given.
+        :param details: The details of the rows, None for the rows without
+        details, or None if the details are not kept.
+        """
+        missing_columns = set(CATEGORICAL_COLUMNS) - codes.keys()
+        if missing_columns:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing_columns))}.")
+        if any(len(codes[column]) != len(values) for column in CATEGORICAL_COLUMNS):
+            raise ValueError("The columns must have the same length.")
+
+        self._codes = {column: codes[column] for column in CATEGORICAL_COLUMNS}
+        self._categories = {column: list(categories[column]) for column in CATEGORICAL_COLUMNS}
+        self._values = values
+        self._integers = integers if integers is not None else numpy.zeros(len(values), bool)
+        self._details = details
+
+    @classmethod
+    def from_results(cls, results: Iterable[MetricResult],
+                     keep_details: bool = True) -> "ResultTable":
+        """Create the table of the results.
+
+        :param results: The metric results.
+        :param keep_details: If the details of the results are kept.
+        :return: The table of the results.
+        """
+        lookups: dict[str, dict[str, int]] = {column: {} for column in CATEGORICAL_COLUMNS}
+        codes: dict[str, list[int]] = {column: [] for column in CATEGORICAL_COLUMNS}
+        values, integers, details = [], [], []
+        for metric_result in results:
+            row = (metric_result.name, metric_result.unit,
+                   metric_result.reference_image_name, metric_result.image_name)
+            for column, name in zip(CATEGORICAL_COLUMNS, row):
+                codes[column].append(lookups[column].setdefault(name, len(lookups[column])))
+            values.append(metric_result.value)
+            integers.append(isinstance(metric_result.value, numbers.Integral))
+            if keep_details:
+                details.append(metric_result.details or None)
+
+        if all(isinstance(value, numbers.Real) for value in values):
+            value_column = numpy.array(values, dtype=numpy.float64)
+        else:
+            value_column = numpy.empty(len(values), dtype=object)
+            value_column[:] = values
+        return cls({column: numpy.array(codes[column], dtype=numpy.int32)
+                    for column in CATEGORICAL_COLUMNS},
+                   {column: list(lookups[column]) for column in CATEGORICAL_COLUMNS},
+                   value_column, numpy.array(integers, dtype=bool),
+                   details if keep_details else None)
+
+    @property
+    def values(self) -> ndarray:
+        """The values of the metrics.
+
+        :return: The values, float64 if all of them are scalars.
+        """
+        return self._values
+
+    def codes(self, column: str) -> ndarray:
+        """Return the codes of a categorical column.
+
+        :param column: The name of the column, one of CATEGORICAL_COLUMNS.
+        :return: The codes of the rows.
+        """
+        self._check_column(column)
+        return self._codes[column]
+
+    def categories(self, column: str) -> list[str]:
+        """Return the distinct values of a categorical column.
+
+        :param column: The name of the column, one of CATEGORICAL_COLUMNS.
+        :return: The distinct values indexed by their codes.
+        """
+        self._check_column(column)
+        return list(self._categories[column])
+
+    def column(self, column: str) -> ndarray:
+        """Return the decoded values of a categorical column.
+
+        :param column: The name of the column, one of CATEGORICAL_COLUMNS.
+        :return: The names of the rows.
+        """
+        self._check_column(column)
+        names = numpy.empty(len(self._categories[column]), dtype=object)
+        names[:] = self._categories[column]
+        return names[self._codes[column]]
+
+    def where(self, **conditions: str or Iterable[str]) -> "ResultTable":
+        """Return the rows matching all the conditions.
+
+        :param conditions: The accepted name, or names, of the categorical
+        columns, e.g. metric="HRI95" or image=["a.png", "b.png"].
+        :return: The matching rows.
+        """
+        mask = numpy.ones(len(self), dtype=bool)
+        for column, accepted in conditions.items():
+            self._check_column(column)
+            accepted = [accepted] if isinstance(accepted, str) else list(accepted)
+            accepted_codes = [code for code, name in enumerate(self._categories[column])
+                              if name in accepted]
+            mask &= numpy.isin(self._codes[column], accepted_codes)
+        return self[mask]
+
+    def group_by(self, columns: str or tuple[str, ...],
+                 aggregation: str = "mean") -> dict[Any, float]:
+        """Aggregate the values by the names of the categorical columns.
+
+        :param columns: The name of a categorical column, or a tuple of them.
+        :param aggregation: The aggregation, one of AGGREGATIONS.
+        :return: The aggregated values by the names of the groups, tuples of
+        names if several columns are given.
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}.")
+        if self._values.dtype == object:
+            raise TypeError("Only the tables of scalar values can be aggregated.")
+        single = isinstance(columns, str)
+        columns = (columns,) if single else tuple(columns)
+        for column in columns:
+            self._check_column(column)
+        if len(self) == 0:
+            return {}
+
+        # Number the groups present in the table.
+        group_codes = numpy.ravel_multi_index(
+            [self._codes[column] for column in columns],
+            [len(self._categories[column]) for column in columns])
+        groups, group_indices = numpy.unique(group_codes, return_inverse=True)
+
+        counts = numpy.bincount(group_indices, minlength=len(groups)).astype(numpy.float64)
+        if aggregation == "count":
+            aggregated = counts
+        elif aggregation in {"sum", "mean"}:
+            aggregated = numpy.bincount(group_indices, weights=self._values,
+                                        minlength=len(groups))
+            if aggregation == "mean":
+                aggregated /= counts
+        else:
+            function = numpy.minimum if aggregation == "min" else numpy.maximum
+            aggregated = numpy.full(len(groups), numpy.inf if aggregation == "min" else -numpy.inf)
+            function.at(aggregated, group_indices, self._values)
+
+        result: dict[Any, float] = {}
+        for group, value in zip(groups, aggregated.tolist()):
+            group_row = numpy.unravel_index(
+                group, [len(self._categories[column]) for column in columns])
+            names = tuple(self._categories[column][int(code)]
+                          for column, code in zip(columns, group_row))
+            result[names[0] if single else names] = value
+        return result
+
+    def to_columns(self) -> dict[str, ndarray]:
+        """Return the decoded columns of the table.
+
+        :return: The columns by their names, the categorical ones as names.
+        """
+        columns = {column: self.column(column) for column in CATEGORICAL_COLUMNS}
+        columns["value"] = self._values
+        return columns
+
+    def to_csv(self, stream: TextIO) -> None:
+        """Write the rows to the stream as CSV, without the details.
+
+        :param stream: The stream to write.
+        """
+        writer = csv.writer(stream)
+        writer.writerow([*CATEGORICAL_COLUMNS, "value"])
+        columns = self.to_columns()
+        writer.writerows(zip(*(columns[column].tolist()
+                               for column in (*CATEGORICAL_COLUMNS, "value"))))
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Return the dictionary representations of the rows.
+
+        :return: The rows as MetricResult.to_dict returns them.
+        """
+        return [metric_result.to_dict() for metric_result in self]
+
+    def _check_column(self, column: str) -> None:
+        """Check if the column is categorical.
+
+        :param column: The name of the column.
+        """
+        if column not in self._codes:
+            raise KeyError(f"Unknown column: {column}. "
+                           f"Use one of {', '.join(CATEGORICAL_COLUMNS)}.")
+
+    def _row(self, index: int) -> MetricResult:
+        """Return the row as a MetricResult object.
+
+        :param index: The index of the row.
+        :return: The metric result of the row.
+        """
+        value = self._values[index]
+        if self._integers[index]:
+            value = int(value)
+        elif isinstance(value, numpy.floating):
+            value = float(value)
+        metric_result = MetricResult(
+            metric_name=self._categories["metric"][self._codes["metric"][index]],
+            metric_value=value,
+            metric_unit=self._categories["unit"][self._codes["unit"][index]],
+            details=self._details[index] if self._details is not None else None)
+        metric_result.register_image_names(
+            reference_image_name=self._categories["reference"][self._codes["reference"][index]],
+            image_name=self._categories["image"][self._codes["image"][index]])
+        return metric_result
+
+    def __len__(self) -> int:
+        """Return the number of the rows.
+
+        :return: The number of the rows.
+        """
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[MetricResult]:
+        """Iterate the rows as MetricResult objects.
+
+        :return: The metric results.
+        """
+        for index in range(len(self)):
+            yield self._row(index)
+
+    def __getitem__(self, index: int or slice or ndarray) -> MetricResult or "ResultTable":
+        """Return a row, or the table of the selected rows.
+
+        :param index: The index of a row, or a slice, a boolean mask or an
+        array of indices selecting rows.
+        :return: The metric result of the row, or the selected rows.
+        """
+        if isinstance(index, numbers.Integral):
+            if not -len(self) <= index < len(self):
+                raise IndexError("The row index is out of range.")
+            return self._row(int(index) % len(self))
+
+        selection = numpy.arange(len(self))[index]
+        return ResultTable(
+            {column: codes[selection] for column, codes in self._codes.items()},
+            self._categories, self._values[selection], self._integers[selection],
+            [self._details[row] for row in selection] if self._details is not None else None)
+
+    def __repr__(self) -> str:
+        """Return the summary of the table.
+
+        :return: The number of the rows, metrics and images.
+        """
+        return (f"ResultTable({len(self)} rows, {len(self._categories['metric'])} metrics, "
+                f"{len(self._categories['image'])} images)")
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 
 
 @dataclass
-class SRAnalyzerSettings:
+class SRAnalyzerSettings:  # pylint: disable=too-many-instance-attributes
     """
     Holds Analyzer settings.
     """
@@ -20,3 +20,48 @@ class SRAnalyzerSettings:
     """Holds if the Analyzer should save the process.
     Not implemented yet.
     """
+    precision: str = "float64"
+    """Holds the floating point precision of the metrics, "float64" or
+    "float32". The metrics given their own precision ignore it.
+    """
+    executor: str = "serial"
+    """Holds how the (metric, image) pairs are calculated, "serial",
+    "thread" for a thread pool or "process" for a process pool.
+    """
+    workers: int = None
+    """Holds the number of workers of the pool. The number of CPUs is
+    used if it is None.
+    """
+    trace: bool = False
+    """Holds if the stages of the analysis are traced. The timings of the
+    stages are then added to the details of every result.
+    """
+    trace_path: str = None
+    """Holds the path the trace is written to after the calculation, as
+    Chrome trace JSON, or as CSV if it ends with ".csv".
+    """
+    prefetch: int = 2
+    """Holds the number of images decoded ahead of the scoring by the
+    asynchronous API. It bounds the number of decoded images held at once.
+    """
+    resume: bool = False
+    """Holds if the results already in the sinks of the analyzer are read
+    back instead of being calculated again. A result is identified by the
+    reference, the image, the metric and the parameters of the metric.
+    """
+    low_memory: bool = False
+    """Holds if the spectra are calculated block by block in float32, with
+    the complex spectrum transformed in place and released as soon as the
+    magnitudes exist, see core.low_memory.get_peak_bytes. The metrics are
+    calculated in float32 precision then.
+    """
+    fft_backend: str = None
+    """Holds the FFT backend of the spectra, "numpy", "scipy" or "pyfftw",
+    see core.fft_backend. It applies to this analyzer and its workers only.
+    The backend of the process is used if both fft_backend and fft_workers
+    are None.
+    """
+    fft_workers: int = None
+    """Holds the number of the threads of an FFT, all the CPUs if -1, one
+    if None.
+    """
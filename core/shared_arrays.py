@@ -0,0 +1,118 @@
+"""
+Holds the transport of the arrays to the worker processes through shared
+memory blocks.
+"""
+import threading
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+
+import numpy
+from numpy import ndarray
+
+_ATTACHED: dict[str, SharedMemory] = {}
+"""Holds the blocks attached by the process, kept open while it lives."""
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """A handle of an array in a shared memory block.
+
+    The handle is pickled instead of the array, and the worker processes
+    attach to the block without copying it.
+    """
+
+    name: str
+    """Holds the name of the shared memory block."""
+    shape: tuple[int, ...]
+    """Holds the shape of the array."""
+    dtype: str
+    """Holds the data type of the array."""
+
+    def attach(self) -> ndarray:
+        """Return the array backed by the shared memory block.
+
+        The block is attached once per process and stays attached until
+        the process exits.
+
+        :return: The read-only array.
+        """
+        block = _ATTACHED.get(self.name)
+        if block is None:
+            block = SharedMemory(name=self.name)
+            _ATTACHED[self.name] = block
+        array = ndarray(self.shape, dtype=numpy.dtype(self.dtype), buffer=block.buf)
+        array.setflags(write=False)
+        return array
+
+
+class SharedArrayStore:
+    """Owns the shared memory blocks of the arrays sent to the workers.
+
+    The owner keeps its own arrays, the blocks hold copies of them. The
+    blocks are removed when the store is closed, so the store must
+    outlive the workers using them, e.g. by closing it after the pool.
+    """
+
+    def __init__(self) -> None:
+        """Constructor of the SharedArrayStore class."""
+        self._blocks: list[SharedMemory] = []
+        self._handles: dict[int, tuple[ndarray, SharedArray]] = {}
+        self._lock = threading.Lock()
+
+    def share(self, array: ndarray) -> SharedArray:
+        """Copy the array into a new shared memory block.
+
+        The same array object is copied once however many times it is
+        shared.
+
+        :param array: The array to be shared.
+        :return: The handle of the shared array.
+        """
+        with self._lock:
+            if id(array) in self._handles:
+                return self._handles[id(array)][1]
+
+            # Empty blocks are not allowed.
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+            ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            handle = SharedArray(block.name, array.shape, array.dtype.str)
+
+            # Keep the array alive so its id is not reused by another one.
+            self._handles[id(array)] = (array, handle)
+            return handle
+
+    @property
+    def size_bytes(self) -> int:
+        """The total size of the shared memory blocks.
+
+        :return: The size in bytes.
+        """
+        return sum(block.size for block in self._blocks)
+
+    def close(self) -> None:
+        """Remove the shared memory blocks of the store."""
+        with self._lock:
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks.clear()
+            self._handles.clear()
+
+    def __enter__(self) -> "SharedArrayStore":
+        """Return the store to be closed at the end of the block.
+
+        :return: The store.
+        """
+        return self
+
+    def __exit__(self, exception_type: type[BaseException], exception: BaseException,
+                 traceback: TracebackType) -> None:
+        """Close the store.
+
+        :param exception_type: The type of the raised exception, if any.
+        :param exception: The raised exception, if any.
+        :param traceback: The traceback of the raised exception, if any.
+        """
+        self.close()
@@ -0,0 +1,409 @@
+"""
+Holds the sinks writing the metric results as they are calculated, with
+checkpoints to resume the interrupted runs.
+"""
+import csv
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABCMeta, abstractmethod
+from types import TracebackType
+from typing import Any
+
+import numpy
+
+from core.metrics.interface_metric import InterfaceMetric, MetricResult
+
+RECORD_FIELDS = ("reference", "image", "metric", "config", "name", "value", "unit", "parts")
+"""Holds the fields of a record, the details are written by JSONL only."""
+
+
+def metric_config(metric: InterfaceMetric, precision: str) -> str:
+    """Return the fingerprint of the parameters of the metric.
+
+    :param metric: The metric.
+    :param precision: The precision of the analyzer.
+    :return: The hash of the class, the attributes and the precision.
+    """
+    attributes = sorted((name, repr(value)) for name, value in vars(metric).items())
+    description = f"{type(metric).__module__}.{type(metric).__qualname__}:{attributes}:{precision}"
+    return hashlib.blake2b(description.encode(), digest_size=8).hexdigest()
+
+
+def result_record(metric: InterfaceMetric, precision: str,
+                  metric_result: MetricResult, parts: int = 1) -> dict[str, Any]:
+    """Return the record of a result with its identifying fields.
+
+    :param metric: The metric calculating the result.
+    :param precision: The precision of the analyzer.
+    :param metric_result: The result, with its image names registered.
+    :param parts: The number of the results the metric returned for the
+    images, e.g. one per threshold, written one after the other.
+    :return: The record.
+    """
+    return {
+        "reference": metric_result.reference_image_name,
+        "image": metric_result.image_name,
+        "metric": type(metric).__name__,
+        "config": metric_config(metric, precision),
+        "name": metric_result.name,
+        "value": metric_result.value,
+        "unit": metric_result.unit,
+        "parts": parts,
+        "details": metric_result.details,
+    }
+
+
+def record_key(record: dict[str, Any]) -> tuple[str, str, str, str]:
+    """Return the identity of a record to be skipped on resume.
+
+    :param record: The record.
+    :return: The reference, image, metric and config of the record.
+    """
+    return (record["reference"], record["image"], record["metric"], record["config"])
+
+
+def group_records(
+        records: list[dict[str, Any]]) -> dict[tuple[str, str, str, str], list[dict[str, Any]]]:
+    """Group the records of the same metric and images.
+
+    The groups cut by a crash are dropped. If a group was written again
+    after such a crash, the last complete group is kept.
+
+    :param records: The records in the order they were written.
+    :return: The complete groups of records by their identities.
+    """
+    groups: dict[tuple[str, str, str, str], list[dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault(record_key(record), []).append(record)
+    complete_groups = {}
+    for key, group in groups.items():
+        # The records written before the parts field are single results.
+        parts = int(group[-1].get("parts") or 1)
+        if len(group) >= parts:
+            complete_groups[key] = group[-parts:]
+    return complete_groups
+
+
+def record_result(record: dict[str, Any]) -> MetricResult:
+    """Return the metric result of a record read back from a sink.
+
+    :param record: The record.
+    :return: The metric result, with the details if the sink keeps them.
+    """
+    metric_result = MetricResult(record["name"], record["value"], record["unit"],
+                                 record.get("details"))
+    metric_result.register_image_names(record["reference"], record["image"])
+    return metric_result
+
+
+def _to_json(value: Any) -> Any:
+    """Convert the NumPy values to JSON types.
+
+    :param value: The value not serializable by default.
+    :return: The JSON compatible value.
+    """
+    if isinstance(value, numpy.ndarray):
+        return value.tolist()
+    if isinstance(value, numpy.generic):
+        return value.item()
+    return str(value)
+
+
+def _truncate_partial_line(path: str) -> None:
+    """Remove the last line of the file if it was cut by a crash.
+
+    :param path: The path of the text file.
+    """
+    with open(path, "rb+") as text_file:
+        content = text_file.read()
+        if content and not content.endswith(b"\n"):
+            text_file.truncate(content.rfind(b"\n") + 1)
+
+
+class ResultSink(metaclass=ABCMeta):
+    """The interface of the sinks of the metric results.
+
+    The records are written as they come. Every checkpoint_every records,
+    or checkpoint_seconds after the last checkpoint, the written records
+    are flushed and synced to the disk, so a crash loses at most the
+    records since the last checkpoint.
+    """
+
+    def __init__(self, checkpoint_every: int = 100, checkpoint_seconds: float = 30.0) -> None:
+        """Constructor of the ResultSink class.
+
+        :param checkpoint_every: The number of records between checkpoints.
+        :param checkpoint_seconds: The maximum seconds between checkpoints.
+        """
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be positive.")
+        self._checkpoint_every = checkpoint_every
+        self._checkpoint_seconds = checkpoint_seconds
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Write a record, and checkpoint if it is due.
+
+        :param record: The record of a result, see result_record.
+        """
+        self._write_record(record)
+        self._pending += 1
+        if self._pending >= self._checkpoint_every or \
+                time.monotonic() - self._last_checkpoint >= self._checkpoint_seconds:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Make the written records durable."""
+        if self._pending > 0:
+            self._sync()
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def completed_keys(self) -> set[tuple[str, str, str, str]]:
+        """Return the identities of the records already written.
+
+        :return: The reference, image, metric and config of the complete
+        groups of records.
+        """
+        return set(group_records(self.read_records()))
+
+    @abstractmethod
+    def read_records(self) -> list[dict[str, Any]]:
+        """
+        Read the records checkpointed by this or an earlier run.
+
+        :return: The records in the order they were written.
+        """
+
+    @abstractmethod
+    def _write_record(self, record: dict[str, Any]) -> None:
+        """
+        Write a record without syncing it.
+
+        :param record: The record of a result.
+        """
+
+    @abstractmethod
+    def _sync(self) -> None:
+        """
+        Flush and sync the written records to the disk.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Checkpoint the written records and close the sink.
+        """
+
+    def __enter__(self) -> "ResultSink":
+        """Return the sink to be closed at the end of the block.
+
+        :return: The sink.
+        """
+        return self
+
+    def __exit__(self, exception_type: type[BaseException], exception: BaseException,
+                 traceback: TracebackType) -> None:
+        """Close the sink.
+
+        :param exception_type: The type of the raised exception, if any.
+        :param exception: The raised exception, if any.
+        :param traceback: The traceback of the raised exception, if any.
+        """
+        self.close()
+
+
+class JsonlSink(ResultSink):
+    """Writes a JSON object per record, with the details."""
+
+    def __init__(self, path: str, resume: bool = False, checkpoint_every: int = 100,
+                 checkpoint_seconds: float = 30.0) -> None:
+        """Constructor of the JsonlSink class.
+
+        :param path: The path of the JSONL file.
+        :param resume: If the records of the existing file are kept and
+        appended to, otherwise the file is overwritten.
+        :param checkpoint_every: The number of records between checkpoints.
+        :param checkpoint_seconds: The maximum seconds between checkpoints.
+        """
+        super().__init__(checkpoint_every, checkpoint_seconds)
+        self._path = path
+        if resume and os.path.isfile(path):
+            _truncate_partial_line(path)
+        # pylint: disable-next=consider-using-with
+        self._stream = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def read_records(self) -> list[dict[str, Any]]:
+        """Read the records checkpointed by this or an earlier run.
+
+        :return: The records in the order they were written.
+        """
+        if not os.path.isfile(self._path):
+            return []
+        with open(self._path, "r", encoding="utf-8") as jsonl_file:
+            return [json.loads(line) for line in jsonl_file if line.endswith("\n")]
+
+    def _write_record(self, record: dict[str, Any]) -> None:
+        """Write a record without syncing it.
+
+        :param record: The record of a result.
+        """
+        self._stream.write(json.dumps(record, default=_to_json) + "\n")
+
+    def _sync(self) -> None:
+        """Flush and sync the written records to the disk."""
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+
+    def close(self) -> None:
+        """Checkpoint the written records and close the sink."""
+        if not self._stream.closed:
+            self.checkpoint()
+            self._stream.close()
+
+
+class CsvSink(ResultSink):
+    """Writes a CSV row per record, without the details. Only scalar
+    values are supported, so they can be read back as floats.
+    """
+
+    def __init__(self, path: str, resume: bool = False, checkpoint_every: int = 100,
+                 checkpoint_seconds: float = 30.0) -> None:
+        """Constructor of the CsvSink class.
+
+        :param path: The path of the CSV file.
+        :param resume: If the records of the existing file are kept and
+        appended to, otherwise the file is overwritten.
+        :param checkpoint_every: The number of records between checkpoints.
+        :param checkpoint_seconds: The maximum seconds between checkpoints.
+        """
+        super().__init__(checkpoint_every, checkpoint_seconds)
+        self._path = path
+        is_appended = resume and os.path.isfile(path) and os.path.getsize(path) > 0
+        if is_appended:
+            _truncate_partial_line(path)
+        # pylint: disable-next=consider-using-with
+        self._stream = open(path, "a" if is_appended else "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._stream, fieldnames=RECORD_FIELDS,
+                                      extrasaction="ignore")
+        if not is_appended:
+            self._writer.writeheader()
+
+    def read_records(self) -> list[dict[str, Any]]:
+        """Read the records checkpointed by this or an earlier run.
+
+        The values are read back as floats.
+
+        :return: The records in the order they were written.
+        """
+        if not os.path.isfile(self._path):
+            return []
+        with open(self._path, "r", encoding="utf-8", newline="") as csv_file:
+            records = list(csv.DictReader(csv_file))
+        for record in records:
+            record["value"] = float(record["value"])
+        return records
+
+    def _write_record(self, record: dict[str, Any]) -> None:
+        """Write a record without syncing it.
+
+        :param record: The record of a result.
+        """
+        if not isinstance(record["value"], (int, float, numpy.number)):
+            raise TypeError("The CSV rows support scalar values only, use JsonlSink.")
+        self._writer.writerow(record)
+
+    def _sync(self) -> None:
+        """Flush and sync the written records to the disk."""
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+
+    def close(self) -> None:
+        """Checkpoint the written records and close the sink."""
+        if not self._stream.closed:
+            self.checkpoint()
+            self._stream.close()
+
+
+class NpzChunkSink(ResultSink):
+    """Writes the records as columns into a new .npz file per checkpoint.
+
+    The chunks are written atomically, so a crash never leaves a partial
+    chunk. Only scalar values are supported, without the details.
+    """
+
+    def __init__(self, directory: str, resume: bool = False, checkpoint_every: int = 1000,
+                 checkpoint_seconds: float = 30.0) -> None:
+        """Constructor of the NpzChunkSink class.
+
+        :param directory: The directory of the chunks, created if needed.
+        :param resume: If the existing chunks are kept, otherwise they are
+        removed.
+        :param checkpoint_every: The number of records per chunk.
+        :param checkpoint_seconds: The maximum seconds between chunks.
+        """
+        super().__init__(checkpoint_every, checkpoint_seconds)
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+        if not resume:
+            for chunk_path in self._get_chunk_paths():
+                os.remove(chunk_path)
+        self._buffer: list[dict[str, Any]] = []
+        self._next_chunk = len(self._get_chunk_paths())
+
+    def _get_chunk_paths(self) -> list[str]:
+        """Return the paths of the written chunks.
+
+        :return: The paths in the order they were written.
+        """
+        return sorted(glob.glob(os.path.join(self._directory, "chunk_*.npz")))
+
+    def read_records(self) -> list[dict[str, Any]]:
+        """Read the records checkpointed by this or an earlier run.
+
+        :return: The records in the order they were written.
+        """
+        records = []
+        for chunk_path in self._get_chunk_paths():
+            with numpy.load(chunk_path) as chunk:
+                columns = {field: chunk[field].tolist() for field in RECORD_FIELDS
+                           if field in chunk.files}
+            records.extend(dict(zip(columns, row)) for row in zip(*columns.values()))
+        return records
+
+    def _write_record(self, record: dict[str, Any]) -> None:
+        """Buffer a record until the next checkpoint.
+
+        :param record: The record of a result.
+        """
+        if not isinstance(record["value"], (int, float, numpy.number)):
+            raise TypeError("The NPZ chunks support scalar values only, use JsonlSink.")
+        self._buffer.append(record)
+
+    def _sync(self) -> None:
+        """Write the buffered records as a new chunk and sync it."""
+        columns = {field: numpy.array([record[field] for record in self._buffer],
+                                      dtype=numpy.float64 if field == "value" else str)
+                   for field in RECORD_FIELDS}
+        chunk_path = os.path.join(self._directory, f"chunk_{self._next_chunk:06d}.npz")
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                numpy.savez(temporary_file, **columns)
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+            os.replace(temporary_path, chunk_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        self._buffer.clear()
+        self._next_chunk += 1
+
+    def close(self) -> None:
+        """Write the buffered records as the last chunk."""
+        self.checkpoint()
@@ -1,12 +1,145 @@
 """
 The main super resolution analyzer class.
 """
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from numpy import ndarray
+
+from core.cache import get_cache
+from core.fft_backend import FFTBackend, create_fft_backend
+from core.metrics.harmonics_radius import HarmonicsRadius
 from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.metrics.mean_squared_error import MeanSquaredError
+from core.metrics.peak_signal_to_noise_ratio import PeakSignalToNoiseRatio
+from core.metrics.structural_similarity_index import StructuralSimilarityIndex
+from core.result_table import ResultTable
 from core.image import Image
 from core.settings import SRAnalyzerSettings
+from core.shared_arrays import SharedArray, SharedArrayStore
+from core.sinks import ResultSink, group_records, metric_config, record_result, result_record
+from core.tracing import (
+    Span,
+    Tracer,
+    collect_spans,
+    get_tracer,
+    span,
+    start_tracing,
+    stop_tracing,
+    summarize_spans,
+)
+from core.utils import get_half_fft_of_image
+
+EXECUTORS = ("serial", "thread", "process")
+"""Holds the supported executors of the analyzer."""
+
+FUSED_METRICS: dict[type[InterfaceMetric], str] = {
+    MeanSquaredError: "mse",
+    PeakSignalToNoiseRatio: "psnr",
+    StructuralSimilarityIndex: "ssim",
+}
+"""Holds the metrics sharing one calculation of a pair if registered together,
+with their names in core.metrics.spatial_metrics.SPATIAL_METRICS. The
+calculation is shared through the artifact cache, so they are calculated
+separately while the cache is disabled."""
+
+_WORKER_STATE: dict[str, object] = {}
+"""Holds the reference data of the worker processes."""
+
+
+def _as_list(metric_results: MetricResult | list[MetricResult]) -> list[MetricResult]:
+    """Return the results of a metric as a list.
+
+    :param metric_results: A result, or the list of the results of a
+    metric returning several, e.g. one per threshold.
+    :return: The results.
+    """
+    return metric_results if isinstance(metric_results, list) else [metric_results]
+
+
+def _calculate_pair(metric: InterfaceMetric, reference: Image, image: Image,
+                    options: dict[str, Any]) -> tuple[list[MetricResult], list[Span]]:
+    """Calculate the metric of an image against the reference.
+
+    If tracing is enabled, the timings of the stages are added to the
+    details of the results.
+
+    :param metric: The metric to be calculated.
+    :param reference: The reference image.
+    :param image: The image to be compared.
+    :param options: The keyword arguments of the metric besides the
+    images, see SRAnalyzer._get_options.
+    :return: The calculated results of the metric, and the spans recorded
+    meanwhile.
+    """
+    keyword_args = {"y_true": reference, "y_pred": image, **options}
+    if get_tracer() is None:
+        return _as_list(metric.calculate(**keyword_args)), []
+
+    with collect_spans() as spans:
+        with span("metric", "metric", metric=type(metric).__name__, image=image.get_name()):
+            metric_results = _as_list(metric.calculate(**keyword_args))
+    for metric_result in metric_results:
+        metric_result.details["timings"] = summarize_spans(spans)
+    return metric_results, spans
+
+
+def _calculate_pairs(metrics: list[InterfaceMetric], reference: Image, image: Image,
+                     options: list[dict[str, Any]]) -> list[tuple[list[MetricResult], list[Span]]]:
+    """Calculate the metrics of an image against the reference one after
+    the other, so the fused metrics find the calculation they share.
+
+    :param metrics: The metrics to be calculated.
+    :param reference: The reference image.
+    :param image: The image to be compared.
+    :param options: The keyword arguments of the metrics besides the images.
+    :return: The calculated results of the metrics, and the spans recorded
+    meanwhile, in the order of the metrics.
+    """
+    return [_calculate_pair(metric, reference, image, metric_options)
+            for metric, metric_options in zip(metrics, options)]
 
 
-class SRAnalyzer:
+def _initialize_worker(metrics: list[InterfaceMetric], reference: Image,
+                       options: list[dict[str, Any]], tracing: bool,
+                       artifacts: dict[str, Any] = None) -> None:
+    """Store the reference data in a worker process once.
+
+    :param metrics: The metrics of the analyzer.
+    :param reference: The reference image.
+    :param options: The keyword arguments of the metrics besides the images.
+    :param tracing: If the stages are traced.
+    :param artifacts: The cached artifacts of the reference by their
+    kinds, the arrays as handles of shared memory blocks.
+    """
+    _WORKER_STATE["metrics"] = metrics
+    _WORKER_STATE["reference"] = reference
+    _WORKER_STATE["options"] = options
+    for kind, artifact in (artifacts or {}).items():
+        if isinstance(artifact, SharedArray):
+            artifact = artifact.attach()
+        get_cache().put(reference.get_key(), kind, artifact)
+    if tracing:
+        start_tracing()
+
+
+def _calculate_in_worker(metric_indices: list[int],
+                         image: Image) -> list[tuple[list[MetricResult], list[Span]]]:
+    """Calculate metrics in a worker process.
+
+    :param metric_indices: The indices of the metrics in the analyzer.
+    :param image: The image to be compared.
+    :return: The calculated results of the metrics, and the spans recorded
+    meanwhile, in the order of the indices.
+    """
+    return _calculate_pairs([_WORKER_STATE["metrics"][index] for index in metric_indices],
+                            _WORKER_STATE["reference"], image,
+                            [_WORKER_STATE["options"][index] for index in metric_indices])
+
+
+class SRAnalyzer:  # pylint: disable=too-many-instance-attributes
     """The main super resolution analyzer class."""
 
     def __init__(self, settings: SRAnalyzerSettings):
@@ -14,11 +147,22 @@ class SRAnalyzer:
 
         :param settings: The settings of the analyzer.
         """
+        if settings.executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {settings.executor}.")
+        if settings.prefetch < 1:
+            raise ValueError("The prefetch must be positive.")
+
         self._settings = settings
+        self._fft_backend: FFTBackend = None
+        if settings.fft_backend is not None or settings.fft_workers is not None:
+            self._fft_backend = create_fft_backend(settings.fft_backend, settings.fft_workers)
         self._metrics: list[InterfaceMetric] = []
         self._reference: Image = None
         self._images: list[Image] = []
-        self._is_done = False
+        self._sinks: list[ResultSink] = []
+        self._completed: dict[tuple[str, str, str, str], list[dict]] = None
+        self._memo: dict[tuple[InterfaceMetric, Image], tuple[str, list[MetricResult]]] = {}
+        self._tracer: Tracer = None
 
     def add_metric(self, metric: InterfaceMetric) -> None:
         """Add a metric to the analyzer.
@@ -30,8 +174,12 @@ class SRAnalyzer:
     def add_reference_image(self, image: Image) -> None:
         """Add a reference image to the analyzer.
 
+        Replacing the reference invalidates all the calculated results.
+
         :param image: The reference image.
         """
+        if image is not self._reference:
+            self._memo.clear()
         self._reference = image
 
     def add_image(self, image: Image) -> None:
@@ -41,37 +189,564 @@ class SRAnalyzer:
         """
         self._images.append(image)
 
-    def calculate(self) -> list[MetricResult]:
+    def add_sink(self, sink: ResultSink) -> None:
+        """Add a sink receiving every result as soon as it is calculated.
+
+        The sinks are checkpointed when the calculation ends, even if it
+        fails. The caller owns the sinks and closes them.
+
+        :param sink: The sink to be added.
+        """
+        self._sinks.append(sink)
+        self._completed = None
+
+    def invalidate(self, metric: InterfaceMetric = None, image: Image = None) -> None:
+        """Forget the calculated results, so they are calculated again.
+
+        The results are otherwise kept between the calls of calculate and
+        result, and only the new pairs of metrics and images are calculated.
+        The results of a metric whose parameters changed are calculated again
+        without invalidating them.
+
+        :param metric: The metric whose results are forgotten, all if None.
+        :param image: The image whose results are forgotten, all if None.
+        """
+        self._memo = {(memo_metric, memo_image): memoized
+                      for (memo_metric, memo_image), memoized in self._memo.items()
+                      if (metric is not None and memo_metric is not metric)
+                      or (image is not None and memo_image is not image)}
+
+        # The results read back on resume are forgotten too.
+        if not self._completed:
+            return
+        for metric_index, added_metric in enumerate(self._metrics):
+            for added_image in self._images:
+                if ((metric is None or added_metric is metric)
+                        and (image is None or added_image is image)):
+                    self._completed.pop(self._get_task_key(metric_index, added_image), None)
+
+    def result(self, metric: InterfaceMetric,
+               image: Image | str) -> MetricResult | list[MetricResult]:
+        """Return the result of a metric for an image, calculating only it.
+
+        Nothing is calculated if the result is known from an earlier call,
+        or read back on resume. Otherwise it is calculated in this thread,
+        written to the sinks and kept for the next calls.
+
+        :param metric: A metric added to the analyzer.
+        :param image: An image added to the analyzer, or its name.
+        :return: The result of the metric, or the list of its results if
+        it returns several, e.g. one per threshold.
+        """
+        metric_index = next((index for index, added in enumerate(self._metrics)
+                             if added is metric), None)
+        if metric_index is None:
+            raise ValueError("The metric is not added to the analyzer.")
+        image = next((added for added in self._images
+                      if added is image or added.get_name() == image), None)
+        if image is None:
+            raise ValueError("The image is not added to the analyzer.")
+        if self._reference is None:
+            raise RuntimeError("The reference image is not set.")
+
+        metric_results = self._lookup(metric_index, image)
+        if metric_results is None:
+            self._tracer = get_tracer()
+            metric_results, _ = _calculate_pair(metric, self._reference, image,
+                                                self._get_options(metric_index))
+            self._emit(metric_index, image, metric_results)
+        return metric_results[0] if len(metric_results) == 1 else metric_results
+
+    def calculate(self) -> ResultTable:
         """Calculate the metrics.
 
-        :return: The calculated metrics.
+        The results are ordered by the metrics, then by the images, for
+        every executor. A metric returning several results, e.g. one per
+        threshold, has all of them in a row.
+
+        The analyzer can calculate again after metrics or images are added.
+        Only the pairs without a known result are calculated then, see
+        invalidate.
+
+        :return: The calculated metrics, iterable as MetricResult objects.
+        """
+        self._check_ready()
+
+        # Calculate the metrics not calculated before nor written by an
+        # earlier run.
+        tasks = [(metric_index, image)
+                 for metric_index in range(len(self._metrics))
+                 for image in self._images]
+        own_tracer = start_tracing() if self._settings.trace and get_tracer() is None else None
+        try:
+            self._tracer = get_tracer()
+            self._run([task for task in dict.fromkeys(tasks) if self._lookup(*task) is None])
+        finally:
+            for sink in self._sinks:
+                sink.checkpoint()
+            if own_tracer is not None:
+                stop_tracing()
+        if self._tracer is not None and self._settings.trace_path is not None:
+            self._tracer.write(self._settings.trace_path)
+
+        return ResultTable.from_results(metric_result for task in tasks
+                                        for metric_result in self._lookup(*task))
+
+    async def acalculate(self) -> ResultTable:
+        """Calculate the metrics without blocking the event loop.
+
+        The images are decoded in a thread pool while the previous images
+        are scored. The results are ordered as in calculate.
+
+        :return: The calculated metrics, iterable as MetricResult objects.
         """
-        # Check if the analyzer is done.
-        if self._is_done:
-            raise RuntimeError("The analyzer is already done.")
+        results: dict[tuple[int, int], list[MetricResult]] = {}
+        async for metric_index, image, metric_results in self._aiter_tasks():
+            results[(metric_index, id(image))] = metric_results
+        return ResultTable.from_results(metric_result
+                                        for metric_index in range(len(self._metrics))
+                                        for image in self._images
+                                        for metric_result in results[(metric_index, id(image))])
 
+    async def aiter_results(self) -> AsyncIterator[MetricResult]:
+        """Calculate the metrics and yield them image by image.
+
+        The images are decoded in a thread pool while the previous images
+        are scored. At most prefetch images of the settings are decoded
+        but not yet consumed, so a slow consumer pauses the decoding.
+
+        :return: The calculated metrics, all the metrics of an image in the
+        order of the metrics, the images in the order they were added.
+        """
+        async for _, _, metric_results in self._aiter_tasks():
+            for metric_result in metric_results:
+                yield metric_result
+
+    async def _aiter_tasks(self) -> AsyncIterator[tuple[int, Image, list[MetricResult]]]:
+        """Calculate the metrics image by image, overlapping the decoding
+        of the next images with the scoring of the current ones.
+
+        :return: The metric indices, the images and the calculated results
+        of the metrics.
+        """
+        self._check_ready()
+
+        loop = asyncio.get_running_loop()
+        own_tracer = start_tracing() if self._settings.trace and get_tracer() is None else None
+        self._tracer = get_tracer()
+        decoder = ThreadPoolExecutor(max_workers=self._settings.prefetch,
+                                     thread_name_prefix="decoder")
+        store = SharedArrayStore()
+        scorer: Executor = None
+        slots = asyncio.Semaphore(self._settings.prefetch)
+
+        async def decode(image: Image) -> Image:
+            """Decode the image once a slot is free."""
+            await slots.acquire()
+            await loop.run_in_executor(decoder, self._prepare_image, image, store,
+                                       isinstance(scorer, ProcessPoolExecutor))
+            return image
+
+        async def score(metric_indices: list[int], image: Image) -> list[list[MetricResult]]:
+            """Score the decoded image with the metrics one after the other
+            in the scorer."""
+            calculated = [metric_index for metric_index in metric_indices
+                          if self._lookup(metric_index, image) is None]
+            if isinstance(scorer, ProcessPoolExecutor):
+                outputs = await loop.run_in_executor(
+                    scorer, _calculate_in_worker, calculated, image)
+            else:
+                outputs = await loop.run_in_executor(
+                    scorer, _calculate_pairs, [self._metrics[index] for index in calculated],
+                    self._reference, image, [self._get_options(index) for index in calculated])
+            self._emit_outputs([(calculated, image)], [outputs],
+                               isinstance(scorer, ProcessPoolExecutor))
+            return [self._lookup(metric_index, image) for metric_index in metric_indices]
+
+        pending = []
+        try:
+            scorer = await loop.run_in_executor(decoder, self._create_scorer, store)
+            pending = [asyncio.ensure_future(decode(image))
+                       for image in dict.fromkeys(self._images)]
+            for decoding in pending:
+                image = await decoding
+                metric_groups = self._get_metric_groups()
+                results_of_groups = await asyncio.gather(*(
+                    score(metric_indices, image) for metric_indices in metric_groups))
+                image.release()
+                results_of_metrics = {
+                    metric_index: metric_results
+                    for metric_indices, results_of_group in zip(metric_groups, results_of_groups)
+                    for metric_index, metric_results in zip(metric_indices, results_of_group)}
+                for metric_index in range(len(self._metrics)):
+                    yield metric_index, image, results_of_metrics[metric_index]
+                # The slot is freed once the results are consumed.
+                slots.release()
+        finally:
+            self._close_pipeline(pending, [decoder, scorer], store, own_tracer is not None)
+
+        if self._tracer is not None and self._settings.trace_path is not None:
+            self._tracer.write(self._settings.trace_path)
+
+    def get_tracer(self) -> Tracer:
+        """Return the tracer of the calculation.
+
+        :return: The tracer, None if the calculation was not traced.
+        """
+        return self._tracer
+
+    def _check_ready(self) -> None:
+        """Check if the analyzer can calculate the metrics."""
         if self._reference is None:
             raise RuntimeError("The reference image is not set.")
 
         if len(self._images) == 0:
             raise RuntimeError("There is no image to calculate.")
 
-        # Calculate the metrics.
-        results: list[MetricResult] = []
-        for metric in self._metrics:
-            for image in self._images:
-                keyword_args = {
-                    "y_true": self._reference,
-                    "y_pred": image
-                }
-                metric_result = metric.calculate(**keyword_args)
-                metric_result.register_image_names(
-                    reference_image_name=self._reference.get_name(),
-                    image_name=image.get_name()
-                )
-                results.append(metric_result)
-
-        # Set true if finished.
-        self._is_done = True
+    def _close_pipeline(self, pending: list[asyncio.Future], executors: list[Executor],
+                        store: SharedArrayStore, own_tracer: bool) -> None:
+        """Release the resources of a calculation, even if it failed.
+
+        :param pending: The decodings of the images, cancelled.
+        :param executors: The executors of the calculation, None if not
+        created, shut down without waiting for the running tasks.
+        :param store: The store of the shared images, closed.
+        :param own_tracer: If the calculation started the tracer, stopped.
+        """
+        for decoding in pending:
+            decoding.cancel()
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._unshare_images()
+        store.close()
+        for sink in self._sinks:
+            sink.checkpoint()
+        if own_tracer:
+            stop_tracing()
+
+    def _get_precision(self) -> str:
+        """Return the precision the metrics are calculated with.
+
+        :return: The precision of the settings, float32 in low memory mode.
+        """
+        return "float32" if self._settings.low_memory else self._settings.precision
+
+    def _get_fused_indices(self) -> set[int]:
+        """Return the indices of the metrics sharing one calculation of a pair.
+
+        :return: The indices of the FUSED_METRICS if at least two of them
+        are registered and the artifact cache is enabled, otherwise none,
+        since the shared calculation is kept in the artifact cache.
+        """
+        fused_indices = {metric_index for metric_index, metric in enumerate(self._metrics)
+                         if isinstance(metric, tuple(FUSED_METRICS))}
+        return fused_indices if len(fused_indices) >= 2 and get_cache().enabled else set()
+
+    def _get_options(self, metric_index: int) -> dict[str, Any]:
+        """Return the keyword arguments of a metric besides the images.
+
+        :param metric_index: The index of the metric.
+        :return: The precision, the low memory mode, the FFT backend of the
+        settings, None for the one of the process, if the spectrum of the
+        reference is kept in the disk cache, and the names of the spatial
+        metrics the metric is fused with, itself included, so the shared
+        calculation skips the ones not registered. They are passed to the
+        worker processes by their initializer.
+        """
+        fused_indices = self._get_fused_indices()
+        fused = ()
+        if metric_index in fused_indices:
+            fused = tuple(sorted({name for fused_index in fused_indices
+                                  for metric_class, name in FUSED_METRICS.items()
+                                  if isinstance(self._metrics[fused_index], metric_class)}))
+        return {
+            "precision": self._get_precision(),
+            "low_memory": self._settings.low_memory,
+            "fft_backend": self._fft_backend,
+            "persist": True,
+            "fused": fused
+        }
+
+    def _get_metric_groups(self) -> list[list[int]]:
+        """Return the indices of the metrics calculated together.
+
+        The fused metrics are calculated one after the other by the same
+        worker, so they find the calculation they share in its cache. The
+        other metrics are calculated alone.
+
+        :return: The groups of the metric indices, in the order of their
+        first metrics.
+        """
+        fused_indices = self._get_fused_indices()
+        return [[metric_index] if metric_index not in fused_indices else sorted(fused_indices)
+                for metric_index in range(len(self._metrics))
+                if metric_index not in fused_indices or metric_index == min(fused_indices)]
+
+    def _group_tasks(self, tasks: list[tuple[int, Image]]) -> list[tuple[list[int], Image]]:
+        """Group the tasks of the same image by the groups of the metrics.
+
+        :param tasks: The metric indices and the images to be calculated.
+        :return: The metric indices of each group and their image, in the
+        order of their first tasks.
+        """
+        group_of_metrics = {metric_index: tuple(metric_indices)
+                            for metric_indices in self._get_metric_groups()
+                            for metric_index in metric_indices}
+        units: dict[tuple[tuple[int, ...], int], tuple[list[int], Image]] = {}
+        for metric_index, image in tasks:
+            units.setdefault((group_of_metrics[metric_index], id(image)),
+                             ([], image))[0].append(metric_index)
+        return list(units.values())
+
+    def _get_task_key(self, metric_index: int, image: Image) -> tuple[str, str, str, str]:
+        """Return the identity of a task in the records of the sinks.
+
+        :param metric_index: The index of the metric.
+        :param image: The image to be compared.
+        :return: The reference, image, metric and config of the task.
+        """
+        metric = self._metrics[metric_index]
+        return (self._reference.get_name(), image.get_name(), type(metric).__name__,
+                metric_config(metric, self._get_precision()))
+
+    def _prepare_image(self, image: Image, store: SharedArrayStore, is_shared: bool) -> None:
+        """Decode the image before it is scored, unless it was read back.
+
+        :param image: The compared image.
+        :param store: The store of the images shared with the processes.
+        :param is_shared: If the image is scored by the processes. They
+        decode their own images, except the images in memory which are
+        shared with them.
+        """
+        if self._is_completed(image):
+            return
+        if is_shared:
+            image.share(store)
+        else:
+            image.get_image()
+
+    def _is_completed(self, image: Image) -> bool:
+        """Return if all the metrics of the image are known.
+
+        :param image: The compared image.
+        :return: True if no metric of the image is left to be calculated.
+        """
+        return all(self._lookup(metric_index, image) is not None
+                   for metric_index in range(len(self._metrics)))
+
+    def _lookup(self, metric_index: int, image: Image) -> list[MetricResult] | None:
+        """Return the known results of a task.
+
+        The results are known if they were calculated by an earlier call
+        with the same parameters of the metric, or written by an earlier
+        run if resuming.
+
+        :param metric_index: The index of the metric.
+        :param image: The compared image.
+        :return: The results of the metric, None if they are to be calculated.
+        """
+        metric = self._metrics[metric_index]
+        config = metric_config(metric, self._get_precision())
+        memoized = self._memo.get((metric, image))
+        if memoized is not None and memoized[0] == config:
+            return memoized[1]
+
+        if self._completed is None:
+            self._completed = self._read_completed()
+        task_key = self._get_task_key(metric_index, image)
+        if task_key not in self._completed:
+            return None
+        metric_results = self._read_back(task_key)
+        self._memo[(metric, image)] = (config, metric_results)
+        return metric_results
+
+    def _read_completed(self) -> dict[tuple[str, str, str, str], list[dict]]:
+        """Read the records written by an earlier run if resuming.
 
+        A task is completed only if every sink has all its records, so each
+        sink ends up with all the records.
+
+        :return: The records of the first sink by their identities.
+        """
+        if not self._settings.resume or not self._sinks:
+            return {}
+        completed = group_records(self._sinks[0].read_records())
+        for sink in self._sinks[1:]:
+            completed_keys = sink.completed_keys()
+            completed = {key: record for key, record in completed.items()
+                         if key in completed_keys}
+        return completed
+
+    def _read_back(self, task_key: tuple[str, str, str, str]) -> list[MetricResult]:
+        """Return the results of a task read back on resume.
+
+        :param task_key: The identity of the task.
+        :return: The results of the metric.
+        """
+        return [record_result(record) for record in self._completed[task_key]]
+
+    def _emit(self, metric_index: int, image: Image, metric_results: list[MetricResult],
+              worker_spans: list[Span] = None) -> None:
+        """Name the results after their images, write them to the sinks and
+        keep them for the next calculations.
+
+        :param metric_index: The index of the metric.
+        :param image: The compared image.
+        :param metric_results: The calculated results of the metric.
+        :param worker_spans: The spans recorded by a worker process, merged
+        into the tracer of the analyzer.
+        """
+        if worker_spans and self._tracer is not None:
+            self._tracer.extend(worker_spans)
+        for metric_result in metric_results:
+            metric_result.register_image_names(
+                reference_image_name=self._reference.get_name(),
+                image_name=image.get_name()
+            )
+            if self._sinks:
+                record = result_record(self._metrics[metric_index], self._get_precision(),
+                                       metric_result, len(metric_results))
+                for sink in self._sinks:
+                    sink.write(record)
+        metric = self._metrics[metric_index]
+        self._memo[(metric, image)] = (metric_config(metric, self._get_precision()),
+                                       metric_results)
+
+    def _emit_outputs(self, units: list[tuple[list[int], Image]],
+                      outputs: Iterable[list[tuple[list[MetricResult], list[Span]]]],
+                      from_processes: bool) -> dict[tuple[int, int], list[MetricResult]]:
+        """Emit the results of the groups of tasks as they are calculated.
+
+        :param units: The metric indices of each group and their image.
+        :param outputs: The calculated results and the spans of the metrics
+        of each group.
+        :param from_processes: If the spans were recorded by worker
+        processes, to be merged into the tracer of the analyzer.
+        :return: The calculated results by the metric indices and the ids
+        of the images.
+        """
+        results: dict[tuple[int, int], list[MetricResult]] = {}
+        for (metric_indices, image), unit_outputs in zip(units, outputs):
+            for metric_index, (metric_results, spans) in zip(metric_indices, unit_outputs):
+                self._emit(metric_index, image, metric_results,
+                           spans if from_processes else None)
+                results[(metric_index, id(image))] = metric_results
         return results
+
+    def _create_scorer(self, store: SharedArrayStore) -> Executor:
+        """Create the pool scoring the images, decoding the reference.
+
+        :param store: The store sharing the reference with the processes.
+        :return: A single thread for the serial executor, otherwise the
+        pool of the executor of the settings.
+        """
+        if self._settings.executor == "process":
+            return ProcessPoolExecutor(
+                max_workers=self._settings.workers,
+                initializer=_initialize_worker,
+                initargs=self._share_reference(store))
+        self._reference.get_image()
+        if self._settings.executor == "thread":
+            return ThreadPoolExecutor(max_workers=self._settings.workers)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def _share_reference(self, store: SharedArrayStore) -> tuple:
+        """Place the reference and its cached artifacts in shared memory.
+
+        The half spectrum of the reference is calculated once here for the
+        HRI95 metrics instead of once per worker.
+
+        :param store: The store owning the shared memory blocks.
+        :return: The initializer arguments of the worker processes.
+        """
+        precision = self._get_precision()
+        if self._reference.share(store, include_paths=True) is not None and any(
+                isinstance(metric, HarmonicsRadius) for metric in self._metrics):
+            get_half_fft_of_image(self._reference.get_image(), key=self._reference.get_key(),
+                                  precision=precision, low_memory=self._settings.low_memory,
+                                  persist=True, fft_backend=self._fft_backend)
+
+        artifacts = {
+            kind: store.share(artifact) if isinstance(artifact, ndarray) else artifact
+            for kind, artifact in get_cache().get_artifacts(self._reference.get_key()).items()
+        }
+        return (self._metrics, self._reference,
+                [self._get_options(metric_index) for metric_index in range(len(self._metrics))],
+                self._tracer is not None, artifacts)
+
+    def _unshare_images(self) -> None:
+        """Pickle the reference and the images with their pixels again."""
+        self._reference.unshare()
+        for image in self._images:
+            image.unshare()
+
+    def _run(self, tasks: list[tuple[int, Image]]) -> list[list[MetricResult]]:
+        """Run the tasks with the executor of the settings.
+
+        Every result is emitted to the sinks as soon as it is calculated.
+
+        :param tasks: The metric indices and the images to be calculated.
+        :return: The calculated results of the metrics in the order of the
+        tasks.
+        """
+        if not tasks:
+            return []
+        if self._settings.executor == "thread":
+            return self._run_in_threads(tasks)
+        if self._settings.executor == "process":
+            return self._run_in_processes(tasks)
+
+        # Calculate all the metrics of an image before releasing its pixels,
+        # so only one compared image is decoded at a time.
+        metrics_of_images: dict[Image, list[int]] = {}
+        for metric_index, image in tasks:
+            metrics_of_images.setdefault(image, []).append(metric_index)
+        calculated: dict[tuple[int, int], list[MetricResult]] = {}
+        for image, metric_indices in metrics_of_images.items():
+            for metric_index in dict.fromkeys(metric_indices):
+                calculated[(metric_index, id(image))], _ = _calculate_pair(
+                    self._metrics[metric_index], self._reference, image,
+                    self._get_options(metric_index))
+                self._emit(metric_index, image, calculated[(metric_index, id(image))])
+            image.release()
+        return [calculated[(metric_index, id(image))] for metric_index, image in tasks]
+
+    def _run_in_threads(self, tasks: list[tuple[int, Image]]) -> list[list[MetricResult]]:
+        """Run the tasks in a thread pool.
+
+        :param tasks: The metric indices and the images to be calculated.
+        :return: The calculated results of the metrics in the order of the
+        tasks.
+        """
+        units = self._group_tasks(tasks)
+        with ThreadPoolExecutor(max_workers=self._settings.workers) as executor:
+            outputs = executor.map(
+                lambda metric_indices, image: _calculate_pairs(
+                    [self._metrics[index] for index in metric_indices], self._reference, image,
+                    [self._get_options(index) for index in metric_indices]),
+                *zip(*units))
+            calculated = self._emit_outputs(units, outputs, from_processes=False)
+        return [calculated[(metric_index, id(image))] for metric_index, image in tasks]
+
+    def _run_in_processes(self, tasks: list[tuple[int, Image]]) -> list[list[MetricResult]]:
+        """Run the tasks in a process pool.
+
+        The reference is mapped once per worker, and the images in memory
+        are sent as handles of shared memory blocks.
+
+        :param tasks: The metric indices and the images to be calculated.
+        :return: The calculated results of the metrics in the order of the
+        tasks.
+        """
+        units = self._group_tasks(tasks)
+        with SharedArrayStore() as store:
+            try:
+                for image in dict.fromkeys(image for _, image in tasks):
+                    image.share(store)
+                with self._create_scorer(store) as executor:
+                    outputs = executor.map(_calculate_in_worker, *zip(*units))
+                    calculated = self._emit_outputs(units, outputs, from_processes=True)
+            finally:
+                self._unshare_images()
+        return [calculated[(metric_index, id(image))] for metric_index, image in tasks]
@@ -0,0 +1,212 @@
+"""
+Holds the tracing of the stages of the analysis.
+
+The stages record spans only while a tracer is started, otherwise a span
+costs a global lookup and returns a shared no-op context.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, ContextManager
+
+TRACE_FORMATS = ("json", "csv")
+"""Holds the supported export formats, Chrome trace JSON and CSV."""
+
+
+@dataclass
+class Span:
+    """Holds a timed stage of the analysis."""
+
+    name: str
+    """Holds the name of the stage, e.g. "fft"."""
+    category: str
+    """Holds the category of the stage, e.g. "image" or "metric"."""
+    start: int
+    """Holds the start of the stage in perf_counter nanoseconds."""
+    duration: int
+    """Holds the duration of the stage in nanoseconds."""
+    process_id: int
+    """Holds the id of the process running the stage."""
+    thread_id: int
+    """Holds the id of the thread running the stage."""
+    args: dict[str, Any] = field(default_factory=dict)
+    """Holds the arguments of the stage, e.g. the grid size."""
+
+
+_TRACER: "Tracer" = None
+_COLLECTOR: ContextVar[list[Span]] = ContextVar("span_collector", default=None)
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Records the spans of the stages of every thread."""
+
+    def __init__(self) -> None:
+        """Constructor of the Tracer class."""
+        self.origin = time.perf_counter_ns()
+        """Holds the start of the trace in perf_counter nanoseconds."""
+        self.spans: list[Span] = []
+        """Holds the recorded spans in the order they ended."""
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **args: Any) -> Iterator[dict[str, Any]]:
+        """Record the duration of the block as a span.
+
+        :param name: The name of the stage.
+        :param category: The category of the stage.
+        :param args: The arguments of the stage.
+        :return: The arguments of the span, the block may add to them.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            self.record(Span(name, category, start, time.perf_counter_ns() - start,
+                             os.getpid(), threading.get_ident(), args))
+
+    def record(self, span_record: Span) -> None:
+        """Add a finished span to the trace and to the active collector.
+
+        :param span_record: The finished span.
+        """
+        with self._lock:
+            self.spans.append(span_record)
+        if (collector := _COLLECTOR.get()) is not None:
+            collector.append(span_record)
+
+    def extend(self, span_records: list[Span]) -> None:
+        """Add the spans recorded by another tracer, e.g. in a worker process.
+
+        :param span_records: The spans to be added.
+        """
+        with self._lock:
+            self.spans.extend(span_records)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Return the spans in the Chrome trace event format.
+
+        The result can be opened in chrome://tracing or in Perfetto.
+
+        :return: The trace events.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "traceEvents": [{
+                "name": span_record.name,
+                "cat": span_record.category,
+                "ph": "X",
+                "ts": (span_record.start - self.origin) / 1e3,
+                "dur": span_record.duration / 1e3,
+                "pid": span_record.process_id,
+                "tid": span_record.thread_id,
+                "args": span_record.args,
+            } for span_record in spans],
+            "displayTimeUnit": "ms",
+        }
+
+    def write(self, path: str, trace_format: str = None) -> None:
+        """Write the spans as Chrome trace JSON or as CSV.
+
+        :param path: The path of the trace file.
+        :param trace_format: The format, "json" or "csv". It is taken from
+        the extension of the path if it is not given.
+        """
+        trace_format = trace_format or ("csv" if path.endswith(".csv") else "json")
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}.")
+
+        if trace_format == "json":
+            with open(path, "w", encoding="utf-8") as trace_file:
+                json.dump(self.to_chrome_trace(), trace_file, default=str)
+            return
+
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "w", encoding="utf-8", newline="") as trace_file:
+            writer = csv.writer(trace_file)
+            writer.writerow(["name", "category", "start_us", "duration_us",
+                             "process_id", "thread_id", "args"])
+            for span_record in spans:
+                writer.writerow([span_record.name, span_record.category,
+                                 (span_record.start - self.origin) / 1e3,
+                                 span_record.duration / 1e3, span_record.process_id,
+                                 span_record.thread_id,
+                                 json.dumps(span_record.args, default=str)])
+
+
+def start_tracing(tracer: Tracer = None) -> Tracer:
+    """Start recording the spans of every thread of the process.
+
+    :param tracer: The tracer to record into, a new one if not given.
+    :return: The started tracer.
+    """
+    global _TRACER  # pylint: disable=global-statement
+    _TRACER = tracer if tracer is not None else Tracer()
+    return _TRACER
+
+
+def stop_tracing() -> Tracer:
+    """Stop recording the spans.
+
+    :return: The stopped tracer, None if no tracer was started.
+    """
+    global _TRACER  # pylint: disable=global-statement
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def get_tracer() -> Tracer:
+    """Return the started tracer.
+
+    :return: The tracer, None if tracing is disabled.
+    """
+    return _TRACER
+
+
+def span(name: str, category: str = "stage", **args: Any) -> ContextManager:
+    """Record the duration of the block if tracing is enabled.
+
+    :param name: The name of the stage.
+    :param category: The category of the stage.
+    :param args: The arguments of the stage.
+    :return: The context of the span, or a no-op context.
+    """
+    if _TRACER is None:
+        return _NO_SPAN
+    return _TRACER.span(name, category, **args)
+
+
+@contextmanager
+def collect_spans() -> Iterator[list[Span]]:
+    """Collect the spans ending in the block in the current thread.
+
+    :return: The list receiving the spans.
+    """
+    collected: list[Span] = []
+    token = _COLLECTOR.set(collected)
+    try:
+        yield collected
+    finally:
+        _COLLECTOR.reset(token)
+
+
+def summarize_spans(span_records: list[Span]) -> dict[str, dict[str, float]]:
+    """Summarize the spans by their names.
+
+    :param span_records: The spans.
+    :return: The count and the total duration in seconds of every stage.
+    """
+    summary: dict[str, dict[str, float]] = {}
+    for span_record in span_records:
+        stage = summary.setdefault(span_record.name, {"count": 0, "seconds": 0.0})
+        stage["count"] += 1
+        stage["seconds"] += span_record.duration / 1e9
+    return summary
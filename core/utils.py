@@ -1,22 +1,85 @@
 """
 Holds the utility functions to be used in the analisys.
 """
-import cv2
-from numpy import ndarray, fft
+import os
+from collections.abc import Hashable
+
+from numpy import ndarray, float32, float64
 from numpy import log as np_log
 from numpy import abs as np_abs
 from numpy import max as np_max
 from numpy import uint8 as np_uint8
-from matplotlib import pyplot as plt
+from numpy.fft import fftshift
+
+from core.cache import content_key, get_cache, path_key
+from core.disk_cache import get_disk_cache
+from core.fft_backend import FFTBackend, get_fft_backend
+from core.lazy import LazyModule
+from core.low_memory import get_low_memory_half_spectrum, get_low_memory_spectrum
+from core.tracing import span
+
+cv2 = LazyModule("cv2")
+plt = LazyModule("matplotlib.pyplot")
+
+PRECISIONS: dict[str, type] = {"float64": float64, "float32": float32}
+"""Holds the floating point types of the supported precisions."""
+
+EXIF_ORIENTATION = 0x0112
+"""The EXIF tag of the image orientation."""
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+"""The EXIF orientations swapping the width and the height."""
+
+
+def get_float_type(precision: str) -> type:
+    """Get the floating point type of the precision.
+
+    :param precision: The precision, "float64" or "float32".
+    :return: The floating point type.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}.")
+    return PRECISIONS[precision]
 
 
 def read_image(image_path: str) -> ndarray:
     """Read the image from the path.
 
+    The decoded images are cached by their path and modification time,
+    so the returned array is read-only.
+
     :param image_path: The path of the image.
     :return: The image as a numpy array.
     """
-    return cv2.imread(image_path)  # pylint: disable=no-member
+    if not get_cache().enabled or not os.path.isfile(image_path):
+        return cv2.imread(image_path)  # pylint: disable=no-member
+    return get_cache().get_or_compute(
+        path_key(image_path), "pixels",
+        lambda: cv2.imread(image_path))  # pylint: disable=no-member
+
+
+def read_image_shape(image_path: str) -> tuple[int, int, int] | None:
+    """Read the shape of the image from the file header without decoding it.
+
+    The images are read in BGR by read_image, so they have three channels.
+
+    :param image_path: The path of the image.
+    :return: The shape of the image as (height, width, channels), None if
+    the header cannot be read.
+    """
+    try:
+        from PIL import Image as PILImage  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    try:
+        with PILImage.open(image_path) as header:
+            width, height = header.size
+            # cv2 applies the EXIF orientation, which may transpose the image.
+            if header.getexif().get(EXIF_ORIENTATION, 1) in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+    except (OSError, ValueError):
+        return None
+    return (height, width, 3)
 
 
 def show_image(image: ndarray, title: str = "Image") -> None:
@@ -39,23 +102,196 @@ def save_image(image: ndarray, image_path: str) -> None:
     cv2.imwrite(image_path, image)  # pylint: disable=no-member
 
 
-def get_fft_of_image(image: ndarray, scale_log: bool = True) -> ndarray:
+def get_grayscale(image: ndarray, key: Hashable = None) -> ndarray:
+    """Get the grayscale version of the image.
+
+    :param image: The image in BGR or grayscale.
+    :param key: The identity of the image in the cache. It is calculated
+    from the content of the image if not given.
+    :return: The grayscale image.
+    """
+    if len(image.shape) != 3:
+        return image
+
+    def convert() -> ndarray:
+        """Convert the image to grayscale."""
+        with span("grayscale", "image"):
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
+
+    if not get_cache().enabled:
+        return convert()
+    return get_cache().get_or_compute(
+        key if key is not None else content_key(image), "grayscale", convert)
+
+
+def get_data_range(image: ndarray, key: Hashable = None) -> float:
+    """Get the data range of the image, i.e. its maximum minus its minimum.
+
+    :param image: The image to get the data range.
+    :param key: The identity of the image in the cache. It is calculated
+    from the content of the image if not given.
+    :return: The data range of the image.
+    """
+    if not get_cache().enabled:
+        return image.max() - image.min()
+
+    return get_cache().get_or_compute(
+        key if key is not None else content_key(image), "data_range",
+        lambda: image.max() - image.min())
+
+
+def _get_content_digest(image: ndarray, key: Hashable) -> str:
+    """Get the content hash of the image, from the cache if possible.
+
+    :param image: The image to be hashed.
+    :param key: The identity of the image in the cache.
+    :return: The content hash of the image.
+    """
+    if key is None or not get_cache().enabled:
+        return content_key(image)[1]
+    if isinstance(key, tuple) and key[:1] == ("content",):
+        return key[1]
+    return get_cache().get_or_compute(key, "content_digest", lambda: content_key(image)[1])
+
+
+def _calculate_spectrum(grayscale: ndarray, scale_log: bool, precision: str,
+                        half: bool, fft_backend: FFTBackend = None) -> ndarray:
+    """Calculate the full or the half FFT magnitudes of the grayscale image,
+    shifted to the center.
+
+    :param grayscale: The grayscale image.
+    :param scale_log: If the FFT should be scaled logarithmically.
+    :param precision: The precision of the FFT, "float64" or "float32".
+    :param half: If only the non-negative horizontal frequencies are needed.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The FFT magnitudes of the image.
+    """
+    float_type = get_float_type(precision)
+    grayscale = grayscale.astype(float_type)
+    with span("fft", "image", half=half, precision=precision):
+        # NumPy's FFT may calculate in complex128 only, cast it back.
+        backend = fft_backend or get_fft_backend()
+        if half:
+            fft_image = fftshift(
+                np_abs(backend.rfft2(grayscale)).astype(float_type, copy=False), axes=0)
+        else:
+            fft_image = fftshift(
+                np_abs(backend.fft2(grayscale)).astype(float_type, copy=False))
+        if scale_log:
+            fft_image += 1
+            np_log(fft_image, out=fft_image)
+    return fft_image
+
+
+# pylint: disable-next=too-many-arguments
+def _get_spectrum(image: ndarray, scale_log: bool, key: Hashable, precision: str, half: bool,
+                  low_memory: bool = False, persist: bool = False,
+                  fft_backend: FFTBackend = None) -> ndarray:
+    """Get the full or the half FFT magnitudes of the image, shifted to
+    the center, from the cache if possible.
+
+    :param image: The image to get the FFT.
+    :param scale_log: If the FFT should be scaled logarithmically.
+    :param key: The identity of the image in the cache.
+    :param precision: The precision of the FFT, "float64" or "float32".
+    :param half: If only the non-negative horizontal frequencies are needed.
+    :param low_memory: If the FFT is calculated in float32 block by block,
+    see core.low_memory. The precision is float32 then.
+    :param persist: If the FFT is loaded from and stored in the disk cache.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The FFT magnitudes of the image.
+    """
+    if low_memory:
+        precision = "float32"
+    get_float_type(precision)
+
+    def calculate_fft() -> ndarray:
+        """Calculate the FFT magnitudes of the image."""
+        if low_memory:
+            grayscale = get_grayscale(image, key)
+            with span("fft", "image", half=half, precision=precision, low_memory=True):
+                if half:
+                    return get_low_memory_half_spectrum(grayscale, scale_log, fft_backend)
+                return get_low_memory_spectrum(grayscale, scale_log, fft_backend)
+        return _calculate_spectrum(get_grayscale(image, key), scale_log, precision, half,
+                                   fft_backend)
+
+    kind = ("log_" if scale_log else "") + ("half_spectrum" if half else "spectrum")
+    kind = f"{kind}:{precision}"
+
+    def load_or_calculate_fft() -> ndarray:
+        """Load the FFT magnitudes from the disk cache, or calculate them."""
+        if not persist or (disk_cache := get_disk_cache()) is None:
+            return calculate_fft()
+        with span("spectrum_disk_cache", "image", kind=kind):
+            return disk_cache.get_or_compute(
+                _get_content_digest(image, key), kind, calculate_fft)
+
+    if not get_cache().enabled:
+        return load_or_calculate_fft()
+
+    if key is None:
+        key = content_key(image)
+    return get_cache().get_or_compute(key, kind, load_or_calculate_fft)
+
+
+# pylint: disable-next=too-many-arguments
+def get_fft_of_image(image: ndarray, scale_log: bool = True, key: Hashable = None,
+                     precision: str = "float64", low_memory: bool = False,
+                     persist: bool = False, fft_backend: FFTBackend = None) -> ndarray:
     """Get the FFT of the image.
 
+    The magnitudes are cached by the identity of the image, so the
+    returned array is read-only. When the disk cache is enabled and
+    persist is set, they are also stored on disk by the content of the
+    image and loaded memory-mapped in the next runs.
+
     :param image: The image to get the FFT.
     :param scale_log: If the FFT should be scaled logarithmically.
+    :param key: The identity of the image in the cache. It is calculated
+    from the content of the image if not given.
+    :param precision: The precision of the FFT, "float64" or "float32".
+    The FFT is calculated in complex128 or complex64 respectively.
+    :param low_memory: If the FFT is calculated in float32 block by block,
+    within the peak memory of core.low_memory.get_peak_bytes, whatever
+    the precision.
+    :param persist: If the FFT is kept in the disk cache, e.g. for the
+    reference images scored again in the next runs. The spectra of the
+    predicted images are not, so they do not evict the references.
+    :param fft_backend: The FFT backend, the one of the process if None,
+    see core.fft_backend.
     :return: The FFT of the image.
     """
-    if len(image.shape) == 3:
-        image = cv2.cvtColor(
-            image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
-    fft_image = fft.fftshift(fft.fft2(image))
-
-    if scale_log:
-        fft_image = np_log(1 + np_abs(fft_image))
-    else:
-        fft_image = np_abs(fft_image)
-    return fft_image
+    return _get_spectrum(image, scale_log, key, precision, half=False, low_memory=low_memory,
+                         persist=persist, fft_backend=fft_backend)
+
+
+# pylint: disable-next=too-many-arguments
+def get_half_fft_of_image(image: ndarray, scale_log: bool = True, key: Hashable = None,
+                          precision: str = "float64", low_memory: bool = False,
+                          persist: bool = False, fft_backend: FFTBackend = None) -> ndarray:
+    """Get the FFT of the image for the non-negative horizontal frequencies.
+
+    The spectrum of a real image is centrally symmetric, so the rfft2 of
+    the image holds all of its magnitudes in half the time and memory.
+    The rows are shifted to the center, the first column is the zero
+    horizontal frequency. The magnitudes are cached as in get_fft_of_image.
+
+    :param image: The image to get the FFT.
+    :param scale_log: If the FFT should be scaled logarithmically.
+    :param key: The identity of the image in the cache. It is calculated
+    from the content of the image if not given.
+    :param precision: The precision of the FFT, "float64" or "float32".
+    :param low_memory: If the FFT is calculated in float32 block by block,
+    within the peak memory of core.low_memory.get_peak_bytes, whatever
+    the precision.
+    :param persist: If the FFT is kept in the disk cache, see
+    get_fft_of_image.
+    :param fft_backend: The FFT backend, the one of the process if None.
+    :return: The half FFT of the image with the shape (height, width // 2 + 1).
+    """
+    return _get_spectrum(image, scale_log, key, precision, half=True, low_memory=low_memory,
+                         persist=persist, fft_backend=fft_backend)
 
 
 def show_fft_image(fft_image: ndarray, title: str = "FFT Image") -> None:
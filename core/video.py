@@ -0,0 +1,210 @@
+"""
+Holds the streaming evaluation of the frames of super resolution videos.
+"""
+import os
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from itertools import zip_longest
+from typing import Any
+
+from numpy import ndarray
+
+from core.batch import METRICS, list_images
+from core.cache import get_cache
+from core.image import Image
+from core.lazy import LazyModule
+from core.metrics import HarmonicsRadius
+
+cv2 = LazyModule("cv2")
+
+DEFAULT_METRICS = ("hri95", "psnr", "ssim")
+"""Holds the metrics of the frames calculated by default."""
+DEFAULT_PREFETCH = 4
+"""Holds the number of frame pairs decoded ahead of the evaluation."""
+
+_END = object()
+
+
+def read_frames(source: str, pattern: str = "*.png") -> Iterator[ndarray]:
+    """Read the frames of a video file or of a directory of frame images.
+
+    The frames are decoded one by one and are not cached, so a video of
+    any length is read with the memory of a single frame.
+
+    :param source: The path of the video file or of the frame directory.
+    :param pattern: The file name pattern of the frames in a directory,
+    with exactly one "*". The frames are read in the order of their keys.
+    :return: The frames in BGR.
+    """
+    if os.path.isdir(source):
+        for frame_path in list_images(source, pattern):
+            frame = cv2.imread(frame_path)
+            if frame is None:
+                raise FileNotFoundError(f"The frame cannot be read: {frame_path}.")
+            yield frame
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"The video cannot be read: {source}.")
+    try:
+        while True:
+            is_read, frame = capture.read()
+            if not is_read:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def _put(buffer: queue.Queue, item: Any, stopped: threading.Event) -> bool:
+    """Put the item into the buffer unless the consumer stopped.
+
+    :param buffer: The buffer of the produced items.
+    :param item: The item to be put.
+    :param stopped: The event set when the consumer stops.
+    :return: True if the item is put.
+    """
+    while not stopped.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(items: Iterable[Any], buffer: queue.Queue, stopped: threading.Event,
+             errors: list[BaseException]) -> None:
+    """Produce the items into the buffer, then the end marker.
+
+    :param items: The items to be produced.
+    :param buffer: The buffer of the produced items.
+    :param stopped: The event set when the consumer stops.
+    :param errors: The list receiving the error of the producer.
+    """
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            if not _put(buffer, item, stopped):
+                return
+    except BaseException as error:  # pylint: disable=broad-exception-caught
+        errors.append(error)
+    finally:
+        # Release the sources, e.g. the video captures, in this thread.
+        if hasattr(iterator, "close"):
+            iterator.close()
+    _put(buffer, _END, stopped)
+
+
+def prefetch(items: Iterable[Any], depth: int = DEFAULT_PREFETCH) -> Iterator[Any]:
+    """Produce the items in a background thread, at most depth items ahead.
+
+    The decoding of the next frames then overlaps the evaluation of the
+    current one. The errors of the producer are raised to the consumer,
+    and the producer stops when the consumer closes the iterator.
+
+    :param items: The items to be produced, e.g. the frames.
+    :param depth: The maximum number of the items waiting to be consumed.
+    :return: The items in their order.
+    """
+    if depth < 1:
+        raise ValueError("The prefetch depth must be positive.")
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    errors: list[BaseException] = []
+    producer = threading.Thread(target=_produce, args=(items, buffer, stopped, errors),
+                                name="frame-prefetch", daemon=True)
+    producer.start()
+    try:
+        while (item := buffer.get()) is not _END:
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        stopped.set()
+        producer.join()
+
+
+def read_frame_pairs(true_source: str, predicted_source: str,
+                     true_pattern: str = "*.png",
+                     predicted_pattern: str = "*.png") -> Iterator[tuple[ndarray, ndarray]]:
+    """Read the true and predicted frames side by side.
+
+    :param true_source: The true video file or frame directory.
+    :param predicted_source: The predicted video file or frame directory.
+    :param true_pattern: The file name pattern of the true frames.
+    :param predicted_pattern: The file name pattern of the predicted frames.
+    :return: The true and predicted frames.
+    """
+    true_frames = read_frames(true_source, true_pattern)
+    predicted_frames = read_frames(predicted_source, predicted_pattern)
+    for true_frame, predicted_frame in zip_longest(true_frames, predicted_frames):
+        if true_frame is None or predicted_frame is None:
+            raise ValueError("The true and predicted videos must have the same number of frames.")
+        yield true_frame, predicted_frame
+
+
+# pylint: disable-next=too-many-arguments,too-many-locals
+def evaluate_video(true_source: str, predicted_source: str,
+                   metric_names: Iterable[str] = DEFAULT_METRICS,
+                   precision: str = "float64", warm_start: bool = True,
+                   prefetch_depth: int = DEFAULT_PREFETCH,
+                   true_pattern: str = "*.png",
+                   predicted_pattern: str = "*.png") -> Iterator[dict[str, Any]]:
+    """Calculate the metrics of every frame and yield each row as soon as
+    it is ready.
+
+    The frames are decoded ahead in a background thread, and they are
+    released with their cached artifacts once scored, so the memory does
+    not grow with the length of the video. Consecutive frames have nearly
+    the same spectra, so the HRI95 search starts from the HRI95 of the
+    previous frame.
+
+    :param true_source: The true video file or frame directory.
+    :param predicted_source: The predicted video file or frame directory.
+    :param metric_names: The names of the metrics, keys of METRICS.
+    :param precision: The precision of the metrics.
+    :param warm_start: If the HRI95 search starts from the previous frame.
+    :param prefetch_depth: The number of frame pairs decoded ahead.
+    :param true_pattern: The file name pattern of the true frames.
+    :param predicted_pattern: The file name pattern of the predicted frames.
+    :return: The rows of the frames with the metric values by their names.
+    """
+    metric_names = list(metric_names)
+    unknown_metrics = set(metric_names) - METRICS.keys()
+    if unknown_metrics:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown_metrics))}.")
+    metrics = {metric_name: METRICS[metric_name](precision=precision)
+               for metric_name in metric_names}
+
+    frame_pairs = prefetch(read_frame_pairs(true_source, predicted_source,
+                                            true_pattern, predicted_pattern),
+                           prefetch_depth)
+    seed_radius = None
+    with closing(frame_pairs):
+        for frame_index, (true_frame, predicted_frame) in enumerate(frame_pairs):
+            true_image = Image(true_frame, name=f"true_{frame_index}")
+            predicted_image = Image(predicted_frame, name=f"predicted_{frame_index}")
+            if true_image.get_shape() != predicted_image.get_shape():
+                raise ValueError(f"The frames {frame_index} must have the same shape.")
+
+            row: dict[str, Any] = {"frame": frame_index}
+            for metric_name, metric in metrics.items():
+                # The true frames are scored once, so they are not persisted.
+                keyword_args = {"y_true": true_image, "y_pred": predicted_image,
+                                "precision": precision, "persist": False}
+                if isinstance(metric, HarmonicsRadius) and warm_start:
+                    keyword_args["seed_radius"] = seed_radius
+                metric_result = metric.calculate(**keyword_args)
+                if isinstance(metric, HarmonicsRadius):
+                    seed_radius = int(metric_result.value)
+                row[metric_name] = float(metric_result.value)
+
+            # The artifacts of the frames are not used again.
+            get_cache().discard(true_image.get_key())
+            get_cache().discard(predicted_image.get_key())
+            yield row
@@ -8,6 +8,8 @@ from matplotlib import pyplot
 from skimage.metrics import structural_similarity as ssim
 from skimage.metrics import peak_signal_noise_ratio as psnr
 
+from core.fft_backend import get_fft_backend
+
 
 def get_harmonics_phases(image: numpy.ndarray) -> numpy.ndarray:
     """
@@ -16,7 +18,7 @@ def get_harmonics_phases(image: numpy.ndarray) -> numpy.ndarray:
     :return: Phase components as ndarray.
     """
     # Get the FFT of the image with shifted to center.
-    fft_image = numpy.fft.fftshift(numpy.fft.fft2(image))
+    fft_image = numpy.fft.fftshift(get_fft_backend().fft2(image))
     # Get the phases of the FFT image in radians.
     return numpy.angle(fft_image, deg=False)
 
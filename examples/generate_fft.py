@@ -7,6 +7,8 @@ import cv2
 import numpy
 from matplotlib import pyplot as plt
 
+from core.fft_backend import get_fft_backend
+
 
 if __name__ == "__main__":
     IMAGE_PATH = "image.png"
@@ -18,7 +20,7 @@ if __name__ == "__main__":
     cv2.imshow("Image", image)
 
     # Get the FFT of the image.
-    fft_image = numpy.fft.fftshift(numpy.fft.fft2(image))
+    fft_image = numpy.fft.fftshift(get_fft_backend().fft2(image))
 
     # Get the magnitudes and phases of the FFT image.
     fft_mags = numpy.log(1 + numpy.abs(fft_image))
@@ -30,7 +32,7 @@ if __name__ == "__main__":
 
     # Get the inverse FFT of the image.
     combined_new = numpy.exp(fft_mags) * numpy.exp(1j * fft_pha_lp)
-    ifft_image = numpy.fft.ifft2(numpy.fft.ifftshift(combined_new)).real
+    ifft_image = get_fft_backend().ifft2(numpy.fft.ifftshift(combined_new)).real
 
     # Plot the images.
     plt.subplot(2, 2, 3)
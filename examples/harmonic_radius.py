@@ -6,15 +6,19 @@ import numpy
 from skimage.metrics import structural_similarity
 
 from core.image import Image
+from core.radius_search import SEARCH_STRATEGIES, get_grid_sizes
 from core.utils import get_fft_of_image, draw_square_from_center
 
 
 def harmonic_radius(y_pred: Image | numpy.ndarray,
                     y_true: Image | numpy.ndarray,
-                    success_thres: float = 0.95) -> float:
+                    success_thres: float = 0.95,
+                    search: str = "linear") -> float:
     """Calculate the Harmonics Radius' index.
     :param y_pred: The predicted image.
     :param y_true: The ground truth image.
+    :param success_thres: The SSIM threshold of the grid.
+    :param search: The search strategy, "linear", "bisect" or "galloping".
     :return: The Harmonics Radius' index.
     """
     # Check the shapes of the parameters.
@@ -37,9 +41,8 @@ def harmonic_radius(y_pred: Image | numpy.ndarray,
     pred_x_center = fft_of_pred.shape[0] // 2
     pred_y_center = fft_of_pred.shape[1] // 2
 
-    # Assign half of the image size as the initial grid size.
-    grid_size = fft_of_pred.shape[0] // 2
-    while True:
+    def ssim_of_grid(grid_size: int) -> float:
+        """Return the SSIM of the centered grid."""
         # Get the grid.
         grid_pred = fft_of_pred[
             pred_x_center - grid_size//2: pred_x_center + grid_size//2,
@@ -51,25 +54,22 @@ def harmonic_radius(y_pred: Image | numpy.ndarray,
         ]
 
         # Check the SSIM of the grid.
-        ssim_result = structural_similarity(
+        return structural_similarity(
             grid_true,
             grid_pred,
             data_range=fft_of_true.max() - fft_of_true.min(),
             multichannel=False,
         )
 
-        if ssim_result > success_thres:
-            # The radius is the half of the grid size.
-            draw_square_from_center(
-                fft_of_pred, (pred_x_center, pred_y_center), grid_size // 2)
-            return grid_size // 2
+    # Search from half of the image size down to the window size.
+    grid_size = SEARCH_STRATEGIES[search](
+        ssim_of_grid, get_grid_sizes(fft_of_pred.shape[0]), success_thres)
 
-        # Decrease the grid size by 2.
-        grid_size -= 2
-
-        # A stop condition.
-        if grid_size < 7:
-            break
+    if grid_size is not None:
+        # The radius is the half of the grid size.
+        draw_square_from_center(
+            fft_of_pred, (pred_x_center, pred_y_center), grid_size // 2)
+        return grid_size // 2
 
     # If the radius is not found, return the minimum radius.
     return 0
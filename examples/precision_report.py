@@ -0,0 +1,105 @@
+"""
+This script compares the float32 compute mode of the metrics with the
+float64 one on the images shipped with scikit-image, and prints the
+deltas as a markdown table.
+"""
+import numpy
+from skimage import data
+
+from core.centered_ssim import CenteredSSIM
+from core.image import Image
+from core.metrics import (
+    HarmonicsRadius,
+    MeanSquaredError,
+    StructuralSimilarityIndex,
+    PeakSignalToNoiseRatio
+)
+from core.preprocessors import (
+    shrink_to,
+    linear_upscale,
+    bicubic_upscale,
+    nearest_upscale,
+)
+from core.radius_search import get_grid_sizes
+from core.utils import get_fft_of_image
+
+REFERENCES = ["astronaut", "chelsea", "coffee", "rocket", "camera", "brick"]
+UPSCALERS = {
+    "nearest": nearest_upscale,
+    "linear": linear_upscale,
+    "bicubic": bicubic_upscale,
+}
+FACTORS = [2, 4]
+
+
+def get_pairs() -> list[tuple[Image, Image]]:
+    """Return the reference and upscaled image pairs.
+
+    :return: The image pairs.
+    """
+    pairs = []
+    for reference_name in REFERENCES:
+        reference_array = getattr(data, reference_name)()
+        # Images are read in BGR, as cv2 does.
+        if reference_array.ndim == 2:
+            reference_array = numpy.dstack([reference_array] * 3)
+        reference_array = numpy.ascontiguousarray(reference_array[:, :, ::-1])
+        for factor in FACTORS:
+            height = reference_array.shape[0] // factor * factor
+            width = reference_array.shape[1] // factor * factor
+            reference = Image(reference_array[:height, :width], name=reference_name)
+            low_resolution = Image(
+                reference, name="low_resolution",
+                preprocess=lambda img, f=factor: shrink_to(
+                    img, img.shape[1] // f, img.shape[0] // f))
+            for upscaler_name, upscaler in UPSCALERS.items():
+                pairs.append((reference, Image(
+                    low_resolution, name=f"{upscaler_name}_x{factor}",
+                    preprocess=lambda img, u=upscaler, f=factor: u(img, f))))
+    return pairs
+
+
+def get_grid_ssim_delta(reference: Image, image: Image) -> float:
+    """Return the largest SSIM delta of the HRI95 grids between precisions.
+
+    :param reference: The reference image.
+    :param image: The compared image.
+    :return: The largest absolute delta.
+    """
+    profiles = []
+    for precision in ("float64", "float32"):
+        fft_of_true = get_fft_of_image(reference.get_image(), precision=precision)
+        fft_of_pred = get_fft_of_image(image.get_image(), precision=precision)
+        ssim_of_grid = CenteredSSIM(fft_of_true, fft_of_pred)
+        profiles.append(numpy.array(
+            [ssim_of_grid(size) for size in get_grid_sizes(fft_of_true.shape[0])]))
+    return float(numpy.nanmax(numpy.abs(profiles[0] - profiles[1])))
+
+
+if __name__ == "__main__":
+    METRICS = {
+        "HRI95 (px)": HarmonicsRadius,
+        "SSIM": StructuralSimilarityIndex,
+        "PSNR (dB)": PeakSignalToNoiseRatio,
+        "MSE (px^2)": MeanSquaredError,
+    }
+
+    deltas: dict[str, list[float]] = {name: [] for name in METRICS}
+    deltas["HRI95 grid SSIM"] = []
+    for reference_image, compared_image in get_pairs():
+        for metric_name, metric_class in METRICS.items():
+            values = [
+                metric_class(precision=precision).calculate(
+                    y_true=reference_image, y_pred=compared_image).value
+                for precision in ("float64", "float32")
+            ]
+            deltas[metric_name].append(abs(float(values[0]) - float(values[1])))
+        deltas["HRI95 grid SSIM"].append(
+            get_grid_ssim_delta(reference_image, compared_image))
+
+    print(f"{len(deltas['SSIM'])} image pairs\n")
+    print("| Metric | Max abs delta | Mean abs delta |")
+    print("| --- | --- | --- |")
+    for metric_name, metric_deltas in deltas.items():
+        print(f"| {metric_name} | {max(metric_deltas):.3g} "
+              f"| {sum(metric_deltas) / len(metric_deltas):.3g} |")
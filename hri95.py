@@ -2,17 +2,54 @@
 Main application script
 """
 import argparse
+import os
+import sys
 
-from core.metrics import (
-    MeanSquaredError,
-    HarmonicsRadius,
-    StructuralSimilarityIndex,
-    PeakSignalToNoiseRatio
+from core.batch import (
+    METRICS,
+    OUTPUT_FORMATS,
+    list_images,
+    pair_directories,
+    read_manifest,
+    score_pairs,
+    warm_references,
+    write_rows,
 )
-
+from core.disk_cache import CACHE_DIR_VARIABLE, configure_disk_cache
+from core.fft_backend import FFT_BACKEND_VARIABLE, FFT_BACKENDS, configure_fft_backend
 from core.settings import SRAnalyzerSettings
 from core.image import Image
 from core.sr_analyzer import SRAnalyzer
+from core.video import DEFAULT_PREFETCH, evaluate_video
+
+
+def metric_list(value: str) -> list[str]:
+    """Parse a comma separated list of metric names.
+
+    :param value: The comma separated metric names.
+    :return: The metric names.
+    """
+    metric_names = [name.strip().lower() for name in value.split(",") if name.strip()]
+    unknown_metrics = [name for name in metric_names if name not in METRICS]
+    if unknown_metrics or not metric_names:
+        raise argparse.ArgumentTypeError(
+            f"Metrics must be a comma separated subset of {', '.join(METRICS)}.")
+    return metric_names
+
+
+def threshold_list(value: str) -> list[float]:
+    """Parse a comma separated list of SSIM thresholds.
+
+    :param value: The comma separated thresholds, e.g. "0.9,0.95,0.99".
+    :return: The thresholds.
+    """
+    try:
+        thresholds = [float(threshold) for threshold in value.split(",") if threshold.strip()]
+    except ValueError as error:
+        raise argparse.ArgumentTypeError("Thresholds must be comma separated numbers.") from error
+    if not thresholds or not all(0 < threshold < 1 for threshold in thresholds):
+        raise argparse.ArgumentTypeError("Thresholds must be between 0 and 1.")
+    return thresholds
 
 
 def argument_parser() -> dict[str, str]:
@@ -27,7 +64,6 @@ def argument_parser() -> dict[str, str]:
         "-t",
         type=str,
         help="Path to the true image",
-        required=True,
         dest="true_image",
     )
     parser.add_argument(
@@ -35,18 +71,278 @@ def argument_parser() -> dict[str, str]:
         "-p",
         type=str,
         help="Path to the predicted image",
-        required=True,
         dest="predicted_image",
     )
+    parser.add_argument(
+        "--metrics",
+        "-m",
+        type=metric_list,
+        default=list(METRICS),
+        help=f"Comma separated metrics to calculate (default: {','.join(METRICS)})",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=["float64", "float32"],
+        default="float64",
+        help="Floating point precision of the metrics",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Calculate the spectra block by block in float32, within about 4 "
+             "bytes per pixel, for very large images",
+    )
+    parser.add_argument(
+        "--fft-backend",
+        choices=FFT_BACKENDS,
+        help="FFT backend of the spectra (default: $HRI95_FFT_BACKEND, or scipy if "
+             "installed, otherwise numpy)",
+    )
+    parser.add_argument(
+        "--fft-workers",
+        type=int,
+        help="Number of the threads of an FFT, -1 for all the CPUs (default: 1)",
+    )
+    parser.add_argument(
+        "--thresholds",
+        type=threshold_list,
+        help="Comma separated SSIM thresholds of the HRI, e.g. 0.9,0.95,0.99, "
+             "calculated from a single SSIM profile (default: 0.95)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write the timings of the stages to the path, as Chrome trace "
+             "JSON or as CSV if it ends with .csv",
+    )
+
+    batch = parser.add_argument_group(
+        "batch mode", "Score many pairs from a manifest or paired directories.")
+    batch.add_argument(
+        "--manifest",
+        type=str,
+        help="CSV or JSONL manifest with 'true' and 'predicted' paths",
+    )
+    batch.add_argument(
+        "--true-dir",
+        type=str,
+        help="Directory of the true images",
+    )
+    batch.add_argument(
+        "--predicted-dir",
+        type=str,
+        help="Directory of the predicted images",
+    )
+    batch.add_argument(
+        "--true-pattern",
+        type=str,
+        default="*.png",
+        help="File name pattern of the true images, e.g. '*_HR.png'",
+    )
+    batch.add_argument(
+        "--predicted-pattern",
+        type=str,
+        default="*.png",
+        help="File name pattern of the predicted images, e.g. '*_SR.png'",
+    )
+    batch.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes",
+    )
+    batch.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="jsonl",
+        help="Output format of the rows",
+    )
+    batch.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        help="Output file of the rows (default: standard output)",
+    )
+
+    video = parser.add_argument_group(
+        "video mode", "Score the frames of a video against the true video.")
+    video.add_argument(
+        "--true-video",
+        type=str,
+        help="True video file, or directory of frames matching --true-pattern",
+    )
+    video.add_argument(
+        "--predicted-video",
+        type=str,
+        help="Predicted video file, or directory of frames matching --predicted-pattern",
+    )
+    video.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        help="Number of frame pairs decoded ahead in a background thread",
+    )
+    video.add_argument(
+        "--no-warm-start",
+        action="store_false",
+        dest="warm_start",
+        help="Search the HRI95 of every frame from scratch instead of from the previous frame",
+    )
+
+    cache = parser.add_argument_group(
+        "disk cache", "Keep the spectra of the images on disk between the runs.")
+    cache.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory of the spectrum cache (default: $HRI95_CACHE_DIR, disabled if unset)",
+    )
+    cache.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        help="Byte limit of the spectrum cache, the least recently used spectra are removed",
+    )
+    cache.add_argument(
+        "--warm",
+        action="store_true",
+        help="Only calculate the spectra of the true images into the cache",
+    )
 
     arguments = parser.parse_args()
+    is_batch = arguments.manifest is not None or arguments.true_dir is not None
+    is_video = arguments.true_video is not None or arguments.predicted_video is not None
+    if is_video:
+        if arguments.true_video is None or arguments.predicted_video is None:
+            parser.error("--true-video and --predicted-video are required together.")
+        if arguments.prefetch < 1:
+            parser.error("--prefetch must be positive.")
+    elif arguments.warm:
+        if arguments.cache_dir is None and not os.environ.get(CACHE_DIR_VARIABLE):
+            parser.error("--warm requires --cache-dir.")
+        if not is_batch and arguments.true_image is None:
+            parser.error("--warm requires --true, --manifest or --true-dir.")
+    elif is_batch and arguments.manifest is None and arguments.predicted_dir is None:
+        parser.error("--true-dir requires --predicted-dir.")
+    elif not is_batch and (arguments.true_image is None or arguments.predicted_image is None):
+        parser.error("Either --true and --predicted, --manifest or --true-dir "
+                     "and --predicted-dir are required.")
+    if arguments.thresholds is not None and (is_batch or is_video or arguments.warm):
+        parser.error("--thresholds applies to a single pair of images only.")
+    if arguments.low_memory and (is_video or arguments.warm):
+        parser.error("--low-memory applies to a single pair and to the batch mode only.")
+
     return {"true": arguments.true_image,
-            "predicted": arguments.predicted_image}
+            "predicted": arguments.predicted_image,
+            "metrics": arguments.metrics,
+            "precision": arguments.precision,
+            "low_memory": arguments.low_memory,
+            "fft_backend": arguments.fft_backend,
+            "fft_workers": arguments.fft_workers,
+            "trace": arguments.trace,
+            "thresholds": arguments.thresholds,
+            "batch": is_batch,
+            "video": is_video,
+            "true_video": arguments.true_video,
+            "predicted_video": arguments.predicted_video,
+            "prefetch": arguments.prefetch,
+            "warm_start": arguments.warm_start,
+            "manifest": arguments.manifest,
+            "true_dir": arguments.true_dir,
+            "predicted_dir": arguments.predicted_dir,
+            "true_pattern": arguments.true_pattern,
+            "predicted_pattern": arguments.predicted_pattern,
+            "workers": arguments.workers,
+            "format": arguments.format,
+            "output": arguments.output,
+            "cache_dir": arguments.cache_dir,
+            "cache_max_bytes": arguments.cache_max_bytes,
+            "warm": arguments.warm}
+
+
+def configure_process(arguments: dict[str, str]) -> None:
+    """Configure the disk cache and the FFT backend of the process and of
+    its worker processes.
+
+    :param arguments: The parsed arguments.
+    """
+    if arguments["cache_dir"] is not None:
+        configure_disk_cache(arguments["cache_dir"], arguments["cache_max_bytes"])
+    elif arguments["cache_max_bytes"] is not None:
+        configure_disk_cache(os.environ.get(CACHE_DIR_VARIABLE), arguments["cache_max_bytes"])
+    if arguments["fft_backend"] is not None or arguments["fft_workers"] is not None:
+        configure_fft_backend(arguments["fft_backend"] or os.environ.get(FFT_BACKEND_VARIABLE),
+                              arguments["fft_workers"])
+
+
+def run_warm(arguments: dict[str, str]) -> None:
+    """Calculate the spectra of the true images into the disk cache.
+
+    :param arguments: The parsed arguments.
+    """
+    if arguments["manifest"] is not None:
+        true_paths = [true_path for true_path, _ in read_manifest(arguments["manifest"])]
+    elif arguments["true_dir"] is not None:
+        true_paths = list_images(arguments["true_dir"], arguments["true_pattern"])
+    else:
+        true_paths = [arguments["true"]]
+
+    for true_path in warm_references(true_paths, workers=arguments["workers"],
+                                     precision=arguments["precision"]):
+        print(f"Cached: {true_path}")
+
+
+def run_batch(arguments: dict[str, str]) -> None:
+    """Score the pairs of the batch mode and stream the rows.
+
+    :param arguments: The parsed arguments.
+    """
+    if arguments["manifest"] is not None:
+        pairs = read_manifest(arguments["manifest"])
+    else:
+        pairs = pair_directories(arguments["true_dir"], arguments["predicted_dir"],
+                                 arguments["true_pattern"], arguments["predicted_pattern"])
+
+    rows = score_pairs(pairs, arguments["metrics"],
+                       workers=arguments["workers"], precision=arguments["precision"],
+                       low_memory=arguments["low_memory"])
+    if arguments["output"] is None:
+        write_rows(rows, sys.stdout, arguments["format"], arguments["metrics"])
+        return
+    with open(arguments["output"], "w", encoding="utf-8", newline="") as output:
+        write_rows(rows, output, arguments["format"], arguments["metrics"])
+
+
+def run_video(arguments: dict[str, str]) -> None:
+    """Score the frames of the video mode and stream the rows.
+
+    :param arguments: The parsed arguments.
+    """
+    rows = evaluate_video(arguments["true_video"], arguments["predicted_video"],
+                          arguments["metrics"], precision=arguments["precision"],
+                          warm_start=arguments["warm_start"],
+                          prefetch_depth=arguments["prefetch"],
+                          true_pattern=arguments["true_pattern"],
+                          predicted_pattern=arguments["predicted_pattern"])
+    if arguments["output"] is None:
+        write_rows(rows, sys.stdout, arguments["format"], arguments["metrics"], ("frame",))
+        return
+    with open(arguments["output"], "w", encoding="utf-8", newline="") as output:
+        write_rows(rows, output, arguments["format"], arguments["metrics"], ("frame",))
 
 
 if __name__ == "__main__":
     # Return the file paths of the images.
     images = argument_parser()
+    configure_process(images)
+    if images["warm"]:
+        run_warm(images)
+        sys.exit(0)
+    if images["video"]:
+        run_video(images)
+        sys.exit(0)
+    if images["batch"]:
+        run_batch(images)
+        sys.exit(0)
 
     # Read the images.
     true_image = Image(images['true'], name="true_image")
@@ -54,14 +350,17 @@ if __name__ == "__main__":
 
     # Create the analyzer.
     analyzer = SRAnalyzer(
-        SRAnalyzerSettings(name="HRI95 Calculator")
+        SRAnalyzerSettings(name="HRI95 Calculator", precision=images["precision"],
+                           trace=images["trace"] is not None, trace_path=images["trace"],
+                           low_memory=images["low_memory"])
     )
 
     # Add metrics.
-    analyzer.add_metric(HarmonicsRadius())
-    analyzer.add_metric(MeanSquaredError())
-    analyzer.add_metric(StructuralSimilarityIndex())
-    analyzer.add_metric(PeakSignalToNoiseRatio())
+    for metric_name in images["metrics"]:
+        if metric_name == "hri95" and images["thresholds"] is not None:
+            analyzer.add_metric(METRICS[metric_name](threshold=images["thresholds"]))
+        else:
+            analyzer.add_metric(METRICS[metric_name]())
 
     # Add images.
     analyzer.add_reference_image(true_image)
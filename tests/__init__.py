@@ -0,0 +1,3 @@
+"""
+Holds the tests of the package.
+"""
@@ -0,0 +1,42 @@
+"""
+Holds the fixtures shared by the tests.
+"""
+import pytest
+
+from core.cache import get_cache
+from core.disk_cache import CACHE_DIR_VARIABLE, CACHE_MAX_BYTES_VARIABLE, configure_disk_cache
+from core.image import Image
+from core.utils import save_image
+from tests.images import make_image
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch: pytest.MonkeyPatch):
+    """Start every test with an empty artifact cache and no disk cache."""
+    monkeypatch.delenv(CACHE_DIR_VARIABLE, raising=False)
+    monkeypatch.delenv(CACHE_MAX_BYTES_VARIABLE, raising=False)
+    configure_disk_cache(None)
+    get_cache().clear()
+    yield
+    get_cache().clear()
+    configure_disk_cache(None)
+
+
+@pytest.fixture
+def reference() -> Image:
+    """The reference image."""
+    return Image(make_image(0), "reference")
+
+
+@pytest.fixture
+def predicted() -> Image:
+    """A predicted image of the reference."""
+    return Image(make_image(1), "predicted")
+
+
+@pytest.fixture
+def image_path(tmp_path) -> str:
+    """The path of an image file."""
+    path = str(tmp_path / "image.png")
+    save_image(make_image(0), path)
+    return path
@@ -0,0 +1,17 @@
+"""
+Holds the synthetic images of the tests.
+"""
+import numpy
+
+
+def make_image(seed: int, size: int = 64) -> numpy.ndarray:
+    """Return a smooth 8-bit color image with some noise.
+
+    :param seed: The seed of the noise.
+    :param size: The height and the width of the image.
+    :return: The pixels of the image.
+    """
+    rows, columns = numpy.mgrid[0:size, 0:size]
+    pattern = 127 + 100 * numpy.sin(rows / 5) * numpy.cos(columns / 7)
+    noise = numpy.random.default_rng(seed).normal(0, 8, (size, size, 3))
+    return numpy.clip(pattern[:, :, numpy.newaxis] + noise, 0, 255).astype(numpy.uint8)
@@ -0,0 +1,39 @@
+"""
+Holds the tests of the artifact cache.
+"""
+import pytest
+
+from core.cache import DEFAULT_MAX_BYTES, get_cache
+from core.image import Image
+from core.utils import get_half_fft_of_image, read_image
+from tests.images import make_image
+
+
+def test_cached_arrays_are_read_only(image_path: str):
+    """The arrays served from the enabled cache are shared and read-only."""
+    image = Image(image_path, "image")
+    for array in (read_image(image_path), image.get_image(),
+                  get_half_fft_of_image(image.get_image(), key=image.get_key())):
+        with pytest.raises(ValueError, match="read-only"):
+            array[0, 0] = 0
+        copied = array.copy()
+        copied[0, 0] = 0
+
+
+def test_given_arrays_stay_writable():
+    """The arrays given to an image are not made read-only by the cache."""
+    pixels = make_image(0)
+    image = Image(pixels, "image")
+    get_half_fft_of_image(image.get_image(), key=image.get_key())
+    assert image.get_image() is pixels
+    pixels[0, 0] = 0
+
+
+def test_disabled_cache_returns_writable_arrays(image_path: str):
+    """The arrays are writable, as without the cache, once it is disabled."""
+    get_cache().resize(0)
+    try:
+        for pixels in (read_image(image_path), Image(image_path, "image").get_image()):
+            pixels[0, 0] = 0
+    finally:
+        get_cache().resize(DEFAULT_MAX_BYTES)
@@ -0,0 +1,43 @@
+"""
+Holds the tests of the disk cache of the spectra.
+"""
+# pylint: disable=protected-access
+import os
+
+from core.disk_cache import configure_disk_cache
+from core.image import Image
+from core.metrics import HarmonicsRadius
+from core.settings import SRAnalyzerSettings
+from core.sr_analyzer import SRAnalyzer
+from core.utils import save_image
+from core.video import evaluate_video
+from tests.images import make_image
+
+
+def test_analyzer_persists_the_reference_only(tmp_path, reference: Image, predicted: Image):
+    """The analyzer stores the spectrum of its reference, not of its images."""
+    disk_cache = configure_disk_cache(str(tmp_path / "cache"))
+    analyzer = SRAnalyzer(SRAnalyzerSettings(name="test"))
+    analyzer.add_metric(HarmonicsRadius())
+    analyzer.add_reference_image(reference)
+    analyzer.add_image(predicted)
+    analyzer.add_image(Image(make_image(2), "other"))
+    analyzer.calculate()
+    assert len(disk_cache._get_entries()) == 1
+
+
+def test_video_leaves_the_disk_cache_unchanged(tmp_path):
+    """The frames of a video are scored once, so none is stored on disk."""
+    for directory, offset in (("true", 0), ("predicted", 100)):
+        os.makedirs(tmp_path / directory)
+        for frame_index in range(6):
+            save_image(make_image(offset + frame_index),
+                       str(tmp_path / directory / f"{frame_index:03d}.png"))
+    disk_cache = configure_disk_cache(str(tmp_path / "cache"))
+    disk_cache.store("warmed", "half_spectrum", make_image(0).astype("float64"))
+
+    rows = list(evaluate_video(str(tmp_path / "true"), str(tmp_path / "predicted"),
+                               metric_names=["hri95"]))
+    assert len(rows) == 6
+    warmed_path = disk_cache._get_path("warmed", "half_spectrum")
+    assert [entry.path for entry in disk_cache._get_entries()] == [warmed_path]
@@ -0,0 +1,121 @@
+"""
+Holds the tests of the FFT backends.
+"""
+# pylint: disable=protected-access
+import os
+
+import numpy
+import pytest
+
+from core.fft_backend import (
+    FFT_BACKEND_VARIABLE,
+    FFT_WORKERS_VARIABLE,
+    PyFFTWBackend,
+    configure_fft_backend,
+    create_fft_backend,
+    get_fft_backend,
+)
+from core.image import Image
+from core.metrics.interface_metric import InterfaceMetric, MetricResult
+from core.settings import SRAnalyzerSettings
+from core.sr_analyzer import SRAnalyzer
+
+
+class BackendMetric(InterfaceMetric):
+    """A metric returning the name of the FFT backend it is given."""
+
+    @property
+    def keywords_needed(self) -> dict[str, type]:
+        """The keywords needed to calculate the metric.
+
+        :return: The keywords needed.
+        """
+        return {"y_true": Image, "y_pred": Image}
+
+    def calculate(self, **kwargs) -> MetricResult:
+        """Return the name of the FFT backend of the analyzer.
+
+        :param kwargs: The keywords of the analyzer.
+        :return: The name in the details of a MetricResult object.
+        """
+        fft_backend = kwargs.get("fft_backend") or get_fft_backend()
+        return MetricResult(metric_name="backend", metric_value=0, metric_unit="",
+                            details={"fft_backend": fft_backend.name})
+
+
+def _get_backend_name(settings: SRAnalyzerSettings, reference: Image, predicted: Image) -> str:
+    """Return the name of the FFT backend the metrics of an analyzer get.
+
+    :param settings: The settings of the analyzer.
+    :param reference: The reference image.
+    :param predicted: The predicted image.
+    :return: The name of the FFT backend.
+    """
+    analyzer = SRAnalyzer(settings)
+    analyzer.add_metric(BackendMetric())
+    analyzer.add_reference_image(reference)
+    analyzer.add_image(predicted)
+    return analyzer.calculate()[0].details["fft_backend"]
+
+
+@pytest.fixture(autouse=True)
+def clean_backend(monkeypatch: pytest.MonkeyPatch):
+    """Start every test with the default backend of the process."""
+    monkeypatch.delenv(FFT_BACKEND_VARIABLE, raising=False)
+    monkeypatch.delenv(FFT_WORKERS_VARIABLE, raising=False)
+    configure_fft_backend(None)
+    yield
+    configure_fft_backend(None)
+
+
+def test_analyzers_keep_their_backends(reference: Image, predicted: Image):
+    """The backend of an analyzer changes neither the other analyzers nor
+    the environment."""
+    default_name = get_fft_backend().name
+    numpy_settings = SRAnalyzerSettings(name="numpy", fft_backend="numpy")
+    assert _get_backend_name(numpy_settings, reference, predicted) == "numpy"
+    assert _get_backend_name(SRAnalyzerSettings(name="default"),
+                             reference, predicted) == default_name
+    assert get_fft_backend().name == default_name
+    assert FFT_BACKEND_VARIABLE not in os.environ
+
+
+def test_process_workers_receive_the_backend(reference: Image, predicted: Image):
+    """The worker processes calculate with the backend of the settings."""
+    settings = SRAnalyzerSettings(name="process", executor="process", workers=2,
+                                  fft_backend="numpy", fft_workers=2)
+    assert _get_backend_name(settings, reference, predicted) == "numpy"
+
+
+def test_configure_fft_backend_leaves_the_environment():
+    """The backend of the process is selected without the environment."""
+    assert configure_fft_backend("numpy", 2) is create_fft_backend("numpy", 2)
+    assert get_fft_backend() is create_fft_backend("numpy", 2)
+    assert FFT_BACKEND_VARIABLE not in os.environ
+    assert FFT_WORKERS_VARIABLE not in os.environ
+
+
+def test_pyfftw_matches_numpy_and_reuses_its_plans(monkeypatch: pytest.MonkeyPatch):
+    """The pyFFTW transforms are the NumPy ones, with one plan per transform,
+    shape and type."""
+    pytest.importorskip("pyfftw")
+    backend = PyFFTWBackend(max_plans=4)
+    created_plans = []
+    create_plan = backend._create_plan
+    monkeypatch.setattr(backend, "_create_plan",
+                        lambda *args: created_plans.append(args) or create_plan(*args))
+
+    array = numpy.random.default_rng(0).normal(size=(48, 40))
+    for _ in range(2):
+        numpy.testing.assert_allclose(backend.fft2(array), numpy.fft.fft2(array), atol=1e-9)
+        numpy.testing.assert_allclose(backend.rfft2(array), numpy.fft.rfft2(array), atol=1e-9)
+        numpy.testing.assert_allclose(backend.ifft2(array), numpy.fft.ifft2(array), atol=1e-9)
+        numpy.testing.assert_allclose(backend.fft(array, axis=0),
+                                      numpy.fft.fft(array, axis=0), atol=1e-9)
+    assert len(created_plans) == 4
+    assert len(backend._plans) == 4
+
+    # The least recently used plan is forgotten over the limit.
+    backend.rfft(array)
+    assert len(created_plans) == 5
+    assert len(backend._plans) == 4
@@ -0,0 +1,48 @@
+"""
+Holds the tests of the leaderboard.
+"""
+import numpy
+import pytest
+
+from core.image import Image
+from core.leaderboard import Leaderboard
+from core.metrics import MeanSquaredError
+from core.settings import SRAnalyzerSettings
+from tests.images import make_image
+
+
+def _make_leaderboard() -> Leaderboard:
+    """Return a leaderboard of the MSE.
+
+    :return: The leaderboard.
+    """
+    board = Leaderboard(SRAnalyzerSettings(name="test"))
+    board.add_metric(MeanSquaredError())
+    return board
+
+
+def test_reference_added_after_a_model_by_name():
+    """A reference added after a model given by names is matched by name."""
+    board = _make_leaderboard()
+    board.add_reference_image(Image(make_image(0), "first"))
+    board.add_model("model", {"first": Image(make_image(1), "output_0"),
+                              "second": Image(make_image(2), "output_1")})
+    board.add_reference_image(Image(make_image(3), "second"))
+    board.add_reference_image(Image(make_image(4), "third"))
+
+    results = board.calculate()
+    assert results.values.shape == (3, 1, 1)
+    assert numpy.isfinite(results.values[:2, 0, 0]).all()
+    assert numpy.isnan(results.values[2, 0, 0])
+
+
+def test_reference_added_after_a_model_by_order():
+    """A model given in order without an output for a later reference is
+    rejected with a clear error."""
+    board = _make_leaderboard()
+    board.add_reference_image(Image(make_image(0), "first"))
+    board.add_model("model", [Image(make_image(1), "output")])
+    board.add_reference_image(Image(make_image(2), "second"))
+
+    with pytest.raises(ValueError, match="1 outputs for 2 references"):
+        board.calculate()
@@ -0,0 +1,45 @@
+"""
+Holds the tests of the search strategies of the grid size.
+"""
+import pytest
+
+from core.radius_search import SEARCH_STRATEGIES, get_grid_sizes, seeded_search
+
+GRID_SIZES = get_grid_sizes(80)
+"""Holds the 17 grid sizes of an 80 pixel high spectrum, from 40 down to 8."""
+THRESHOLD = 0.95
+"""Holds the SSIM threshold of the tests."""
+
+
+def _profile(passing: set[int]) -> dict[int, float]:
+    """Return an increasing SSIM profile passing at the given indices.
+
+    :param passing: The indices of the passing grid sizes.
+    :return: The SSIM by the grid size.
+    """
+    return {grid_size: (0.96 if index in passing else 0.5 + 0.02 * index)
+            for index, grid_size in enumerate(GRID_SIZES)}
+
+
+@pytest.mark.parametrize("search", sorted(SEARCH_STRATEGIES))
+def test_monotonic_profile(search: str):
+    """Every strategy finds the first passing grid of a monotonic profile."""
+    profile = _profile(set(range(10, len(GRID_SIZES))))
+    assert SEARCH_STRATEGIES[search](profile.get, GRID_SIZES, THRESHOLD) == GRID_SIZES[10]
+
+
+def test_non_monotonic_ends_are_scanned():
+    """A skipped segment whose ends contradict the assumption is scanned."""
+    profile = _profile({3} | set(range(10, len(GRID_SIZES))))
+    profile[GRID_SIZES[8]] = 0.1
+    for search in SEARCH_STRATEGIES.values():
+        assert search(profile.get, GRID_SIZES, THRESHOLD) == GRID_SIZES[3]
+
+
+def test_monotonic_looking_ends_hide_a_passing_grid():
+    """A passing grid inside a skipped segment whose ends look monotonic is
+    found by the linear scan only, the heuristics report a smaller grid."""
+    profile = _profile({3} | set(range(10, len(GRID_SIZES))))
+    assert SEARCH_STRATEGIES["linear"](profile.get, GRID_SIZES, THRESHOLD) == GRID_SIZES[3]
+    assert SEARCH_STRATEGIES["bisect"](profile.get, GRID_SIZES, THRESHOLD) == GRID_SIZES[10]
+    assert seeded_search(profile.get, GRID_SIZES, THRESHOLD, GRID_SIZES[12]) == GRID_SIZES[10]
@@ -0,0 +1,49 @@
+"""
+Holds the tests of the fused MSE, PSNR and SSIM metrics.
+"""
+import pytest
+
+from core.image import Image
+from core.metrics import MeanSquaredError, PeakSignalToNoiseRatio, StructuralSimilarityIndex
+from core.metrics import spatial_metrics
+from core.settings import SRAnalyzerSettings
+from core.sr_analyzer import SRAnalyzer
+
+
+def _calculate(metrics: list, reference: Image, predicted: Image) -> dict[str, float]:
+    """Calculate the metrics of the pair with an analyzer.
+
+    :param metrics: The metrics.
+    :param reference: The reference image.
+    :param predicted: The predicted image.
+    :return: The values by the names of the results.
+    """
+    analyzer = SRAnalyzer(SRAnalyzerSettings(name="test"))
+    for metric in metrics:
+        analyzer.add_metric(metric)
+    analyzer.add_reference_image(reference)
+    analyzer.add_image(predicted)
+    return {metric_result.name: metric_result.value for metric_result in analyzer.calculate()}
+
+
+def test_fused_metrics_match_separate(reference: Image, predicted: Image):
+    """The fused metrics are the ones calculated one by one."""
+    metrics = [MeanSquaredError(), PeakSignalToNoiseRatio(), StructuralSimilarityIndex()]
+    separate = {metric_result.name: metric_result.value for metric_result in
+                (metric.calculate(y_true=reference, y_pred=predicted) for metric in metrics)}
+    assert _calculate(metrics, reference, predicted) == pytest.approx(separate, rel=1e-9)
+
+
+def test_mse_and_psnr_do_not_calculate_ssim(reference: Image, predicted: Image,
+                                            monkeypatch: pytest.MonkeyPatch):
+    """The MSE and the PSNR registered together skip the SSIM maps."""
+    def fail(*_):
+        """Fail if the SSIM map is calculated."""
+        raise AssertionError("The SSIM is calculated.")
+
+    monkeypatch.setattr(spatial_metrics, "local_ssim_map", fail)
+    values = _calculate([MeanSquaredError(), PeakSignalToNoiseRatio()], reference, predicted)
+    assert values == pytest.approx({
+        "mse": MeanSquaredError().calculate(y_true=reference, y_pred=predicted).value,
+        "PSNR": PeakSignalToNoiseRatio().calculate(y_true=reference, y_pred=predicted).value,
+    }, rel=1e-9)